@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+# Use the modules in "src", the same as build.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workspace_generator import WorkspaceGenerator, WorkspaceSpec  # noqa: E402
+from dependency import Dependency  # noqa: E402
+from factories.parser_factory import ParserFactory  # noqa: E402
+from factories.project_factory import ProjectFactory  # noqa: E402
+from models.config import Config, GlobalConfig  # noqa: E402
+from models.const import FolderName  # noqa: E402
+from models.parser.file_content_cache import FileContentCache  # noqa: E402
+from models.template_cache import TemplateCache  # noqa: E402
+from usecases.build_usecase import BuildUsecase  # noqa: E402
+
+
+class BenchmarkRunner:
+    """Times the build path on a synthetic workspace, and saves the results as JSON
+
+    * config_init: Config.init_config of all (environment, project) units
+    * parser_factory_makes: ParserFactory.makes of all units
+    * project_build: Project.build of all units
+    * build_usecase: BuildUsecase.build (including the creation of the DI)
+    * cli_startup: importing build.py and resolving BuildUsecase (with the global config) in a new interpreter,
+      the startup of every command before building
+    Also the memory to hold the configs, the parsers and the projects of all units is measured by tracemalloc.
+    """
+    spec: WorkspaceSpec
+    repeat: int
+
+    def __init__(self, spec: WorkspaceSpec, repeat: int):
+        self.spec = spec
+        self.repeat = repeat
+
+    def run(self, workspace_path: str) -> dict:
+        WorkspaceGenerator(self.spec).generate(workspace_path)
+        cwd = os.getcwd()
+        os.chdir(workspace_path)
+        try:
+            results = {
+                'config_init': self._measure(self._run_config_init),
+                'parser_factory_makes': self._measure(self._run_parser_factory_makes),
+                'project_build': self._measure(self._run_project_build),
+                'build_usecase': self._measure(self._run_build_usecase),
+                'cli_startup': self._measure(self._run_cli_startup),
+            }
+            memory = self._measure_memory()
+        finally:
+            os.chdir(cwd)
+
+        return {
+            'commit': self._get_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'spec': self.spec.to_dict(),
+            'results': results,
+            'memory': memory,
+        }
+
+    def _measure(self, run: Callable[[], Optional[float]]) -> dict:
+        """Run repeatedly from the cold caches, and get the statistics of the seconds.
+        If run() returns the seconds (measured a part of it), use them.
+        """
+        seconds = []
+        for _ in range(self.repeat):
+            self._clear_caches()
+            start = time.perf_counter()
+            measured = run()
+            seconds.append(measured if measured is not None else time.perf_counter() - start)
+
+        return {
+            'min': min(seconds),
+            'median': statistics.median(seconds),
+            'mean': statistics.mean(seconds),
+            'runs': seconds,
+        }
+
+    def _measure_memory(self) -> dict:
+        """Get the bytes allocated for the configs, the parsers and the projects of all units, kept alive as in a build"""
+        self._clear_caches()
+        tracemalloc.start()
+        try:
+            global_config = self._get_global_config()
+            project_factory = ProjectFactory()
+            projects = []
+            for environment, name in self._get_units():
+                project = project_factory.make(name, environment, global_config)
+                project.config.get_parsers()
+                projects.append(project)
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {'units': len(projects), 'current_bytes': current_bytes, 'peak_bytes': peak_bytes}
+
+    def _clear_caches(self):
+        """Clear the caches shared by the process and the outputs, not to carry them over between the runs"""
+        FileContentCache.get_shared().clear()
+        TemplateCache.get_shared().clear()
+        shutil.rmtree(FolderName.OUTPUT_ROOT.value, ignore_errors=True)
+
+    def _get_units(self) -> list[tuple[str, str]]:
+        names = sorted(os.listdir(FolderName.TARGET_ROOT_FOLDER.value))
+        return [(env, name) for env in self.spec.environments for name in names]
+
+    def _get_global_config(self) -> GlobalConfig:
+        global_config = GlobalConfig()
+        global_config.init_config()
+        return global_config
+
+    def _run_config_init(self):
+        global_config = self._get_global_config()
+        for environment, name in self._get_units():
+            Config(f'{FolderName.TARGET_ROOT_FOLDER.value}/{name}', environment).init_config(global_config)
+
+    def _run_parser_factory_makes(self) -> float:
+        global_config = self._get_global_config()
+        configs = []
+        for environment, name in self._get_units():
+            config = Config(f'{FolderName.TARGET_ROOT_FOLDER.value}/{name}', environment)
+            config.init_config(global_config)
+            configs.append(config)
+
+        # Measure only the creation of the parsers
+        start = time.perf_counter()
+        parser_factory = ParserFactory()
+        for config in configs:
+            parser_factory.makes(config)
+        return time.perf_counter() - start
+
+    def _run_project_build(self):
+        global_config = self._get_global_config()
+        project_factory = ProjectFactory()
+        for environment, name in self._get_units():
+            project_factory.make(name, environment, global_config).build()
+
+    def _run_build_usecase(self):
+        Dependency().resolve(BuildUsecase).build()
+
+    def _run_cli_startup(self) -> float:
+        """Get the seconds to import build.py and resolve BuildUsecase in the workspace, measured in the new interpreter"""
+        src_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ('import sys, time\n'
+                f'sys.path.insert(0, {src_path!r})\n'
+                'start = time.perf_counter()\n'
+                'import build\n'
+                'from dependency import Dependency\n'
+                'from usecases.build_usecase import BuildUsecase\n'
+                'Dependency().resolve(BuildUsecase)\n'
+                'print(time.perf_counter() - start)\n')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=os.getcwd())
+        if result.returncode != 0:
+            raise Exception(f'Startup of build.py failed:\n{result.stderr}')
+        return float(result.stdout.strip().splitlines()[-1])
+
+    def _get_commit(self) -> str:
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except OSError:
+            return ''
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Compare the median seconds with the baseline results"""
+    lines = []
+    for name, result in results['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else float('inf')
+        lines.append(f"{name}: {base['median']:.4f}s -> {result['median']:.4f}s (x{ratio:.2f})")
+
+    base_memory = baseline.get('memory')
+    if base_memory is not None and 'memory' in results:
+        for name in ('current_bytes', 'peak_bytes'):
+            base, value = base_memory[name], results['memory'][name]
+            lines.append(f"memory {name}: {base} -> {value} (x{value / base if base else float('inf'):.2f})")
+    return lines
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the build on a synthetic workspace.')
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--environments', type=int, default=4)
+    parser.add_argument('--files', type=int, default=50, help='Number of templates per project')
+    parser.add_argument('--file-size', type=int, default=4096, help='Size of each template (bytes)')
+    parser.add_argument('--keys', type=int, default=200, help='Number of replacement keys')
+    parser.add_argument('--keys-per-file', type=int, default=10)
+    parser.add_argument('--replacement-files', type=int, default=5, help='Number of replacement files per project')
+    parser.add_argument('--replacement-file-size', type=int, default=16 * 1024)
+    parser.add_argument('--variant-ratio', type=float, default=0.1, help='Ratio of templates which have the environment variants')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workspace', help='Folder to generate the workspace. If not given, use a temporary folder')
+    parser.add_argument('--output', help='Path to save the results as JSON')
+    parser.add_argument('--compare', help='Path of the results JSON to compare with')
+    parser.add_argument('--startup-budget', type=float,
+                        help='Fail if the median seconds to import build.py and resolve BuildUsecase (cli_startup) is longer than this')
+    args = parser.parse_args(argv)
+
+    spec = WorkspaceSpec(args.projects, args.environments, args.files, args.file_size, args.keys, args.keys_per_file,
+                         args.replacement_files, args.replacement_file_size, args.variant_ratio, args.seed)
+    runner = BenchmarkRunner(spec, args.repeat)
+
+    if args.workspace is not None:
+        results = runner.run(args.workspace)
+    else:
+        with tempfile.TemporaryDirectory() as workspace_path:
+            results = runner.run(workspace_path)
+
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare is not None:
+        with open(args.compare, encoding='utf-8') as f:
+            for line in compare(results, json.load(f)):
+                print(line)
+
+    startup_seconds = results['results']['cli_startup']['median']
+    if args.startup_budget is not None and startup_seconds > args.startup_budget:
+        print(f'cli_startup: {startup_seconds:.4f}s is over the budget {args.startup_budget:.4f}s', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import random
+import yaml
+
+
+class WorkspaceSpec:
+    """Parameters of a synthetic workspace"""
+    project_count: int
+    environments: list[str]
+    files_per_project: int
+    file_size: int
+    key_count: int
+    keys_per_file: int
+    replacement_file_count: int
+    replacement_file_size: int
+    env_variant_ratio: float
+    seed: int
+
+    def __init__(self, project_count: int = 20, environment_count: int = 4, files_per_project: int = 50,
+                 file_size: int = 4096, key_count: int = 200, keys_per_file: int = 10,
+                 replacement_file_count: int = 5, replacement_file_size: int = 16 * 1024,
+                 env_variant_ratio: float = 0.1, seed: int = 0):
+        self.project_count = project_count
+        self.environments = [f'env{i}' for i in range(environment_count)]
+        self.files_per_project = files_per_project
+        self.file_size = file_size
+        self.key_count = key_count
+        self.keys_per_file = keys_per_file
+        self.replacement_file_count = replacement_file_count
+        self.replacement_file_size = replacement_file_size
+        self.env_variant_ratio = env_variant_ratio
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return {**self.__dict__}
+
+
+class WorkspaceGenerator:
+    """Creates a synthetic workspace (config.yml and "templates" folder) for the benchmarks
+
+    * The global config.yml defines half of the keys, and each project's config.yml defines the other half.
+    * Each project has the replacement files, and env_variant_ratio of the templates have the variants for each environment.
+    """
+    spec: WorkspaceSpec
+
+    def __init__(self, spec: WorkspaceSpec):
+        self.spec = spec
+        self._random = random.Random(spec.seed)
+
+    def generate(self, root_path: str):
+        os.makedirs(root_path, exist_ok=True)
+        keys = [f'KEY_{i}' for i in range(self.spec.key_count)]
+        global_keys, project_keys = keys[:len(keys) // 2], keys[len(keys) // 2:]
+
+        self._write_yaml(f'{root_path}/config.yml', {
+            'environments': self.spec.environments,
+            'replacements': {key: f'global-{key}' for key in global_keys},
+            'settings': {'is_multi_project_mode': True},
+        })
+
+        for index in range(self.spec.project_count):
+            self._generate_project(f'{root_path}/templates/project{index:04d}', keys, project_keys)
+
+    def _generate_project(self, project_path: str, keys: list[str], project_keys: list[str]):
+        self._write_yaml(f'{project_path}/config.yml', {
+            'replacements': {key: f'project-{key}' for key in project_keys},
+        })
+        # Override some keys for each environment
+        for environment in self.spec.environments:
+            self._write_yaml(f'{project_path}/config.{environment}.yml', {
+                'replacements': {key: f'{environment}-{key}' for key in project_keys[:10]},
+            })
+
+        file_keys = []
+        for index in range(self.spec.replacement_file_count):
+            file_key = f'FILE_{index}'
+            file_keys.append(file_key)
+            self._write_text(f'{project_path}/replacement_files/{file_key}.txt', self._make_text(self.spec.replacement_file_size, []))
+
+        for index in range(self.spec.files_per_project):
+            used_keys = self._random.sample(keys + file_keys, min(self.spec.keys_per_file, len(keys) + len(file_keys)))
+            dir_path = f'{project_path}/src/dir{index % 10}'
+            self._write_text(f'{dir_path}/file{index:04d}.yml.temp', self._make_text(self.spec.file_size, used_keys))
+
+            if self._random.random() < self.spec.env_variant_ratio:
+                for environment in self.spec.environments:
+                    self._write_text(f'{dir_path}/file{index:04d}.yml.{environment}.temp', self._make_text(self.spec.file_size, used_keys))
+
+    def _make_text(self, size: int, keys: list[str]) -> str:
+        """Make the text of about the size, which contains the keys"""
+        lines = []
+        length = 0
+        while length < size:
+            line = f'line{len(lines)}: ' + ''.join(self._random.choices('abcdefghijklmnopqrstuvwxyz ', k=60))
+            if keys and self._random.random() < 0.3:
+                line += ' {{' + self._random.choice(keys) + '}}'
+            lines.append(line)
+            length += len(line) + 1
+        return '\n'.join(lines) + '\n'
+
+    def _write_yaml(self, path: str, value: dict):
+        self._write_text(path, yaml.safe_dump(value))
+
+    def _write_text(self, path: str, text: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
@@ -1,25 +1,250 @@
+from __future__ import annotations
+import argparse
+import json
 import shutil
 import os
+import sys
+import time
+from typing import TYPE_CHECKING
 from dependency import Dependency
-from usecases.build_usecase import BuildUsecase
+from models.build_options import BuildOptions
+from models.build_result import BuildResult
+from models.build_stats import BuildStats
+from models.key_usage import KeyUsage
+from models.const import ArchiveFormat
+from models.shard_spec import ShardSpec
 
-# DI: https://github.com/python-injector/injector
+# The usecases are imported when used, to start the command faster
+if TYPE_CHECKING:
+    from usecases.affected_usecase import AffectedUsecase
+    from usecases.build_usecase import BuildUsecase
+    from usecases.merge_shards_usecase import MergeShardsUsecase
+    from usecases.watch_usecase import WatchUsecase
 
 
-def main(usecase: BuildUsecase) -> None:
-    # Remove the 'dist' folder
-    shutil.rmtree('dist', ignore_errors=True)
+def make_parser() -> argparse.ArgumentParser:
+    """Make the parser of the command line arguments"""
+    parser = argparse.ArgumentParser(description='Create Dockerfile and docker-compose files, separated by environment.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of (environment, project) units to build in parallel. 0 means the number of CPUs.')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Keep "dist", and build only the outputs whose inputs changed since the previous build.')
+    parser.add_argument('--cache-dir',
+                        help='Folder to keep the cache between runs (ex. parsed configuration files). If not given, nothing is cached. '
+                             'The cache files are loaded with pickle, so use a folder which only trusted users can write.')
+    parser.add_argument('--report-keys', action='store_true',
+                        help='Report the replacement keys which no template uses, and the keys which templates use but are not defined.')
+    parser.add_argument('--report',
+                        help='Path to save the timings of each phase and the counts per (environment, project) unit as JSON.')
+    parser.add_argument('--profile',
+                        help='Path to save the cProfile stats of the build. With --jobs, only the main process is profiled.')
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help='Keep running, and build again the projects whose files changed (templates, config*.yml and replacement_files).')
+    parser.add_argument('--watch-interval', type=float, default=1.0,
+                        help='Seconds between the checks of the files in watch mode.')
+    parser.add_argument('--env', action='append', dest='environments',
+                        help='Build only the environment. Can be given multiple times.')
+    parser.add_argument('--project', action='append', dest='project_names',
+                        help='Build only the project (wildcards such as "api-*" can be used). Can be given multiple times.')
+    parser.add_argument('--path', action='append', dest='path_patterns',
+                        help='Build only the files which match the pattern, relative to the "src" folder (ex. "nginx/*"). Can be given multiple times.')
+    parser.add_argument('--shard',
+                        help='Build only the part "i/N" (ex. "2/4") of the (environment, project) units, to split the build across the runners.')
+    parser.add_argument('--shard-balance', choices=['count', 'size'], default='count',
+                        help='Split the units by the number (count), or by the total bytes of the templates (size).')
+    parser.add_argument('--merge-shards', action='store_true',
+                        help='Do not build. Check that the shards in "dist" cover all units, and merge their manifests.')
+    parser.add_argument('--archive', choices=[archive_format.value for archive_format in ArchiveFormat],
+                        help='Output an archive per environment (ex. "dist/docker-develop.tar.gz") instead of the files in "dist". '
+                             'The archive is made from all selected units, so it cannot be used with --incremental, --watch or --rebuild.')
+    parser.add_argument('--affected-by', action='append', dest='affected_paths',
+                        help='Do not build. List the outputs which the change of the file (relative to the workspace) affects, '
+                             'using the manifest of the previous build. Can be given multiple times.')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='With --affected-by, build the units of the affected outputs incrementally, and keep the others.')
+    return parser
+
+
+def parse_args(argv: list[str] = None) -> BuildOptions:
+    """Parse the command line arguments"""
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.rebuild and args.affected_paths is None:
+        parser.error('--rebuild requires --affected-by')
+    # The archive is made again from the selected units. Building only the changed units would drop the others from it
+    if args.archive is not None:
+        for name, is_given in (('--incremental', args.incremental), ('--watch', args.watch), ('--rebuild', args.rebuild)):
+            if is_given:
+                parser.error(f'--archive cannot be used with {name}')
+
+    shard = ShardSpec.parse(args.shard, args.shard_balance == 'size') if args.shard is not None else None
+    return BuildOptions(jobs=args.jobs, is_incremental=args.incremental, cache_dir=args.cache_dir, is_report_keys=args.report_keys,
+                        report_path=args.report, profile_path=args.profile, is_watch=args.watch, watch_interval=args.watch_interval,
+                        environments=args.environments, project_names=args.project_names, path_patterns=args.path_patterns,
+                        shard=shard, is_merge_shards=args.merge_shards, archive_format=args.archive,
+                        affected_paths=args.affected_paths, is_rebuild_affected=args.rebuild)
+
+
+def main(usecase: BuildUsecase, options: BuildOptions = None) -> int:
+    # Remove the 'dist' folder, unless building incrementally or building a part of it
+    if options is None or not (options.is_incremental or options.is_filtered):
+        shutil.rmtree('dist', ignore_errors=True)
 
     # Execute the process
-    usecase.build()
+    start = time.perf_counter()
+    if options is not None and options.profile_path is not None:
+        results = profile_build(usecase, options)
+    else:
+        results = usecase.build(options)
+    seconds = time.perf_counter() - start
+
+    return report_results(results, options, seconds)
+
+
+def merge_shards(usecase: MergeShardsUsecase, options: BuildOptions) -> int:
+    """Check the outputs of the shards, and merge their manifests"""
+    problems = usecase.merge(options)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+def affected(usecase: AffectedUsecase, options: BuildOptions) -> int:
+    """Print the outputs affected by the changed files, and build them if --rebuild is given"""
+    from models.build_manifest import ManifestNotFoundError
+
+    try:
+        to_paths = usecase.get_affected_outputs(options.affected_paths)
+    except ManifestNotFoundError as e:
+        # Not a failure of the build, but of the usage. Exit in the same way as the invalid arguments
+        print(f'{make_parser().prog}: error: {e}', file=sys.stderr)
+        return 2
+    for to_path in to_paths:
+        print(to_path)
+    if not options.is_rebuild_affected:
+        return 0
+
+    start = time.perf_counter()
+    results = usecase.rebuild(options, options.affected_paths)
+    return report_results(results, options, time.perf_counter() - start)
+
+
+def watch(usecase: WatchUsecase, options: BuildOptions) -> int:
+    """Build, and build again on the changes of the files until interrupted (Ctrl+C)"""
+    # Remove the 'dist' folder, unless building incrementally or building a part of it
+    if not (options.is_incremental or options.is_filtered):
+        shutil.rmtree('dist', ignore_errors=True)
+
+    def on_build(results: list[BuildResult], changed_paths: list[str], seconds: float):
+        for path in changed_paths:
+            print(f'Changed: {path}')
+        report_results(results, options, seconds)
+        print(f'Built {len(results)} units in {seconds:.2f}s. Watching for changes...', flush=True)
+
+    def on_error(changed_paths: list[str], error: str):
+        for path in changed_paths:
+            print(f'Changed: {path}')
+        print(f'Failed to build:\n{error}Keeping the previous config. Watching for changes...', file=sys.stderr, flush=True)
+
+    try:
+        usecase.run(options, on_build, on_error)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def report_results(results: list[BuildResult], options: BuildOptions, seconds: float) -> int:
+    """Report the results of the build, and return the exit code"""
+    # Report the errors per unit
+    failed_results = [result for result in results if not result.is_success]
+    for result in failed_results:
+        print(f'Failed to build "{result.project_name}" ({result.environment}):\n{result.error}', file=sys.stderr)
+
+    if options is not None and options.is_report_keys:
+        report_key_usage(results)
+
+    if options is not None and options.report_path is not None:
+        save_report(options.report_path, results, seconds)
+
+    return 1 if failed_results else 0
+
+
+def profile_build(usecase: BuildUsecase, options: BuildOptions) -> list[BuildResult]:
+    """Build with cProfile, and save the stats to the profile path (open with pstats or snakeviz)"""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(usecase.build, options)
+    finally:
+        profiler.dump_stats(options.profile_path)
+
+
+def save_report(path: str, results: list[BuildResult], seconds: float) -> None:
+    """Save the timings and the counts of the build as JSON.
+    The phase seconds are the sum of all units, so they can exceed the total seconds with --jobs.
+    """
+    total = BuildStats()
+    units = []
+    for result in results:
+        stats = result.stats or BuildStats()
+        total.merge(stats)
+        units.append({
+            'environment': result.environment,
+            'project': result.project_name,
+            'is_success': result.is_success,
+            **stats.to_dict(),
+        })
+
+    report = {
+        'seconds': seconds,
+        'total': total.to_dict(),
+        'units': units,
+    }
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def report_key_usage(results: list[BuildResult]) -> None:
+    """Print the unused keys and the undefined keys of all units"""
+    key_usage = KeyUsage()
+    for result in results:
+        if result.key_usage is not None:
+            key_usage.merge(result.key_usage)
+
+    for key in key_usage.get_unused_keys():
+        print(f'Unused key: {key}')
+    for key, paths in sorted(key_usage.undefined_keys.items()):
+        print(f'Undefined key: {key} ({", ".join(sorted(paths))})')
 
 
 if __name__ == '__main__':
+    options = parse_args()
+
     # Move the current directory to the parent folder of the directory where this file exists
     os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
     # Create DI
-    injector = Dependency()
+    injector = Dependency(options)
+    from usecases.build_usecase import BuildUsecase
+    # Check the filters with the workspace, and exit with the usage, the same as the other invalid arguments
+    problems = injector.resolve(BuildUsecase).check_options(options)
+    if problems:
+        make_parser().error('; '.join(problems))
+
+    if options.is_watch:
+        from usecases.watch_usecase import WatchUsecase
+        sys.exit(watch(injector.resolve(WatchUsecase), options))
+    if options.affected_paths is not None:
+        from usecases.affected_usecase import AffectedUsecase
+        sys.exit(affected(injector.resolve(AffectedUsecase), options))
+    if options.is_merge_shards:
+        from usecases.merge_shards_usecase import MergeShardsUsecase
+        sys.exit(merge_shards(injector.resolve(MergeShardsUsecase), options))
+
     usecase: BuildUsecase = injector.resolve(BuildUsecase)
 
-    main(usecase)
+    sys.exit(main(usecase, options))
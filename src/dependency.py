@@ -1,29 +1,118 @@
-from factories.project_factory import ProjectFactory, ProjectFactoryBase
-from injector import Injector
-from models.config import GlobalConfig
-from models.config import GlobalConfig
-from injector import Injector, singleton
+from typing import TypeVar
+from models.build_options import BuildOptions
+
+T = TypeVar('T')
 
 
 class Dependency():
-    """Class that resolves dependencies for the main process"""
+    """Class that resolves dependencies for the main process
+
+    Each class has its provider method (without reading the signatures at runtime), which imports the classes only when called.
+    So the startup does not wait for the modules and the objects which the command does not use.
+    The other classes are resolved by injector, imported only then.
+    """
+    # Provider method of each class, keyed by "<module>.<class>" not to import the class before it's resolved
+    PROVIDERS = {
+        'models.build_options.BuildOptions': '_provide_options',
+        'models.config_loader.ConfigLoader': '_provide_config_loader',
+        'models.config.GlobalConfig': '_provide_global_config',
+        'factories.project_factory.ProjectFactoryBase': '_provide_project_factory',
+        'usecases.build_usecase.BuildUsecase': '_provide_build_usecase',
+        'usecases.watch_usecase.WatchUsecase': '_provide_watch_usecase',
+        'usecases.merge_shards_usecase.MergeShardsUsecase': '_provide_merge_shards_usecase',
+        'usecases.affected_usecase.AffectedUsecase': '_provide_affected_usecase',
+        'usecases.render_usecase.RenderUsecase': '_provide_render_usecase',
+    }
+
+    def __init__(self, options: BuildOptions = None, workspace_path: str = None) -> None:
+        self.options = options if options is not None else BuildOptions()
+        # Folder which has config.yml and "templates". If None, the current directory
+        self.workspace_path = workspace_path
+        self._instances = {}
+        self._injector = None
+
+    # When passing a class to resolve(), it creates the instance (only once) with its dependencies
+    def resolve(self, cls: type[T]) -> T:
+        if cls not in self._instances:
+            provider_name = self.PROVIDERS.get(f'{cls.__module__}.{cls.__qualname__}')
+            self._instances[cls] = getattr(self, provider_name)() if provider_name is not None else self._get_injector().get(cls)
+        return self._instances[cls]
+
+    def _provide_options(self) -> BuildOptions:
+        return self.options
 
-    def __init__(self) -> None:
-        # Load the function that sets up the dependencies
-        self.injector = Injector(self.__class__.config)
+    def _provide_config_loader(self):
+        from models.config_loader import ConfigLoader
+
+        # Share the configuration file cache between the global config and the projects
+        return ConfigLoader(self.options.cache_dir)
+
+    def _provide_global_config(self):
+        from models.config import GlobalConfig
+        from models.config_loader import ConfigLoader
 
-    # Method to set up the dependencies
-    @classmethod
-    def config(cls, binder):
         # Load the common configuration file
-        global_config = GlobalConfig()
+        global_config = GlobalConfig(self.resolve(ConfigLoader), self.workspace_path)
         global_config.init_config()
-        binder.bind(GlobalConfig, to=global_config, scope=singleton)
+        return global_config
+
+    def _provide_project_factory(self):
+        from factories.project_factory import ProjectFactory
+        from models.config_loader import ConfigLoader
+        from models.file_classifier import FileClassifier
+        from models.template_cache import TemplateCache
 
         # bind the ProjectFactoryBase class to the ProjectFactory class
-        project_factory = ProjectFactory()
-        binder.bind(ProjectFactoryBase, to=project_factory, scope=singleton)
+        return ProjectFactory(self.resolve(ConfigLoader), TemplateCache(self.options.cache_dir), FileClassifier(self.options.cache_dir))
+
+    def _provide_build_usecase(self):
+        from factories.project_factory import ProjectFactoryBase
+        from models.config import GlobalConfig
+        from usecases.build_usecase import BuildUsecase
+
+        return BuildUsecase(self.resolve(GlobalConfig), self.resolve(ProjectFactoryBase))
+
+    def _provide_watch_usecase(self):
+        from factories.project_factory import ProjectFactoryBase
+        from models.config import GlobalConfig
+        from usecases.build_usecase import BuildUsecase
+        from usecases.watch_usecase import WatchUsecase
+
+        return WatchUsecase(self.resolve(GlobalConfig), self.resolve(ProjectFactoryBase), self.resolve(BuildUsecase))
+
+    def _provide_merge_shards_usecase(self):
+        from usecases.build_usecase import BuildUsecase
+        from usecases.merge_shards_usecase import MergeShardsUsecase
+
+        return MergeShardsUsecase(self.resolve(BuildUsecase))
+
+    def _provide_affected_usecase(self):
+        from factories.project_factory import ProjectFactoryBase
+        from models.config import GlobalConfig
+        from usecases.affected_usecase import AffectedUsecase
+        from usecases.build_usecase import BuildUsecase
+
+        return AffectedUsecase(self.resolve(GlobalConfig), self.resolve(ProjectFactoryBase), self.resolve(BuildUsecase))
+
+    def _provide_render_usecase(self):
+        from factories.project_factory import ProjectFactoryBase
+        from models.config import GlobalConfig
+        from usecases.build_usecase import BuildUsecase
+        from usecases.render_usecase import RenderUsecase
+
+        return RenderUsecase(self.resolve(GlobalConfig), self.resolve(ProjectFactoryBase), self.resolve(BuildUsecase))
+
+    def _get_injector(self):
+        """Get the injector for the other classes (ex. decorated with @inject). The objects of the providers are bound to it"""
+        if self._injector is None:
+            # DI: https://github.com/python-injector/injector
+            import importlib
+            from injector import Injector
 
-    # When passing arguments to injector.get(), it resolves the dependencies and creates an instance
-    def resolve(self, cls):
-        return self.injector.get(cls)
+            def config(binder):
+                for class_path in self.PROVIDERS:
+                    module_name, _, class_name = class_path.rpartition('.')
+                    cls = getattr(importlib.import_module(module_name), class_name)
+                    binder.bind(cls, to=lambda cls=cls: self.resolve(cls))
+            self._injector = Injector(config)
+        return self._injector
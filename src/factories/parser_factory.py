@@ -1,16 +1,19 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
 import os
-from models.const import FolderName
+from collections import ChainMap
+from typing import TYPE_CHECKING, Mapping
 from models.parser.file_parser import FileParser
 from models.parser.param_parser import ParamParser
 from models.parser.parser_base import ParserBase
 
+if TYPE_CHECKING:
+    from models.config import Config
+
 
 class ParserFactoryBase(ABC):
     """Abstract Factory for creating Parser instances"""
 
-    from models.config import Config
-
     @abstractmethod
     def makes(self, config: Config) -> list[ParserBase]:
         pass
@@ -19,65 +22,76 @@ class ParserFactoryBase(ABC):
 class ParserFactory(ParserFactoryBase):
     """Factory for creating Parser instances(default)"""
 
-    from models.config import Config
-
-    def makes(self, config: Config) -> dict[str, ParserBase]:
-        result = {}
-
-        ########## Define as param-parser ##########
-        result.update(self._get_param_parsers(config))
-
+    def makes(self, config: Config) -> Mapping[str, ParserBase]:
+        """Get the parsers. The file parsers are prior to the param parsers.
+        The tables are layered (not copied), so the param parsers of the global config are shared by all configs.
+        """
         ########## Define as file-parser ##########
-        result.update(self._get_file_parsers(config))
+        file_parsers = self._get_file_parsers(config)
 
-        return result
+        ########## Define as param-parser ##########
+        return ChainMap(file_parsers, config.get_param_parsers())
 
-    def _get_param_parsers(self, config: Config) -> dict[str, ParamParser]:
+    def make_param_parsers(self, config: Config) -> Mapping[str, ParamParser]:
         """Get the list of params for replacements
         key: key name
         value: replace value
+        * The parsers of the config's own params are layered over the parsers of the global config
         """
         result = {}
 
-        for key, value in config.replacement_params.items():
+        for key, value in config.local_replacement_params.items():
             result[key] = ParamParser(config, key, value)
 
-        return result
+        if config.global_config is None:
+            return result
+        return ChainMap(result, config.global_config.get_param_parsers())
 
     def _get_file_parsers(self, config: Config) -> dict[str, FileParser]:
         """Get the list of files for replacements
         key: key name
         value: file path
         * If file name is such as "EXE_NAME.develop.yml", key is "EXE_NAME", and value is "path/to/EXE_NAME.develop.yml"
+        * The file of the environment is prior to the file without environment in the same folder, and project's files are prior to global files.
+        * The file is read only when a template contains the key.
         """
-        tmp_result = {}
-
-        # get all files in the replacement_files directory
-        files = config.replacement_files
-        for file in files:
-            # get only .txt files
-            file_name = os.path.basename(file)
-            if not file_name.endswith('.txt'):
-                continue
-            # Remove ".txt" name.
-            base_name = file_name.replace('.txt', '')
-            tmp_result[base_name] = f'{config.base_path}/{FolderName.REPLACEMENT_FILES.value}/{file}'
-
-        # Re-loop result array. And if contains ".", check env in arg[1].
-        # And if match arg[1], set as key: arg[0] value: arg[1]
         result = {}
-        for key, path in tmp_result.items():
-            if '.' not in key:
-                result[key] = FileParser(self, key, path)
-                continue
-
-            # Check environment. If not match, skip.
-            key_env = key.split('.')[1]
-            if key_env != config.environment:
-                continue
-            # Set key without env.
-            else:
+
+        # Loop by folder (global files first, then project files), to override the global files by the project files
+        for folder_path, file_names in self._group_by_folder(config.replacement_files).items():
+            base_result = {}
+            env_result = {}
+            for file_name in file_names:
+                # get only .txt files
+                if not file_name.endswith('.txt'):
+                    continue
+                # Remove ".txt" name.
+                key = file_name[:-len('.txt')]
+                path = f'{folder_path}/{file_name}'
+                if '.' not in key:
+                    base_result[key] = FileParser(config, key, path)
+                    continue
+
+                # Check environment. If not match, skip.
+                key_env = key.split('.')[1]
+                if key_env != config.environment:
+                    continue
+                # Set key without env.
                 _key = key.split('.')[0]
-                result[_key] = FileParser(config, _key, path)
+                env_result[_key] = FileParser(config, _key, path)
 
+            result.update(base_result)
+            result.update(env_result)
+
+        return result
+
+    def _group_by_folder(self, file_paths: list[str]) -> dict[str, list[str]]:
+        """Group the file paths by the folder, keeping the order
+        key: folder path
+        value: file names
+        """
+        result = {}
+        for file_path in file_paths:
+            folder_path, file_name = os.path.split(file_path)
+            result.setdefault(folder_path, []).append(file_name)
         return result
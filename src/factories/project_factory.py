@@ -1,23 +1,135 @@
 from abc import ABC, abstractmethod
-from models.config import Config
+from typing import Optional
+from models.config import Config, GlobalConfig
+from models.config_loader import ConfigLoader
 from models.const import FolderName
+from models.file_classifier import FileClassifier
+from models.file_index import FileIndex
+from models.ignore_matcher import IgnoreMatcher
 from models.project import Project
+from models.template_cache import TemplateCache
 
 
 class ProjectFactoryBase(ABC):
     """Abstract Factory for creating Project instances"""
     @abstractmethod
-    def make(self, name: str, environment: str, config: Config) -> Project:
+    def make(self, name: str, environment: str, config: GlobalConfig) -> Project:
+        pass
+
+    def get_file_index(self, name: str, config: GlobalConfig) -> FileIndex:
+        """Get the file index of the project's "src" folder (ex. to get the sizes of the files before building)"""
+        pj_root = Project.get_pj_root(name, config.is_multi_project_mode, config.root_path)
+        return FileIndex(f'{pj_root}/{FolderName.REPLACE_TARGET.value}', config.environments)
+
+    def prepare(self, units: list[tuple[str, str]], config: GlobalConfig):
+        """Load what the (environment, project name) units share, before sending the factory to the worker processes"""
+        pass
+
+    def save_cache(self):
+        """Save the cache for the next runs, after the build"""
+        pass
+
+    def pop_file_classes(self) -> dict[str, tuple[tuple, bool]]:
+        """Get the files classified since the last call, in the worker process"""
+        return {}
+
+    def merge_file_classes(self, file_classes: dict[str, tuple[tuple, bool]]):
+        """Add the files classified by the worker process, before save_cache()"""
+        pass
+
+    def invalidate(self, names: Optional[set[str]] = None, is_config_only: bool = False):
+        """Discard what is kept for the projects (all projects if names is None), after their files changed
+        If is_config_only, discard only the configs (ex. after the global config changed), and keep the scanned folders.
+        """
         pass
 
 
 class ProjectFactory(ProjectFactoryBase):
     """Factory for creating Project instances(default)"""
+    loader: ConfigLoader
+    template_cache: TemplateCache
+    file_classifier: FileClassifier
+    _configs: dict[tuple[str, str], Config]
+    _base_configs: dict[str, Config]
+    _file_indexes: dict[tuple[str, tuple[str, ...]], FileIndex]
+
+    def __init__(self, loader: ConfigLoader = None, template_cache: TemplateCache = None, file_classifier: FileClassifier = None):
+        self.loader = loader if loader is not None else ConfigLoader()
+        self.template_cache = template_cache if template_cache is not None else TemplateCache.get_shared()
+        self.file_classifier = file_classifier if file_classifier is not None else FileClassifier()
+        self._configs = {}
+        self._base_configs = {}
+        self._file_indexes = {}
 
-    def make(self, name: str, environment: str, config: Config) -> Project:
-        local_config = Config(f'{FolderName.TARGET_ROOT_FOLDER.value}/{name}', environment)
-        local_config.init_config(config)
+    def make(self, name: str, environment: str, config: GlobalConfig) -> Project:
+        # Keep the config of the unit, to reuse its parsers until the project is invalidated
+        local_config = self._configs.get((name, environment))
+        if local_config is None:
+            local_config = Config(self._get_config_root_path(name, config), environment, self.loader)
+            local_config.init_config(config, self._get_base_config(name, config))
+            self._configs[(name, environment)] = local_config
         # Create a project class
-        project = Project(name, environment, local_config)
+        project = Project(name, environment, local_config, workspace_path=config.root_path)
+        # Share the file index of the project between the environments, to scan the folder only once
+        project.template_cache = self.template_cache
+        project.file_classifier = self.file_classifier
+        project.file_index = self._get_file_index(name, project.root_path, config.environments, local_config.get_ignore_matcher())
 
         return project
+
+    def _get_base_config(self, name: str, config: GlobalConfig) -> Config:
+        """Get the config of the project without environment, merged with the global config once for all environments"""
+        base_config = self._base_configs.get(name)
+        if base_config is None:
+            base_config = Config(self._get_config_root_path(name, config), None, self.loader)
+            base_config.init_config(config)
+            self._base_configs[name] = base_config
+        return base_config
+
+    def _get_config_root_path(self, name: str, config: GlobalConfig) -> str:
+        return f'{config.base_path}{FolderName.TARGET_ROOT_FOLDER.value}/{name}'
+
+    def get_file_index(self, name: str, config: GlobalConfig) -> FileIndex:
+        # Share the index with the builds, using the ignore patterns of the project's config (without environment)
+        pj_root = Project.get_pj_root(name, config.is_multi_project_mode, config.root_path)
+        ignore_matcher = self._get_base_config(name, config).get_ignore_matcher()
+        return self._get_file_index(name, f'{pj_root}/{FolderName.REPLACE_TARGET.value}', config.environments, ignore_matcher)
+
+    def prepare(self, units: list[tuple[str, str]], config: GlobalConfig):
+        # Parse the configuration files and scan the folders once here, so that the workers do not repeat it
+        for environment, name in units:
+            project = self.make(name, environment, config)
+            project.file_index.get_files(environment)
+
+    def save_cache(self):
+        self.loader.save()
+        self.file_classifier.save()
+        self.template_cache.prune()
+
+    def pop_file_classes(self) -> dict[str, tuple[tuple, bool]]:
+        return self.file_classifier.pop_new_results()
+
+    def merge_file_classes(self, file_classes: dict[str, tuple[tuple, bool]]):
+        self.file_classifier.update(file_classes)
+
+    def invalidate(self, names: Optional[set[str]] = None, is_config_only: bool = False):
+        if names is None:
+            self._configs.clear()
+            self._base_configs.clear()
+            if not is_config_only:
+                self._file_indexes.clear()
+            return
+
+        self._configs = {key: config for key, config in self._configs.items() if key[0] not in names}
+        self._base_configs = {name: config for name, config in self._base_configs.items() if name not in names}
+        if not is_config_only:
+            self._file_indexes = {key: file_index for key, file_index in self._file_indexes.items() if key[0] not in names}
+
+    def _get_file_index(self, name: str, root_path: str, environments: list[str], ignore_matcher: IgnoreMatcher) -> FileIndex:
+        """Get the file index of the project's folder. Create it if not exists.
+        The folders skipped by the ignore patterns differ, if the environment's config has the other patterns.
+        """
+        key = (name, ignore_matcher.key)
+        if key not in self._file_indexes:
+            self._file_indexes[key] = FileIndex(root_path, environments, ignore_matcher)
+        return self._file_indexes[key]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import json
+import os
+from typing import Optional
+from models.const import FolderName
+
+
+class ManifestNotFoundError(Exception):
+    """The manifest of the previous build, which is needed (ex. to find the affected outputs), does not exist"""
+    pass
+
+
+class BuildManifest:
+    """Records which inputs each output in "dist" was built from.
+    On the next build, the outputs whose inputs did not change are skipped, and the outputs which are not built anymore are removed.
+
+    "outputs": the entry of each output path (source path, source size and mtime, build mode,
+      and for replaced files, the keys it contains and the hash of their values)
+    "units": the configuration files of each (environment, project) unit, keyed by its folder in "dist".
+      They are recorded once per unit, and the entries refer to them by "unit"
+    The entries also record the environment of the source variant and the replacement files used,
+    so the outputs which a changed file affects can be found (see DependencyGraph).
+
+    If is_reuse is false, all outputs are built again, and the previous entries are used only to keep the outputs not built (ex. filtered out).
+    """
+    FILE_NAME = '.build-manifest.json'
+
+    path: str
+    is_reuse: bool
+    _previous: dict[str, dict]
+    _previous_units: dict[str, dict]
+    _entries: dict[str, dict]
+    _units: dict[str, dict]
+
+    def __init__(self, path: str, previous: dict[str, dict] = None, is_reuse: bool = True, previous_units: dict[str, dict] = None):
+        self.path = path
+        self.is_reuse = is_reuse
+        self._previous = previous if previous is not None else {}
+        self._previous_units = previous_units if previous_units is not None else {}
+        self._entries = {}
+        self._units = {}
+
+    @classmethod
+    def get_default_path(cls) -> str:
+        return f'{FolderName.OUTPUT_ROOT.value}/{cls.FILE_NAME}'
+
+    @classmethod
+    def load(cls, path: str, is_reuse: bool = True) -> BuildManifest:
+        """Read the manifest of the previous build. If it does not exist or is broken, start from empty"""
+        data = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except ValueError:
+                data = {}
+
+        # The manifest saved before the units were added has only the entries
+        if 'outputs' not in data:
+            return cls(path, data, is_reuse)
+        return cls(path, data['outputs'], is_reuse, data.get('units', {}))
+
+    @property
+    def entries(self) -> dict[str, dict]:
+        """Entries recorded in this build"""
+        return self._entries
+
+    @property
+    def units(self) -> dict[str, dict]:
+        """Units recorded in this build"""
+        return self._units
+
+    @property
+    def previous_entries(self) -> dict[str, dict]:
+        return self._previous
+
+    @property
+    def previous_units(self) -> dict[str, dict]:
+        return self._previous_units
+
+    def fork(self) -> BuildManifest:
+        """Create a manifest that shares the previous entries, to record the entries of one unit"""
+        return BuildManifest(self.path, self._previous, self.is_reuse, self._previous_units)
+
+    def make_entry(self, source_path: str, mode: str, values_hash: str = '',
+                   size: Optional[int] = None, mtime_ns: Optional[int] = None, copy_mode: Optional[str] = None,
+                   is_dedupe_output: bool = False) -> dict:
+        """Create an entry from the status of the source file. If the status is not given, get the current status
+        For the output copied from the source, give the copy mode, so that changing settings.copy_mode builds it again.
+        The same for settings.is_dedupe_output, which decides if the output is a link to the stored object.
+        """
+        if size is None or mtime_ns is None:
+            stat = os.stat(source_path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        entry = {
+            'source': source_path,
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'values_hash': values_hash,
+            'mode': mode,
+        }
+        if copy_mode is not None:
+            entry['copy_mode'] = copy_mode
+        if is_dedupe_output:
+            entry['is_dedupe_output'] = True
+        return entry
+
+    def is_up_to_date(self, to_path: str, entry: dict) -> bool:
+        """Check if the output was built from the same inputs in the previous build"""
+        return self.is_reuse and self._previous.get(to_path) == entry and os.path.exists(to_path)
+
+    def get_previous_keys(self, to_path: str, entry: dict) -> Optional[frozenset[str]]:
+        """Get the keys which the source contained in the previous build. If the source changed, return None"""
+        previous = self._previous.get(to_path) if self.is_reuse else None
+        if previous is None or 'keys' not in previous:
+            return None
+        # Compare the source status and the mode, not the keys and the values
+        for name in ('source', 'size', 'mtime_ns', 'mode'):
+            if previous.get(name) != entry.get(name):
+                return None
+        return frozenset(previous['keys'])
+
+    def record(self, to_path: str, entry: dict):
+        self._entries[to_path] = entry
+
+    def record_unit(self, unit: str, config_paths: list[str]):
+        """Record the configuration files of the unit, which its entries refer to by "unit" """
+        self._units[unit] = {'configs': config_paths}
+
+    def update(self, entries: dict[str, dict], units: Optional[dict[str, dict]] = None):
+        self._entries.update(entries)
+        self._units.update(units or {})
+
+    def keep_previous(self, prefix: str):
+        """Keep the previous entries under the prefix (ex. a unit which failed to build)"""
+        for to_path, entry in self._previous.items():
+            if to_path.startswith(prefix) and to_path not in self._entries:
+                self._entries[to_path] = entry
+                self._keep_previous_unit(entry)
+
+    def keep_previous_path(self, to_path: str):
+        """Keep the previous entry of the output (ex. a file filtered out)"""
+        if to_path in self._previous and to_path not in self._entries:
+            self._entries[to_path] = self._previous[to_path]
+            self._keep_previous_unit(self._previous[to_path])
+
+    def _keep_previous_unit(self, entry: dict):
+        unit = entry.get('unit')
+        if unit in self._previous_units and unit not in self._units:
+            self._units[unit] = self._previous_units[unit]
+
+    def get_stale_paths(self, prefixes: Optional[list[str]] = None) -> list[str]:
+        """Get the outputs of the previous build, which are not built in this build. If prefixes are given, only under them"""
+        return sorted(to_path for to_path in self._previous if to_path not in self._entries
+                      and (prefixes is None or to_path.startswith(tuple(prefixes))))
+
+    def remove_stale_outputs(self, prefixes: Optional[list[str]] = None) -> list[str]:
+        """Remove the stale outputs, and the folders which become empty"""
+        stale_paths = self.get_stale_paths(prefixes)
+        for to_path in stale_paths:
+            if os.path.isfile(to_path) or os.path.islink(to_path):
+                os.remove(to_path)
+            self._remove_empty_dirs(os.path.dirname(to_path))
+
+        return stale_paths
+
+    def save(self):
+        # Save only the units which the entries refer to (ex. not the units removed from the workspace)
+        unit_names = {entry.get('unit') for entry in self._entries.values()}
+        units = {unit: value for unit, value in self._units.items() if unit in unit_names}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'outputs': self._entries, 'units': units}, f, indent=1, sort_keys=True)
+
+    def _remove_empty_dirs(self, dir_path: str):
+        """Remove the folder and its parents while they are empty, up to the output root"""
+        output_root = os.path.dirname(self.path)
+        while dir_path and dir_path != output_root and os.path.isdir(dir_path) and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+            dir_path = os.path.dirname(dir_path)
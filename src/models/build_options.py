@@ -0,0 +1,58 @@
+import os
+from typing import Optional
+from models.shard_spec import ShardSpec
+
+
+class BuildOptions:
+    """Options for a build, given from the command line"""
+    jobs: int
+    is_incremental: bool
+    cache_dir: Optional[str]
+    is_report_keys: bool
+    report_path: Optional[str]
+    profile_path: Optional[str]
+    is_watch: bool
+    watch_interval: float
+    environments: Optional[list[str]]
+    project_names: Optional[list[str]]
+    path_patterns: Optional[list[str]]
+    shard: Optional[ShardSpec]
+    is_merge_shards: bool
+    archive_format: Optional[str]
+    affected_paths: Optional[list[str]]
+    is_rebuild_affected: bool
+
+    def __init__(self, jobs: int = 1, is_incremental: bool = False, cache_dir: Optional[str] = None, is_report_keys: bool = False,
+                 report_path: Optional[str] = None, profile_path: Optional[str] = None, is_watch: bool = False, watch_interval: float = 1.0,
+                 environments: Optional[list[str]] = None, project_names: Optional[list[str]] = None, path_patterns: Optional[list[str]] = None,
+                 shard: Optional[ShardSpec] = None, is_merge_shards: bool = False, archive_format: Optional[str] = None,
+                 affected_paths: Optional[list[str]] = None, is_rebuild_affected: bool = False):
+        self.jobs = jobs
+        self.is_incremental = is_incremental
+        self.cache_dir = cache_dir
+        self.is_report_keys = is_report_keys
+        self.report_path = report_path
+        self.profile_path = profile_path
+        self.is_watch = is_watch
+        self.watch_interval = watch_interval
+        self.environments = environments
+        self.project_names = project_names
+        self.path_patterns = path_patterns
+        self.shard = shard
+        self.is_merge_shards = is_merge_shards
+        self.archive_format = archive_format
+        self.affected_paths = affected_paths
+        self.is_rebuild_affected = is_rebuild_affected
+
+    @property
+    def is_filtered(self) -> bool:
+        """Whether to build only a part of the (environment, project, file)s"""
+        return (self.environments is not None or self.project_names is not None or self.path_patterns is not None
+                or self.shard is not None)
+
+    @property
+    def worker_count(self) -> int:
+        """Number of worker processes. If jobs is 0 or less, use all CPUs"""
+        if self.jobs <= 0:
+            return os.cpu_count() or 1
+        return self.jobs
@@ -0,0 +1,33 @@
+from typing import Optional
+from models.build_stats import BuildStats
+from models.key_usage import KeyUsage
+
+
+class BuildResult:
+    """Result of building one (environment, project) unit"""
+    environment: str
+    project_name: str
+    error: Optional[str]
+    manifest_entries: Optional[dict[str, dict]]
+    manifest_units: Optional[dict[str, dict]]
+    key_usage: Optional[KeyUsage]
+    stats: Optional[BuildStats]
+    # The files classified by the worker process (see FileClassifier.pop_new_results)
+    file_classes: Optional[dict[str, tuple[tuple, bool]]]
+
+    def __init__(self, environment: str, project_name: str, error: Optional[str] = None,
+                 manifest_entries: Optional[dict[str, dict]] = None, key_usage: Optional[KeyUsage] = None,
+                 stats: Optional[BuildStats] = None, file_classes: Optional[dict[str, tuple[tuple, bool]]] = None,
+                 manifest_units: Optional[dict[str, dict]] = None):
+        self.environment = environment
+        self.project_name = project_name
+        self.error = error
+        self.manifest_entries = manifest_entries
+        self.key_usage = key_usage
+        self.stats = stats
+        self.file_classes = file_classes
+        self.manifest_units = manifest_units
+
+    @property
+    def is_success(self) -> bool:
+        return self.error is None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+
+
+class BuildStats:
+    """Timings and counters of building a unit, for the build report
+
+    * seconds: wall time of each phase
+      (with settings.io_concurrency, the files overlap, so the total of the files can be longer than the build)
+    * counts: number of files and bytes
+    * replacements: number of replaced tokens per key
+    """
+    PHASES = ('config_load', 'parser_construction', 'tree_walk', 'substitution', 'copy', 'write')
+    COUNTS = ('replaced_files', 'copied_files', 'skipped_files', 'deduped_files', 'bytes_read', 'bytes_written')
+
+    seconds: dict[str, float]
+    counts: dict[str, int]
+    replacements: dict[str, int]
+
+    def __init__(self):
+        self.seconds = {phase: 0.0 for phase in self.PHASES}
+        self.counts = {name: 0 for name in self.COUNTS}
+        self.replacements = {}
+
+    @contextmanager
+    def measure(self, phase: str):
+        """Add the wall time of the block to the phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1):
+        self.counts[name] += value
+
+    def add_replacements(self, replacements: dict[str, int]):
+        for key, count in replacements.items():
+            self.replacements[key] = self.replacements.get(key, 0) + count
+
+    def merge(self, other: BuildStats):
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+        for name, value in other.counts.items():
+            self.counts[name] += value
+        self.add_replacements(other.replacements)
+
+    def to_dict(self) -> dict:
+        return {
+            'seconds': dict(self.seconds),
+            'counts': dict(self.counts),
+            'replacements': dict(sorted(self.replacements.items(), key=lambda item: (-item[1], item[0]))),
+        }
@@ -0,0 +1,33 @@
+from __future__ import annotations
+from models.template_renderer import TemplateRenderer
+
+
+class CompiledTemplate:
+    """A template split into the literal parts and the "{{KEY}}" slots.
+    segments[0] + value of keys[0] + segments[1] + ... + value of keys[-1] + segments[-1] is the rendered content.
+    """
+    segments: tuple[str, ...]
+    keys: tuple[str, ...]
+    key_set: frozenset[str]
+
+    def __init__(self, segments: tuple[str, ...], keys: tuple[str, ...]):
+        self.segments = segments
+        self.keys = keys
+        self.key_set = frozenset(keys)
+
+    @classmethod
+    def compile(cls, content: str) -> CompiledTemplate:
+        # The split result is [literal, key, literal, key, ..., literal]
+        parts = TemplateRenderer.TOKEN_PATTERN.split(content)
+        return cls(tuple(parts[0::2]), tuple(parts[1::2]))
+
+    @property
+    def size(self) -> int:
+        """Number of characters, to limit the size of the cache"""
+        return sum(len(segment) for segment in self.segments) + sum(len(key) for key in self.keys)
+
+    def __getstate__(self):
+        return (self.segments, self.keys)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
@@ -1,13 +1,31 @@
 from __future__ import annotations
+import hashlib
+import json
 import os
-from typing import Optional
-from injector import inject
-from models.const import FolderName
-import yaml
+from collections import ChainMap
+from typing import Mapping, Optional
+from models.config_loader import ConfigLoader
+from models.const import CopyMode, FolderName
+from models.ignore_matcher import IgnoreMatcher
 
 
 class Config:
-    """Class that holds the contents of the configuration file"""
+    """Class that holds the contents of the configuration file
+
+    The replacements and the parsers of the global config are shared by the project configs, and overlaid by their own.
+    """
+    __slots__ = ('_root_path', '_environment', '_replacement_params', '_is_ignore', '_is_auto_merge_config', '_is_only_replace_temp',
+                 '_is_multi_project_mode', '_is_nested_replace', '_copy_mode', '_is_skip_unchanged_write', '_is_fsync_write',
+                 '_stream_threshold_size', '_is_dedupe_output', '_io_concurrency', '_replacement_files', '_ignore_files',
+                 '_binary_extensions', '_text_extensions', '_config_paths', '_global_config', '_param_parsers', '_parsers', '_renderer',
+                 '_ignore_matcher', '_values_hashes', '_loader')
+
+    # Parameters set from the configuration files (and the global config), which the environments copy from the base config
+    _MERGED_SLOTS = ('_replacement_params', '_is_ignore', '_is_auto_merge_config', '_is_only_replace_temp', '_is_multi_project_mode',
+                     '_is_nested_replace', '_copy_mode', '_is_skip_unchanged_write', '_is_fsync_write', '_stream_threshold_size',
+                     '_is_dedupe_output', '_io_concurrency', '_replacement_files', '_ignore_files', '_binary_extensions',
+                     '_text_extensions', '_global_config')
+
     _root_path: str | None
     _environment: str | None
     _replacement_params: Optional[dict[str, str]]
@@ -15,28 +33,72 @@ class Config:
     _is_auto_merge_config: Optional[bool]
     _is_only_replace_temp: Optional[bool]
     _is_multi_project_mode: Optional[bool]
+    _is_nested_replace: Optional[bool]
+    _copy_mode: Optional[str]
+    _is_skip_unchanged_write: Optional[bool]
+    _is_fsync_write: Optional[bool]
+    _stream_threshold_size: Optional[int]
+    _is_dedupe_output: Optional[bool]
+    _io_concurrency: Optional[int]
     _replacement_files: Optional[list[str]]
     _ignore_files: Optional[list[str]]
-    _parsers: Optional[dict]
-
-    @inject
-    def __init__(self,  root_path: str | None, environment: str | None):
+    _binary_extensions: Optional[list[str]]
+    _text_extensions: Optional[list[str]]
+    _config_paths: list[str]
+    _global_config: Optional[Config]
+    _param_parsers: Optional[Mapping]
+    _parsers: Optional[Mapping]
+    _renderer: Optional[TemplateRenderer]
+    _ignore_matcher: Optional[IgnoreMatcher]
+    _values_hashes: dict[Optional[frozenset], str]
+    _loader: ConfigLoader
+
+    def __init__(self,  root_path: str | None, environment: str | None, loader: ConfigLoader | None = None):
         self._root_path = root_path
         self._environment = environment
+        # Share the loader between the configs to parse each file only once
+        self._loader = loader if loader is not None else ConfigLoader()
         self._replacement_params = {}
         self._is_ignore = None
         self._is_auto_merge_config = None
         self._is_only_replace_temp = None
         self._is_multi_project_mode = None
+        self._is_nested_replace = None
+        self._copy_mode = None
+        self._is_skip_unchanged_write = None
+        self._is_fsync_write = None
+        self._stream_threshold_size = None
+        self._is_dedupe_output = None
+        self._io_concurrency = None
         self._replacement_files = None
         self._ignore_files = None
+        self._binary_extensions = None
+        self._text_extensions = None
+        self._config_paths = []
+        self._global_config = None
+        self._param_parsers = None
         self._parsers = None
+        self._renderer = None
+        self._ignore_matcher = None
+        self._values_hashes = {}
+
+    @property
+    def replacement_params(self) -> Mapping[str, str]:
+        """Mapping for parameter replacements (the values of this config overlaid on the global values, not copied)"""
+        if self._global_config is None:
+            return self.local_replacement_params
+        return ChainMap(self.local_replacement_params, self._global_config.replacement_params)
 
     @property
-    def replacement_params(self) -> dict[str, str]:
-        """Dictionary for parameter replacements"""
+    def local_replacement_params(self) -> dict[str, str]:
+        """Dictionary for parameter replacements, only in the configuration files of this config"""
         return self._replacement_params if self._replacement_params is not None else {}
 
+    @property
+    def global_config(self) -> Optional[Config]:
+        """Global config merged into this config. If this is global config (or not merged), this value is None"""
+        return self._global_config
+
     @property
     def is_ignore(self) -> bool:
         """Whether to ignore globally or not"""
@@ -57,9 +119,46 @@ class Config:
         """Whether to use multi-project mode or not"""
         return self._is_multi_project_mode if self._is_multi_project_mode is not None else False
 
+    @property
+    def is_nested_replace(self) -> bool:
+        """Whether to replace "{{KEY}}" inside replacement values recursively or not"""
+        return self._is_nested_replace if self._is_nested_replace is not None else False
+
+    @property
+    def copy_mode(self) -> str:
+        """How to output the files which are not replaced (copy, hardlink, symlink or reflink)"""
+        return self._copy_mode if self._copy_mode is not None else CopyMode.COPY.value
+
+    @property
+    def is_skip_unchanged_write(self) -> bool:
+        """Whether to skip writing the replaced file if the output has the same content or not"""
+        return self._is_skip_unchanged_write if self._is_skip_unchanged_write is not None else True
+
+    @property
+    def is_fsync_write(self) -> bool:
+        """Whether to flush the written files to the disk or not"""
+        return self._is_fsync_write if self._is_fsync_write is not None else False
+
+    @property
+    def stream_threshold_size(self) -> int:
+        """File size (bytes) to replace the file by chunks, not reading the whole file into memory"""
+        return self._stream_threshold_size if self._stream_threshold_size is not None else 32 * 1024 * 1024
+
+    @property
+    def is_dedupe_output(self) -> bool:
+        """Whether to store the same output content only once, and to output hard links to it.
+        The files above stream_threshold_size are also stored once, but they are replaced again for each environment
+        """
+        return self._is_dedupe_output if self._is_dedupe_output is not None else False
+
+    @property
+    def io_concurrency(self) -> int:
+        """Number of the files whose reads, writes and copies overlap in a project (1: one by one)"""
+        return self._io_concurrency if self._io_concurrency is not None else 1
+
     @property
     def replacement_files(self) -> list[str]:
-        """List of files to perform replacements on"""
+        """List of the file paths for replacements (global files first, then project files)"""
         return self._replacement_files if self._replacement_files is not None else []
 
     @property
@@ -68,9 +167,21 @@ class Config:
         return self._ignore_files if self._ignore_files is not None else []
 
     @property
-    def ignore_files(self) -> list[str]:
-        """List of files to ignore for replacements"""
-        return self._ignore_files if self._ignore_files is not None else []
+    def binary_extensions(self) -> list[str]:
+        """List of the file extensions (ex. ".png") to copy as is, without sniffing the content"""
+        return self._binary_extensions if self._binary_extensions is not None else []
+
+    @property
+    def text_extensions(self) -> list[str]:
+        """List of the file extensions (ex. ".conf") to replace, without sniffing the content"""
+        return self._text_extensions if self._text_extensions is not None else []
+
+    @property
+    def config_paths(self) -> list[str]:
+        """List of the configuration file paths which this config reads, even if they do not exist (global files first)"""
+        if self._global_config is None:
+            return self._config_paths
+        return self._global_config.config_paths + self._config_paths
 
     @property
     def environment(self):
@@ -89,27 +200,57 @@ class Config:
         """List of files to ignore for replacements"""
         return (self.root_path if self.root_path is not None else '') + ('/' if self.root_path is not None else '')
 
-    def init_config(self, global_config: Config = None) -> dict:
-        """Reads the configuration file and sets the parameters"""
+    def init_config(self, global_config: Config = None, base_config: Config = None) -> dict:
+        """Reads the configuration file and sets the parameters
+        If the base config is given (the config of the same folder without environment, merged with the same global config),
+        only the environment-specific configuration file is applied over it.
+        """
+        # Clear the objects made from the previous parameters (when reloading the config)
+        self._global_config = None
+        self._param_parsers = None
+        self._parsers = None
+        self._renderer = None
+        self._ignore_matcher = None
+        self._values_hashes = {}
+
+        if base_config is not None:
+            path = f'{self.base_path}config.{self.environment}.yml'
+            config_dict = self._get_config_dict_from_path(path)
+            self._set_config_from_base(base_config, config_dict, global_config)
+            self._config_paths = base_config._config_paths + [path]
+            return config_dict
+
         config_dict = {}
 
         # Read the common configuration file if it exists
         path = f'{self.base_path}config.yml'
         _config_dict = self._get_config_dict_from_path(path)
         config_dict = self._merge_config_dict(_config_dict, config_dict)
+        self._config_paths = [path]
 
         # Read the environment-specific configuration file if it exists
         if self.environment is not None:
             path = f'{self.base_path}config.{self.environment}.yml'
             _config_dict = self._get_config_dict_from_path(path)
             config_dict = self._merge_config_dict(_config_dict, config_dict)
+            self._config_paths.append(path)
 
         # Set the parameters
         self._set_config_from_dict(config_dict,  global_config)
 
         return config_dict
 
-    def get_parsers(self) -> dict:
+    def get_param_parsers(self) -> Mapping:
+        """Get the parsers of replacement_params, made once. The project configs share the parsers of the global config"""
+        # Return as it is if already obtained
+        if self._param_parsers is not None:
+            return self._param_parsers
+
+        from factories.parser_factory import ParserFactory
+        self._param_parsers = ParserFactory().make_param_parsers(self)
+        return self._param_parsers
+
+    def get_parsers(self) -> Mapping:
         """Get parsers (config, file, custom)"""
         # Return as it is if already obtained
         if self._parsers is not None:
@@ -121,17 +262,78 @@ class Config:
         self._parsers = parser_factory.makes(self)
         return self._parsers
 
+    def get_renderer(self) -> TemplateRenderer:
+        """Get the renderer that replaces all parsers' keys in a single scan"""
+        # Return as it is if already obtained
+        if self._renderer is not None:
+            return self._renderer
+
+        from models.template_renderer import TemplateRenderer
+        self._renderer = TemplateRenderer(self.get_parsers(), self.is_nested_replace)
+        return self._renderer
+
+    def get_ignore_matcher(self) -> IgnoreMatcher:
+        """Get the matcher of ignore_files, compiled once"""
+        # Return as it is if already obtained
+        if self._ignore_matcher is not None:
+            return self._ignore_matcher
+
+        self._ignore_matcher = IgnoreMatcher(self.ignore_files)
+        return self._ignore_matcher
+
+    def get_values_hash(self, keys: Optional[frozenset[str]] = None) -> str:
+        """Get the hash of the resolved replacement values. It changes when any value used for the replacement changes
+        If keys are given, only the values of the keys are used (ex. the keys which a template contains).
+        *In nested mode, all values are used, because a value can contain the other keys.
+        """
+        if self.is_nested_replace:
+            keys = None
+
+        # Return as it is if already obtained
+        if keys in self._values_hashes:
+            return self._values_hashes[keys]
+
+        parsers = self.get_parsers()
+        values_hash = hashlib.sha256()
+        values_hash.update(json.dumps({'is_nested_replace': self.is_nested_replace}).encode())
+        for key in sorted(parsers.keys() if keys is None else keys):
+            # The key which is not defined is also hashed, so that defining it later changes the hash
+            parser = parsers.get(key)
+            values_hash.update(json.dumps([key, parser.get_fingerprint() if parser is not None else None]).encode())
+
+        self._values_hashes[keys] = values_hash.hexdigest()
+        return self._values_hashes[keys]
+
     def _set_config_from_dict(self, config_dict: dict,  global_config: Config = None):
         """Set the parameters from the dictionary"""
 
         # Set the parameters
         self._replacement_params = self._get_config_value(config_dict, ['replacements'])
+        self._set_settings_from_dict(config_dict, global_config)
+        self._replacement_files = self._get_replacement_files()
+
+        # Merge global config and config
+        if global_config is not None:
+            # Append Items (the replacements are overlaid by replacement_params, not to copy the global values)
+            self._global_config = global_config
+            self._replacement_files = global_config.replacement_files + self.replacement_files
+
+    def _set_settings_from_dict(self, config_dict: dict, global_config: Config = None):
+        """Set the settings from the dictionary, and merge the global config"""
         self._is_ignore = self._get_config_value(config_dict, ['settings', 'is_ignore'])
         self._is_auto_merge_config = self._get_config_value(config_dict, ['settings', 'is_auto_merge_config'])
         self._is_only_replace_temp = self._get_config_value(config_dict, ['settings', 'is_only_replace_temp'])
         self._is_multi_project_mode = self._get_config_value(config_dict, ['settings', 'is_multi_project_mode'])
+        self._is_nested_replace = self._get_config_value(config_dict, ['settings', 'is_nested_replace'])
+        self._copy_mode = self._get_config_value(config_dict, ['settings', 'copy_mode'])
+        self._is_skip_unchanged_write = self._get_config_value(config_dict, ['settings', 'is_skip_unchanged_write'])
+        self._is_fsync_write = self._get_config_value(config_dict, ['settings', 'is_fsync_write'])
+        self._stream_threshold_size = self._get_config_value(config_dict, ['settings', 'stream_threshold_size'])
+        self._is_dedupe_output = self._get_config_value(config_dict, ['settings', 'is_dedupe_output'])
+        self._io_concurrency = self._get_config_value(config_dict, ['settings', 'io_concurrency'])
         self._ignore_files = self._get_config_value(config_dict, ['settings', 'ignore_files'])
-        self._replacement_files = self._get_replacement_files()
+        self._binary_extensions = self._get_config_value(config_dict, ['settings', 'binary_extensions'])
+        self._text_extensions = self._get_config_value(config_dict, ['settings', 'text_extensions'])
 
         # Merge global config and config
         if global_config is not None:
@@ -139,11 +341,33 @@ class Config:
             self._is_auto_merge_config = global_config.is_auto_merge_config if self._is_auto_merge_config is None else self.is_auto_merge_config
             self._is_only_replace_temp = global_config.is_only_replace_temp if self._is_only_replace_temp is None else self.is_only_replace_temp
             self._is_multi_project_mode = global_config.is_multi_project_mode if self._is_multi_project_mode is None else self.is_multi_project_mode
+            self._is_nested_replace = global_config.is_nested_replace if self._is_nested_replace is None else self.is_nested_replace
+            self._copy_mode = global_config.copy_mode if self._copy_mode is None else self.copy_mode
+            self._is_skip_unchanged_write = global_config.is_skip_unchanged_write if self._is_skip_unchanged_write is None else self.is_skip_unchanged_write
+            self._is_fsync_write = global_config.is_fsync_write if self._is_fsync_write is None else self.is_fsync_write
+            self._stream_threshold_size = global_config.stream_threshold_size if self._stream_threshold_size is None else self.stream_threshold_size
+            self._is_dedupe_output = global_config.is_dedupe_output if self._is_dedupe_output is None else self.is_dedupe_output
+            self._io_concurrency = global_config.io_concurrency if self._io_concurrency is None else self.io_concurrency
 
             # Append Items
-            self._replacement_params = {**global_config.replacement_params, **self.replacement_params}
-            self._replacement_files = global_config.replacement_files + self.replacement_files
             self._ignore_files = global_config.ignore_files + self.ignore_files
+            self._binary_extensions = global_config.binary_extensions + self.binary_extensions
+            self._text_extensions = global_config.text_extensions + self.text_extensions
+
+    def _set_config_from_base(self, base_config: Config, config_dict: dict, global_config: Config = None):
+        """Set the parameters of the base config, and overlay the environment-specific configuration file.
+        The top-level keys of the file replace the ones of the base, the same as merging the files.
+        """
+        for name in self._MERGED_SLOTS:
+            setattr(self, name, getattr(base_config, name))
+
+        if 'replacements' in config_dict:
+            self._replacement_params = self._get_config_value(config_dict, ['replacements'])
+        else:
+            # The same values, so share the parsers of the base config
+            self._param_parsers = base_config.get_param_parsers()
+        if 'settings' in config_dict:
+            self._set_settings_from_dict(config_dict, global_config)
 
     def _merge_config_dict(self, config_dict: dict, base_config_dict: dict) -> dict:
         """Merge values from the configuration file"""
@@ -152,6 +376,10 @@ class Config:
         return merged_config
 
     def _get_config_dict_from_path(self, path: str) -> dict:
+        return self._loader.load(path, self._read_config_dict_from_path)
+
+    def _read_config_dict_from_path(self, path: str) -> dict:
+        """Read and parse the configuration file (without the cache)"""
         yaml_string = self._read_string_from_path(path)
         return self._get_config_dict_from_yaml(yaml_string)
 
@@ -179,6 +407,8 @@ class Config:
         """get yaml values from a YAML string"""
         if yaml_string is None:
             return {}
+        # Import only when parsing, because the cached configuration files do not need it
+        import yaml
         r = yaml.safe_load(yaml_string)
         # Merge if the value exists
         if r is None:
@@ -187,20 +417,21 @@ class Config:
 
     def _get_replacement_files(self) -> list[str]:
         """Get the list of files for replacements"""
-        replacement_files_path = f'{self.base_path}/{FolderName.REPLACEMENT_FILES.value}'
-        if not os.path.exists(replacement_files_path):
-            return []
+        replacement_files_path = f'{self.base_path}{FolderName.REPLACEMENT_FILES.value}'
 
         # get all files in the replacement_files directory
-        return os.listdir(replacement_files_path)
+        return [f'{replacement_files_path}/{name}' for name in self._loader.list_dir(replacement_files_path)]
 
 
 class GlobalConfig(Config):
     """Class that holds the contents of the configuration file (for all environments)"""
     _environments: list[str]
 
-    def __init__(self):
-        super().__init__(None, None)
+    __slots__ = ('_environments',)
+
+    def __init__(self, loader: ConfigLoader | None = None, workspace_path: str | None = None):
+        # workspace_path: folder which has config.yml and "templates". If None, the current directory
+        super().__init__(workspace_path, None, loader)
         self._environments = []
 
     @property
@@ -0,0 +1,88 @@
+import os
+import pickle
+from typing import Callable, Optional
+
+
+class ConfigLoader:
+    """Cache of the configuration files, shared by all Configs of a build.
+
+    Each configuration file is parsed at most once per build, and each "replacement_files" folder is listed at most once.
+    The values are keyed by the file status (mtime and size), so a changed file is read again.
+    If cache_dir is given, the parsed files are also saved there, to skip parsing YAML in the next runs.
+    * The returned values are shared. Do not modify them.
+    """
+    CACHE_FILE_NAME = 'config-cache.pickle'
+
+    cache_dir: Optional[str]
+    _dicts: dict[str, tuple[tuple, dict]]
+    _dir_names: dict[str, tuple[tuple, list[str]]]
+    _is_changed: bool
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._dicts = self._load_cache()
+        self._dir_names = {}
+        self._is_changed = False
+
+    def load(self, path: str, read: Callable[[str], dict]) -> dict:
+        """Get the parsed configuration file. If not cached, parse it using read()"""
+        status = self._get_status(path)
+        # The file which does not exist is not cached
+        if status is None:
+            return read(path)
+
+        cached = self._dicts.get(path)
+        if cached is not None and cached[0] == status:
+            return cached[1]
+
+        config_dict = read(path)
+        self._dicts[path] = (status, config_dict)
+        self._is_changed = True
+        return config_dict
+
+    def list_dir(self, path: str) -> list[str]:
+        """Get the file names in the folder. If the folder does not exist, return empty list"""
+        status = self._get_status(path)
+        if status is None:
+            return []
+
+        cached = self._dir_names.get(path)
+        if cached is not None and cached[0] == status:
+            return cached[1]
+
+        names = sorted(os.listdir(path))
+        self._dir_names[path] = (status, names)
+        return names
+
+    def save(self):
+        """Save the parsed files to the cache folder if changed"""
+        if self.cache_dir is None or not self._is_changed:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self._get_cache_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._dicts, f)
+        os.replace(tmp_path, self._get_cache_path())
+        self._is_changed = False
+
+    def _load_cache(self) -> dict[str, tuple[tuple, dict]]:
+        """Read the parsed files saved by the previous run. If it does not exist or is broken, start from empty"""
+        if self.cache_dir is None or not os.path.isfile(self._get_cache_path()):
+            return {}
+        try:
+            with open(self._get_cache_path(), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return {}
+
+    def _get_cache_path(self) -> str:
+        return f'{self.cache_dir}/{self.CACHE_FILE_NAME}'
+
+    def _get_status(self, path: str) -> Optional[tuple]:
+        """Get the status to detect the change of the file. If it does not exist, return None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
@@ -7,3 +7,20 @@ class FolderName(Enum):
     REPLACEMENT_FILES = "replacement_files"
     REPLACE_TARGET = "src"
     OUTPUT_ROOT = "dist"
+
+
+class ArchiveFormat(Enum):
+    """Format of the archive per environment (--archive)"""
+    TAR = "tar"
+    TAR_GZ = "tar.gz"
+    TAR_BZ2 = "tar.bz2"
+    TAR_XZ = "tar.xz"
+    ZIP = "zip"
+
+
+class CopyMode(Enum):
+    """How to output the files which are not replaced (settings.copy_mode)"""
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    SYMLINK = "symlink"
+    REFLINK = "reflink"
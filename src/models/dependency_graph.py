@@ -0,0 +1,77 @@
+import os
+from typing import Optional
+from models.const import FolderName
+from models.file_index import FileIndex
+from models.project import Project
+
+
+class DependencyGraph:
+    """Which inputs each output in "dist" depends on, read from the entries of the build manifest.
+
+    An output depends on:
+    * its source in the "src" folder (the variant of the environment if it exists, otherwise the base file)
+    * the configuration files of its unit (ex. "config.yml", "templates/<project>/config.<environment>.yml"), even if they do not exist.
+      They are recorded once per unit, and the entry refers to its unit
+    * the replacement files of the keys it contains. A file added to the "replacement_files" folder next to the configuration files
+      affects the outputs which contain its key
+    A source file added in the "src" folder is not in the graph, because its output was never built.
+    """
+    environments: list[str]
+    _entries: dict[str, dict]
+    _units: dict[str, dict]
+
+    def __init__(self, entries: dict[str, dict], environments: list[str], units: Optional[dict[str, dict]] = None):
+        self.environments = environments
+        self._entries = entries
+        self._units = units if units is not None else {}
+
+    def get_affected_outputs(self, path: str) -> list[str]:
+        """Get the outputs which the change of the file (modified, added or removed) affects"""
+        return sorted(to_path for to_path, entry in self._entries.items() if self._is_affected(path, self._get_environment(to_path), entry))
+
+    def is_source(self, path: str) -> bool:
+        """Whether the file is the source of any output"""
+        return any(entry.get('source') == path for entry in self._entries.values())
+
+    def _is_affected(self, path: str, environment: Optional[str], entry: dict) -> bool:
+        if path == entry.get('source') or path in self._get_config_paths(entry) or path in entry.get('key_files', {}).values():
+            return True
+        return self._is_affected_replacement_file(path, environment, entry) or self._is_affected_variant(path, environment, entry)
+
+    def _is_affected_replacement_file(self, path: str, environment: Optional[str], entry: dict) -> bool:
+        """Whether the replacement file can define the value of a key which the output contains (ex. "NAME.develop.txt" added)"""
+        folder_path, file_name = os.path.split(path)
+        if not file_name.endswith('.txt') or folder_path not in self._get_replacement_folders(entry):
+            return False
+
+        # The same as ParserFactory: "KEY.txt" for all environments, "KEY.<environment>.txt" for the environment
+        key_names = file_name[:-len('.txt')].split('.')
+        if len(key_names) > 1 and key_names[1] != environment:
+            return False
+        return key_names[0] in entry.get('keys', []) or key_names[0] in entry.get('key_files', {})
+
+    def _is_affected_variant(self, path: str, environment: Optional[str], entry: dict) -> bool:
+        """Whether the file is the variant of the environment which replaces the source (ex. "nginx.production.conf" added)"""
+        path_environment, logical_path = FileIndex.get_environment_and_logical_path(path, self.environments)
+        if path_environment is None or path_environment != environment or 'source' not in entry:
+            return False
+
+        logical_source = entry['source']
+        if entry.get('variant') is not None:
+            logical_source = FileIndex.get_environment_and_logical_path(logical_source, self.environments)[1]
+        return logical_source == logical_path
+
+    def _get_replacement_folders(self, entry: dict) -> list[str]:
+        """Get the "replacement_files" folders next to the configuration files of the output"""
+        return [os.path.join(os.path.dirname(config_path), FolderName.REPLACEMENT_FILES.value) for config_path in self._get_config_paths(entry)]
+
+    def _get_config_paths(self, entry: dict) -> list[str]:
+        """Get the configuration files of the unit of the output"""
+        return self._units.get(entry.get('unit'), {}).get('configs', [])
+
+    def _get_environment(self, to_path: str) -> Optional[str]:
+        """Get the environment of the output from its path (ex. "dist/docker-develop/...")"""
+        for environment in self.environments:
+            if to_path.startswith(Project.get_environment_dist_root(environment) + '/'):
+                return environment
+        return None
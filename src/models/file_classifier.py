@@ -0,0 +1,91 @@
+import os
+import pickle
+from typing import Optional
+from models.file_index import FileEntry
+
+
+class FileClassifier:
+    """Classifies the files into text (to replace) and binary (to copy as is), by sniffing the head of the file.
+
+    * NUL bytes, or the magic number of the well-known binary formats (images, archives, executables, ...): binary
+    * otherwise text, even if not decodable as UTF-8 (ex. a Latin-1 ".conf"). Its undecodable bytes are kept as is
+    The results are keyed by the file status (mtime and size), so a changed file is sniffed again.
+    If cache_dir is given, the results are also saved there, to skip sniffing in the next runs.
+    The worker processes send their new results back (pop_new_results), and the main process saves them (update).
+    """
+    # Renamed when the classification changes, not to use the results of the older versions
+    CACHE_FILE_NAME = 'file-class-cache-v2.pickle'
+    # Bytes to read from the head of the file
+    SNIFF_SIZE = 8 * 1024
+    # Magic numbers of the formats whose head may have no NUL bytes (images, documents, archives, executables)
+    MAGIC_NUMBERS = (
+        b'\x89PNG', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'%PDF-', b'PK\x03\x04', b'PK\x05\x06', b'\x1f\x8b',
+        b'\xfd7zXZ', b'7z\xbc\xaf\x27\x1c', b'Rar!\x1a\x07', b'\x28\xb5\x2f\xfd', b'\x7fELF', b'\xca\xfe\xba\xbe',
+        b'\xcf\xfa\xed\xfe', b'\xce\xfa\xed\xfe', b'wOFF', b'wOF2', b'SQLite format 3',
+    )
+
+    cache_dir: Optional[str]
+    _results: dict[str, tuple[tuple, bool]]
+    _new_results: dict[str, tuple[tuple, bool]]
+    _is_changed: bool
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._results = self._load_cache()
+        self._new_results = {}
+        self._is_changed = False
+
+    def is_binary(self, file_entry: FileEntry) -> bool:
+        """Whether the file is binary. Sniff it only if not classified at the same status"""
+        status = (file_entry.mtime_ns, file_entry.size)
+        cached = self._results.get(file_entry.path)
+        if cached is not None and cached[0] == status:
+            return cached[1]
+
+        with open(file_entry.path, 'rb') as f:
+            head = f.read(self.SNIFF_SIZE)
+        is_binary = self.is_binary_content(head)
+        self._results[file_entry.path] = self._new_results[file_entry.path] = (status, is_binary)
+        self._is_changed = True
+        return is_binary
+
+    def pop_new_results(self) -> dict[str, tuple[tuple, bool]]:
+        """Get the results classified since the last call (ex. to send them back from the worker process)"""
+        new_results, self._new_results = self._new_results, {}
+        return new_results
+
+    def update(self, results: dict[str, tuple[tuple, bool]]):
+        """Add the results classified by the other process, to save them"""
+        if results:
+            self._results.update(results)
+            self._is_changed = True
+
+    @classmethod
+    def is_binary_content(cls, head: bytes) -> bool:
+        """Whether the head of the file is the binary content"""
+        return b'\x00' in head or head.startswith(cls.MAGIC_NUMBERS)
+
+    def save(self):
+        """Save the results to the cache folder if changed"""
+        if self.cache_dir is None or not self._is_changed:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self._get_cache_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._results, f)
+        os.replace(tmp_path, self._get_cache_path())
+        self._is_changed = False
+
+    def _load_cache(self) -> dict[str, tuple[tuple, bool]]:
+        """Read the results saved by the previous run. If it does not exist or is broken, start from empty"""
+        if self.cache_dir is None or not os.path.isfile(self._get_cache_path()):
+            return {}
+        try:
+            with open(self._get_cache_path(), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return {}
+
+    def _get_cache_path(self) -> str:
+        return f'{self.cache_dir}/{self.CACHE_FILE_NAME}'
@@ -0,0 +1,116 @@
+import os
+from typing import Optional
+from models.ignore_matcher import IgnoreMatcher
+
+
+class FileEntry:
+    """A file in the project's "src" folder"""
+    __slots__ = ('path', 'rel_path', 'size', 'mtime_ns')
+
+    path: str
+    rel_path: str
+    size: int
+    mtime_ns: int
+
+    def __init__(self, path: str, rel_path: str, size: int, mtime_ns: int):
+        self.path = path
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+
+class FileIndex:
+    """Index of the files in the project's "src" folder.
+    The folder is scanned only once, and shared by the builds of all environments.
+
+    Each file is stored by its logical path (the path without the environment).
+    * If file name is such as "sample.develop.txt", logical path is "sample.txt", and it's the variant for "develop".
+    * Otherwise (ex. "sample.txt", "jquery.min.js"), it's the base file.
+
+    If the ignore matcher is given, the folders whose files are all ignored (ex. "node_modules/*") are not scanned.
+    """
+    root_path: str
+    environments: list[str]
+    ignore_matcher: Optional[IgnoreMatcher]
+    _files: Optional[dict[str, dict[Optional[str], FileEntry]]]
+
+    def __init__(self, root_path: str, environments: list[str], ignore_matcher: Optional[IgnoreMatcher] = None):
+        self.root_path = root_path
+        self.environments = environments
+        self.ignore_matcher = ignore_matcher
+        self._files = None
+
+    def get_files(self, environment: str) -> dict[str, FileEntry]:
+        """
+        Get the files to build for the environment.
+        If the file has the variant for the environment, use it instead of the base file.
+        key: logical path relative to the root path
+        value: file entry
+        """
+        result = {}
+        for logical_path, variants in self._get_index().items():
+            entry = variants.get(environment, variants.get(None))
+            # Skip if the file has only the variants for the other environments
+            if entry is None:
+                continue
+            result[logical_path] = entry
+
+        return result
+
+    def _get_index(self) -> dict[str, dict[Optional[str], FileEntry]]:
+        """Get the index. Scan the folder at the first call
+        key: logical path
+        value: key: environment name (None for the base file) value: file entry
+        """
+        # Return as it is if already obtained
+        if self._files is not None:
+            return self._files
+
+        self._files = {}
+        for entry in self._scan_files(self.root_path, ''):
+            environment, logical_path = self._get_environment_and_logical_path(entry.rel_path)
+            self._files.setdefault(logical_path, {})[environment] = entry
+
+        return self._files
+
+    def _scan_files(self, dir_path: str, rel_dir_path: str) -> list[FileEntry]:
+        """Get all files in the folder recursively, with their status"""
+        if not os.path.isdir(dir_path):
+            return []
+
+        result = []
+        with os.scandir(dir_path) as it:
+            dir_entries = sorted(it, key=lambda dir_entry: dir_entry.name)
+
+        for dir_entry in dir_entries:
+            rel_path = f'{rel_dir_path}{dir_entry.name}'
+            # Do not follow the symbolic links to folders, the same as os.walk
+            if dir_entry.is_dir():
+                if not dir_entry.is_symlink() and not self._is_ignore_dir(rel_path):
+                    result.extend(self._scan_files(dir_entry.path, f'{rel_path}/'))
+                continue
+
+            stat = dir_entry.stat()
+            result.append(FileEntry(f'{dir_path}/{dir_entry.name}', rel_path, stat.st_size, stat.st_mtime_ns))
+
+        return result
+
+    def _is_ignore_dir(self, rel_dir_path: str) -> bool:
+        return self.ignore_matcher is not None and self.ignore_matcher.is_ignore_dir(rel_dir_path)
+
+    def _get_environment_and_logical_path(self, rel_path: str) -> tuple[Optional[str], str]:
+        return self.get_environment_and_logical_path(rel_path, self.environments)
+
+    @staticmethod
+    def get_environment_and_logical_path(rel_path: str, environments: list[str]) -> tuple[Optional[str], str]:
+        """Get the environment and the logical path from the file path.
+        ex. "sub/sample.develop.txt" -> ("develop", "sub/sample.txt"), "sub/sample.txt" -> (None, "sub/sample.txt")
+        """
+        dir_name, file_name = os.path.split(rel_path)
+        file_keys = file_name.split('.')
+        # If file_keys length is 3 or more(ex. "sample.develop.txt"), check if the last-1 element is the environment
+        if len(file_keys) < 3 or file_keys[-2] not in environments:
+            return None, rel_path
+
+        logical_name = '.'.join(file_keys[:-2] + file_keys[-1:])
+        return file_keys[-2], os.path.join(dir_name, logical_name)
@@ -0,0 +1,27 @@
+import fnmatch
+import os
+import re
+from typing import Optional
+from models.pattern_matcher import PatternMatcher
+
+
+class IgnoreMatcher(PatternMatcher):
+    """Match the paths with the ignore patterns (settings.ignore_files), compiled once per Config.
+
+    A folder can be skipped without scanning (is_ignore_dir), if a pattern ends with "*" and its prefix matches the folder.
+    ex. "node_modules/*" skips "node_modules", "*/vendor/*" skips "foo/vendor"
+    """
+    _dir_regex: Optional[re.Pattern]
+
+    def __init__(self, patterns: list[str]):
+        super().__init__(patterns)
+        # Every path under the folder matches, if the prefix before the last "*" matches the folder
+        dir_regexes = [fnmatch.translate(os.path.normcase(pattern)[:-1]) for pattern in patterns if pattern.endswith('*')]
+        self._dir_regex = re.compile('|'.join(dir_regexes)) if dir_regexes else None
+
+    def is_ignore_dir(self, dir_path: str) -> bool:
+        """Check if all paths under the folder (relative to the project's "src" folder, without the last "/") match"""
+        if self._dir_regex is None:
+            return False
+        dir_path = os.path.normcase(dir_path)
+        return self._dir_regex.match(dir_path) is not None or self._dir_regex.match(f'{dir_path}/') is not None
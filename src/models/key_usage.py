@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+
+class KeyUsage:
+    """Which replacement keys the templates use, to report the unused and undefined keys"""
+    defined_keys: set[str]
+    used_keys: set[str]
+    undefined_keys: dict[str, set[str]]
+
+    def __init__(self):
+        self.defined_keys = set()
+        self.used_keys = set()
+        # key: key name, value: template paths which contain the key
+        self.undefined_keys = {}
+
+    def add(self, template_path: str, keys: frozenset[str], defined_keys: dict):
+        """Add the keys which the template contains"""
+        for key in keys:
+            if key in defined_keys:
+                self.used_keys.add(key)
+            else:
+                self.undefined_keys.setdefault(key, set()).add(template_path)
+
+    def merge(self, other: KeyUsage):
+        self.defined_keys |= other.defined_keys
+        self.used_keys |= other.used_keys
+        for key, paths in other.undefined_keys.items():
+            self.undefined_keys.setdefault(key, set()).update(paths)
+
+    def get_unused_keys(self) -> list[str]:
+        """Get the keys which are defined but not used in any template"""
+        return sorted(self.defined_keys - self.used_keys)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import Callable, Optional, TypeVar
+from models.const import ArchiveFormat
+from models.output.file_writer import FileWriter
+from models.output.output_backend import OutputBackend
+
+T = TypeVar('T')
+
+
+class ArchiveBackend(OutputBackend):
+    """Outputs the files into an archive (tar, optionally compressed, or zip), instead of the files in "dist"
+
+    The entry names are relative to root_path (ex. "dist/docker-develop"), the same as archiving the folder.
+    The files which are not replaced are passed through by chunks.
+    The archive is written to a temporary file, and renamed to archive_path by close(). abort() removes it instead.
+    bytes_written is the total size of the files added (before compression), and the size of the archive after close().
+    *The manifest (incremental build) and the dedupe output are not used.
+    """
+    FORMATS = tuple(archive_format.value for archive_format in ArchiveFormat)
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    archive_path: str
+    root_path: str
+    bytes_written: int
+
+    def __init__(self, archive_path: str, root_path: str):
+        self.archive_path = archive_path
+        self.root_path = root_path
+        self.bytes_written = 0
+        os.makedirs(os.path.dirname(archive_path) or '.', exist_ok=True)
+        self._tmp_path = f'{archive_path}.{os.getpid()}.tmp'
+
+    @staticmethod
+    def make(archive_format: str, archive_path_base: str, root_path: str) -> ArchiveBackend:
+        """Create the backend of the format. The extension is added to archive_path_base"""
+        if archive_format not in ArchiveBackend.FORMATS:
+            raise Exception(f'Archive format "{archive_format}" is not supported. Use one of: {", ".join(ArchiveBackend.FORMATS)}')
+        archive_path = f'{archive_path_base}.{archive_format}'
+        if archive_format == ArchiveFormat.ZIP.value:
+            return ZipArchiveBackend(archive_path, root_path)
+        return TarArchiveBackend(archive_path, root_path, archive_format.partition('.')[2])
+
+    def close(self):
+        try:
+            self._close_archive()
+        except BaseException:
+            os.remove(self._tmp_path)
+            raise
+        os.replace(self._tmp_path, self.archive_path)
+        self.bytes_written = os.path.getsize(self.archive_path)
+
+    def abort(self):
+        try:
+            self._close_archive()
+        except Exception:
+            pass
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _close_archive(self):
+        pass
+
+    def _get_name(self, to_path: str) -> str:
+        return os.path.relpath(to_path, self.root_path).replace(os.sep, '/')
+
+
+class TarArchiveBackend(ArchiveBackend):
+    """Outputs the files into a tar archive. compression: "" (none), "gz", "bz2" or "xz" """
+    # Size to keep the streamed content in memory, before spooling it to a temporary file
+    SPOOL_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, archive_path: str, root_path: str, compression: str = ''):
+        super().__init__(archive_path, root_path)
+        self._tar = tarfile.open(self._tmp_path, f'w:{compression}' if compression else 'w')
+
+    def copy_file(self, from_path: str, to_path: str):
+        with open(from_path, 'rb') as f:
+            # Use the status of the opened file, to store the content of a link to a file
+            tarinfo = self._tar.gettarinfo(arcname=self._get_name(to_path), fileobj=f)
+            self._tar.addfile(tarinfo, f)
+        self.bytes_written += tarinfo.size
+
+    def write_content(self, to_path: str, content: str, render_key: Optional[str] = None):
+        data = content.encode(FileWriter.ENCODING, FileWriter.ERRORS)
+        self._tar.addfile(self._make_tarinfo(to_path, len(data)), io.BytesIO(data))
+        self.bytes_written += len(data)
+
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        # The size is written before the content in tar, so keep the content until the end
+        with tempfile.SpooledTemporaryFile(self.SPOOL_SIZE) as f:
+            result = write(lambda part: f.write(part.encode(FileWriter.ENCODING, FileWriter.ERRORS)))
+            size = f.tell()
+            f.seek(0)
+            self._tar.addfile(self._make_tarinfo(to_path, size), f)
+        self.bytes_written += size
+        return result
+
+    def _make_tarinfo(self, to_path: str, size: int) -> tarfile.TarInfo:
+        tarinfo = tarfile.TarInfo(self._get_name(to_path))
+        tarinfo.size = size
+        tarinfo.mode = FileWriter.FILE_MODE
+        tarinfo.mtime = int(time.time())
+        return tarinfo
+
+    def _close_archive(self):
+        self._tar.close()
+
+
+class ZipArchiveBackend(ArchiveBackend):
+    """Outputs the files into a zip archive (deflate)"""
+
+    def __init__(self, archive_path: str, root_path: str):
+        super().__init__(archive_path, root_path)
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', zipfile.ZIP_DEFLATED)
+
+    def copy_file(self, from_path: str, to_path: str):
+        zip_info = zipfile.ZipInfo.from_file(from_path, self._get_name(to_path))
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+        with open(from_path, 'rb') as from_file, self._zip.open(zip_info, 'w') as to_file:
+            shutil.copyfileobj(from_file, to_file, self.COPY_CHUNK_SIZE)
+        self.bytes_written += zip_info.file_size
+
+    def write_content(self, to_path: str, content: str, render_key: Optional[str] = None):
+        data = content.encode(FileWriter.ENCODING, FileWriter.ERRORS)
+        self._zip.writestr(self._make_zip_info(to_path), data)
+        self.bytes_written += len(data)
+
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        # The size is not known before writing, so allow the large file
+        with self._zip.open(self._make_zip_info(to_path), 'w', force_zip64=True) as to_file:
+            def write_part(part: str):
+                data = part.encode(FileWriter.ENCODING, FileWriter.ERRORS)
+                to_file.write(data)
+                self.bytes_written += len(data)
+            return write(write_part)
+
+    def _make_zip_info(self, to_path: str) -> zipfile.ZipInfo:
+        zip_info = zipfile.ZipInfo(self._get_name(to_path), time.localtime()[:6])
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+        # Permission of the regular file
+        zip_info.external_attr = (0o100000 | FileWriter.FILE_MODE) << 16
+        return zip_info
+
+    def _close_archive(self):
+        self._zip.close()
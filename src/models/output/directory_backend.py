@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Callable, Optional, TypeVar
+from models.output.file_copier import FileCopier
+from models.output.file_writer import FileWriter
+from models.output.object_store import ObjectStore
+from models.output.output_backend import OutputBackend
+
+T = TypeVar('T')
+
+
+class DirectoryBackend(OutputBackend):
+    """Outputs the files in "dist" (default)
+
+    * The files which are not replaced are output using the copy mode (FileCopier).
+    * The replaced contents are written by FileWriter.
+    * If the object store is given (dedupe output), the outputs are the hard links to the objects of the same content.
+    * Each output folder is created only once.
+    """
+    is_thread_safe = True
+
+    copy_mode: str
+    file_writer: FileWriter
+    object_store: Optional[ObjectStore]
+    _made_dirs: set[str]
+    _copied_bytes: int
+
+    def __init__(self, copy_mode: str, file_writer: FileWriter, object_store: Optional[ObjectStore] = None):
+        self.copy_mode = copy_mode
+        self.file_writer = file_writer
+        self.object_store = object_store
+        self._made_dirs = set()
+        self._copied_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_written(self) -> int:
+        # The objects of the dedupe output are written by the file writer. The other copies are counted here
+        return self.file_writer.bytes_written + self._copied_bytes
+
+    def copy_file(self, from_path: str, to_path: str):
+        self._make_dirs(to_path)
+        if self.object_store is not None:
+            stat = os.stat(from_path)
+            render_key = ObjectStore.make_render_key('copy', from_path, stat.st_size, stat.st_mtime_ns)
+            self.object_store.copy(from_path, to_path, render_key)
+        else:
+            FileCopier(self.copy_mode).copy(from_path, to_path)
+            size = os.path.getsize(from_path)
+            with self._lock:
+                self._copied_bytes += size
+
+    def write_content(self, to_path: str, content: str, render_key: Optional[str] = None):
+        self._make_dirs(to_path)
+        if self.object_store is not None and render_key is not None:
+            data = content.encode(FileWriter.ENCODING, FileWriter.ERRORS)
+            self.object_store.put_content(render_key, data, to_path)
+        else:
+            self.file_writer.write(to_path, content)
+
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        self._make_dirs(to_path)
+        if self.object_store is not None:
+            return self.object_store.put_stream(to_path, write)
+        return self.file_writer.write_stream(to_path, write)
+
+    def link_rendered(self, render_key: str, to_path: str) -> bool:
+        if self.object_store is None:
+            return False
+        self._make_dirs(to_path)
+        return self.object_store.link_rendered(render_key, to_path)
+
+    def _make_dirs(self, to_path: str):
+        """Create the folder of the output, if not created by this backend yet"""
+        dir_path = os.path.dirname(to_path)
+        if dir_path not in self._made_dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self._made_dirs.add(dir_path)
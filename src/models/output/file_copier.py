@@ -0,0 +1,97 @@
+import os
+import shutil
+from models.const import CopyMode
+
+
+class FileCopier:
+    """Outputs the files which are not replaced, using the copy mode (settings.copy_mode)
+
+    * copy (default): copy the data and the permission bits (shutil.copy)
+    * hardlink: create a hard link to the source. Falls back to reflink if not possible (ex. another device)
+    * symlink: create a symbolic link to the absolute source path. Falls back to reflink if not possible
+    * reflink: clone the file (copy-on-write) if the file system supports it.
+      Otherwise copy in the kernel (os.copy_file_range, then os.sendfile), and copy the permission bits
+
+    *The hard links and the symbolic links share the data with the template. Do not edit the outputs.
+    """
+    # ioctl request to clone a file on Linux (btrfs, xfs, ...)
+    FICLONE = 0x40049409
+    COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+    mode: CopyMode
+
+    def __init__(self, mode: str = CopyMode.COPY.value):
+        try:
+            self.mode = CopyMode(mode)
+        except ValueError:
+            raise Exception(f'copy_mode "{mode}" is not supported. Use one of: {", ".join(m.value for m in CopyMode)}')
+
+    def copy(self, from_path: str, to_path: str):
+        """Output the file to to_path, replacing the existing file"""
+        # Remove the existing output first, not to write through a link to the template
+        if os.path.lexists(to_path):
+            os.remove(to_path)
+
+        if self.mode == CopyMode.HARDLINK and self._try_link(os.link, from_path, to_path):
+            return
+        if self.mode == CopyMode.SYMLINK and self._try_link(os.symlink, os.path.abspath(from_path), to_path):
+            return
+        if self.mode == CopyMode.COPY:
+            shutil.copy(from_path, to_path)
+            return
+
+        self._clone_or_copy(from_path, to_path)
+        shutil.copymode(from_path, to_path)
+
+    def _try_link(self, link, from_path: str, to_path: str) -> bool:
+        """Create the link. If not possible, return False"""
+        try:
+            link(from_path, to_path)
+        except OSError:
+            return False
+        return True
+
+    def _clone_or_copy(self, from_path: str, to_path: str):
+        """Clone the file if possible. Otherwise copy it in the kernel"""
+        with open(from_path, 'rb') as from_file, open(to_path, 'wb') as to_file:
+            from_fd, to_fd = from_file.fileno(), to_file.fileno()
+            if self._try_clone(from_fd, to_fd):
+                return
+
+            size = os.fstat(from_fd).st_size
+            for function_name in ('copy_file_range', 'sendfile'):
+                if hasattr(os, function_name) and self._try_copy_in_kernel(function_name, from_fd, to_fd, size):
+                    return
+
+            # Copy in the user space as the last resort
+            shutil.copyfileobj(from_file, to_file)
+
+    def _try_clone(self, from_fd: int, to_fd: int) -> bool:
+        """Clone the file by ioctl(FICLONE). If not supported, return False"""
+        try:
+            import fcntl
+            fcntl.ioctl(to_fd, self.FICLONE, from_fd)
+        except (ImportError, OSError):
+            return False
+        return True
+
+    def _try_copy_in_kernel(self, function_name: str, from_fd: int, to_fd: int, size: int) -> bool:
+        """Copy the data by os.copy_file_range or os.sendfile. If not supported, return False"""
+        offset = 0
+        try:
+            while offset < size:
+                count = min(self.COPY_CHUNK_SIZE, size - offset)
+                if function_name == 'copy_file_range':
+                    copied = os.copy_file_range(from_fd, to_fd, count, offset, offset)
+                else:
+                    copied = os.sendfile(to_fd, from_fd, offset, count)
+                # Stop at the end of the file
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError:
+            # Clear the output to retry with the next method
+            os.ftruncate(to_fd, 0)
+            os.lseek(to_fd, 0, os.SEEK_SET)
+            return False
+        return True
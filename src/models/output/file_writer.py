@@ -0,0 +1,143 @@
+import os
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+def _get_file_mode() -> int:
+    """Get the permission of a file created by open() (0o666 masked by umask)"""
+    # os.umask() can only be read by setting it, so read it once at the import, not while the other threads create files
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class FileWriter:
+    """Writes the replaced contents to the outputs
+
+    * is_skip_unchanged: if the existing output has the same bytes, do not write it, to keep its mtime
+      (ex. for the cache of "docker build" and the file watchers). The size is compared first, then the bytes.
+    * The output is written to a temporary file in the same folder, and renamed to the output path.
+      So the output is never seen half-written, and a link at the output path is replaced, not written through.
+    * is_fsync: flush the file and the folder to the disk before finishing
+    * write_stream() writes a large content by parts. Its output is compared with the existing output after written.
+    """
+    ENCODING = 'utf-8'
+    # The bytes which are not UTF-8 (ex. Latin-1 text) are read as the surrogates, and written back as the same bytes
+    ERRORS = 'surrogateescape'
+    COMPARE_CHUNK_SIZE = 1024 * 1024
+    # Permission of the outputs, the same as a file created by open()
+    FILE_MODE = _get_file_mode()
+
+    is_skip_unchanged: bool
+    is_fsync: bool
+    bytes_written: int
+
+    def __init__(self, is_skip_unchanged: bool = True, is_fsync: bool = False):
+        self.is_skip_unchanged = is_skip_unchanged
+        self.is_fsync = is_fsync
+        # Total bytes written to the outputs (not including the skipped outputs)
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def write(self, to_path: str, content: str) -> bool:
+        """Write the content to the output. Return False if skipped because it's unchanged"""
+        data = content.encode(self.ENCODING, self.ERRORS)
+        if self.is_skip_unchanged and self._is_same_content(to_path, data):
+            return False
+
+        self.write_atomic(to_path, lambda f: f.write(data))
+        return True
+
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        """Write the content by parts, without keeping the whole content in memory.
+        write() receives the function to write a part of the content, and its return value is returned.
+        If is_skip_unchanged and the output has the same bytes, the output is kept.
+        """
+        result = None
+
+        def write_file(f: BinaryIO):
+            nonlocal result
+            result = write(lambda part: f.write(part.encode(self.ENCODING, self.ERRORS)))
+
+        self.write_atomic(to_path, write_file, self.is_skip_unchanged)
+        return result
+
+    @property
+    def file_mode(self) -> int:
+        """Permission of the outputs"""
+        return self.FILE_MODE
+
+    def write_atomic(self, to_path: str, write: Callable[[BinaryIO], None], is_skip_unchanged: bool = False,
+                     mode: Optional[int] = None) -> bool:
+        """Write the output through a temporary file. write() receives the binary file object.
+        If is_skip_unchanged and the output has the same bytes as the temporary file, keep the output and return False.
+        If mode is given, use it as the permission instead of file_mode.
+        """
+        dir_path = os.path.dirname(to_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f'.{os.path.basename(to_path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                if self.is_fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            if is_skip_unchanged and self._is_same_file(to_path, tmp_path):
+                os.remove(tmp_path)
+                return False
+
+            # Set the same permission as a file created by open()
+            os.chmod(tmp_path, self.file_mode if mode is None else mode)
+            os.replace(tmp_path, to_path)
+            size = os.path.getsize(to_path)
+            with self._lock:
+                self.bytes_written += size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if self.is_fsync:
+            self._fsync_dir(dir_path)
+        return True
+
+    def _is_same_file(self, to_path: str, tmp_path: str) -> bool:
+        """Check if the existing output has the same bytes as the temporary file, comparing by chunks"""
+        if not self._is_regular_file(to_path) or os.path.getsize(to_path) != os.path.getsize(tmp_path):
+            return False
+        with open(to_path, 'rb') as to_file, open(tmp_path, 'rb') as tmp_file:
+            while True:
+                to_chunk = to_file.read(self.COMPARE_CHUNK_SIZE)
+                if to_chunk != tmp_file.read(self.COMPARE_CHUNK_SIZE):
+                    return False
+                if not to_chunk:
+                    return True
+
+    def _is_same_content(self, to_path: str, data: bytes) -> bool:
+        """Check if the existing output has the same bytes. Compare the size first, not to read it if possible"""
+        if not self._is_regular_file(to_path) or os.path.getsize(to_path) != len(data):
+            return False
+        with open(to_path, 'rb') as f:
+            return f.read() == data
+
+    def _is_regular_file(self, path: str) -> bool:
+        """Check if the path is a file which is not a link (it might be shared with the template)"""
+        if os.path.islink(path) or not os.path.isfile(path):
+            return False
+        return os.stat(path).st_nlink == 1
+
+    def _fsync_dir(self, dir_path: str):
+        """Flush the rename to the disk. Not supported on some platforms"""
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
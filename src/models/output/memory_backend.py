@@ -0,0 +1,40 @@
+from typing import Callable, Optional, TypeVar
+from models.output.file_writer import FileWriter
+from models.output.output_backend import OutputBackend
+
+T = TypeVar('T')
+
+
+class MemoryBackend(OutputBackend):
+    """Keeps the outputs in memory, instead of the files in "dist" (used by RenderUsecase)
+
+    key: path in "dist" (to_path)
+    value: content of the output
+    """
+    outputs: dict[str, bytes]
+    bytes_written: int
+
+    def __init__(self):
+        self.outputs = {}
+        self.bytes_written = 0
+
+    def copy_file(self, from_path: str, to_path: str):
+        with open(from_path, 'rb') as f:
+            self._put(to_path, f.read())
+
+    def write_content(self, to_path: str, content: str, render_key: Optional[str] = None):
+        self._put(to_path, content.encode(FileWriter.ENCODING, FileWriter.ERRORS))
+
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        parts = []
+        result = write(lambda part: parts.append(part.encode(FileWriter.ENCODING, FileWriter.ERRORS)))
+        self._put(to_path, b''.join(parts))
+        return result
+
+    def pop(self, to_path: str) -> Optional[bytes]:
+        """Get the output and release it. If not output, return None"""
+        return self.outputs.pop(to_path, None)
+
+    def _put(self, to_path: str, content: bytes):
+        self.outputs[to_path] = content
+        self.bytes_written += len(content)
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+from typing import BinaryIO, Callable, Optional, TypeVar
+from models.const import FolderName
+from models.output.file_writer import FileWriter
+
+T = TypeVar('T')
+
+class ObjectStore:
+    """Stores each unique output content only once (settings.is_dedupe_output), in "dist/.objects"
+
+    * "objects/<hash>-<permission>": a file per unique content. The outputs are hard links to it.
+    * "renders/<render key>": a hard link to the object made for the render key (ex. the template and the values of its keys).
+      The same render key is not rendered again, by any environment or worker process.
+    If a hard link cannot be created, the object is copied to the output.
+    The large files replaced by chunks (put_stream) are stored by the hash of the content written, without the render key.
+    The objects which no output links to anymore are removed by collect_garbage, with their render links.
+
+    *The outputs of the same content share the data. Do not edit the outputs.
+    """
+    DIR_NAME = '.objects'
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    root_path: str
+    file_writer: FileWriter
+
+    def __init__(self, root_path: Optional[str] = None, file_writer: Optional[FileWriter] = None):
+        self.root_path = root_path if root_path is not None else f'{FolderName.OUTPUT_ROOT.value}/{self.DIR_NAME}'
+        self.file_writer = file_writer if file_writer is not None else FileWriter(False)
+
+    @staticmethod
+    def make_render_key(*parts) -> str:
+        """Make the render key from everything which decides the output content"""
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def link_rendered(self, render_key: str, to_path: str) -> bool:
+        """Output the object made for the render key. If it's not made yet, return False"""
+        render_path = self._get_render_path(render_key)
+        if not os.path.exists(render_path):
+            return False
+        self._link(render_path, to_path)
+        return True
+
+    def put_content(self, render_key: str, content: bytes, to_path: str):
+        """Store the content made for the render key, and output it"""
+        object_path = self._get_object_path(hashlib.sha256(content).hexdigest(), self.file_writer.file_mode)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self.file_writer.write_atomic(object_path, lambda f: f.write(content))
+        self._put_render(render_key, object_path, to_path)
+
+    def put_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        """Store the content written by parts, hashing it while writing, and output it.
+        write() receives the function to write a part, and its return value is returned.
+        """
+        content_hash = hashlib.sha256()
+        result = None
+
+        def write_file(f: BinaryIO):
+            nonlocal result
+
+            def write_part(part: str):
+                data = part.encode(FileWriter.ENCODING, FileWriter.ERRORS)
+                content_hash.update(data)
+                f.write(data)
+            result = write(write_part)
+
+        # Write it in the objects folder, and rename it to the object of its hash
+        stream_path = f'{self.root_path}/objects/.stream.{os.getpid()}.{threading.get_ident()}'
+        os.makedirs(os.path.dirname(stream_path), exist_ok=True)
+        self.file_writer.write_atomic(stream_path, write_file)
+        object_path = self._get_object_path(content_hash.hexdigest(), self.file_writer.file_mode)
+        if os.path.exists(object_path):
+            os.remove(stream_path)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(stream_path, object_path)
+        self._link(object_path, to_path)
+        return result
+
+    def copy(self, from_path: str, to_path: str, render_key: str):
+        """Output the file as it is, sharing the object with the other outputs of the same content and permission"""
+        if self.link_rendered(render_key, to_path):
+            return
+
+        mode = stat.S_IMODE(os.stat(from_path).st_mode)
+        object_path = self._get_object_path(self._get_file_hash(from_path), mode)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self.file_writer.write_atomic(object_path, lambda f: self._copy_to(from_path, f), mode=mode)
+        self._put_render(render_key, object_path, to_path)
+
+    def collect_garbage(self):
+        """Remove the objects which no output links to (ex. the outputs were rebuilt or removed), and their render links.
+        An object is unused if its only links are itself and its render links.
+        Do not call it while the other processes are building with the same store.
+        """
+        objects_path, renders_path = f'{self.root_path}/objects', f'{self.root_path}/renders'
+        render_paths = {}
+        for path in self._walk_files(renders_path):
+            stat_result = os.stat(path)
+            render_paths.setdefault((stat_result.st_dev, stat_result.st_ino), []).append(path)
+
+        for object_path in self._walk_files(objects_path):
+            stat_result = os.stat(object_path)
+            paths = render_paths.get((stat_result.st_dev, stat_result.st_ino), [])
+            if stat_result.st_nlink > 1 + len(paths):
+                continue
+            for path in paths + [object_path]:
+                os.remove(path)
+
+    def _walk_files(self, root_path: str) -> list[str]:
+        return [os.path.join(folder_path, file_name) for folder_path, _, file_names in os.walk(root_path) for file_name in file_names]
+
+    def _put_render(self, render_key: str, object_path: str, to_path: str):
+        render_path = self._get_render_path(render_key)
+        os.makedirs(os.path.dirname(render_path), exist_ok=True)
+        self._link(object_path, render_path)
+        self._link(object_path, to_path)
+
+    def _link(self, from_path: str, to_path: str):
+        """Replace to_path with a hard link to from_path (or a copy if not possible)"""
+        # Create it with the other name and rename, not to be seen half-made by the other processes
+        tmp_path = f'{to_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.link(from_path, tmp_path)
+        except OSError:
+            shutil.copy(from_path, tmp_path)
+        os.replace(tmp_path, to_path)
+
+    def _copy_to(self, from_path: str, to_file: BinaryIO):
+        with open(from_path, 'rb') as from_file:
+            shutil.copyfileobj(from_file, to_file, self.HASH_CHUNK_SIZE)
+
+    def _get_file_hash(self, path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(self.HASH_CHUNK_SIZE):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def _get_object_path(self, content_hash: str, mode: int) -> str:
+        return f'{self.root_path}/objects/{content_hash[:2]}/{content_hash}-{mode:o}'
+
+    def _get_render_path(self, render_key: str) -> str:
+        return f'{self.root_path}/renders/{render_key[:2]}/{render_key}'
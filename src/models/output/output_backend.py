@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class OutputBackend(ABC):
+    """Where Project outputs the files (ex. the files in "dist", an archive)
+
+    to_path is the path in "dist" (ex. "dist/docker-develop/project/Dockerfile"), even if the backend does not create the file.
+    """
+    # Total bytes of the outputs copied or written. The output linked to the content written before (dedupe output) is not counted
+    bytes_written: int = 0
+    # Whether the files can be output from the multiple threads at once (settings.io_concurrency)
+    is_thread_safe: bool = False
+
+    @abstractmethod
+    def copy_file(self, from_path: str, to_path: str):
+        """Output the file as it is"""
+        pass
+
+    @abstractmethod
+    def write_content(self, to_path: str, content: str, render_key: Optional[str] = None):
+        """Output the replaced content. render_key is given in the dedupe output (see link_rendered)"""
+        pass
+
+    @abstractmethod
+    def write_stream(self, to_path: str, write: Callable[[Callable[[str], None]], T]) -> T:
+        """Output the replaced content by parts. write() receives the function to write a part, and its return value is returned"""
+        pass
+
+    def link_rendered(self, render_key: str, to_path: str) -> bool:
+        """Output the content written for the render key before, instead of rendering it again. If not possible, return False"""
+        return False
+
+    def close(self):
+        """Finish the outputs"""
+        pass
+
+    def abort(self):
+        """Discard the outputs not finished yet (ex. the build failed), instead of close()"""
+        pass
@@ -1,8 +1,12 @@
+from __future__ import annotations
 from abc import abstractmethod
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from models.parser.file_parser import ParserBase
 
+if TYPE_CHECKING:
+    from models.config import Config
+
 
 class CustomParserOptions:
     """Custom Parser Options. (Maybe use for custom parser)"""
@@ -13,11 +17,11 @@ class CustomParserOptions:
 
 class CustomParser(ParserBase):
     """Custom Parser. (Get from custom function)"""
+    __slots__ = ('option', 'value')
+
     option: CustomParserOptions
     value: Optional[str]
 
-    from models.config import Config
-
     def __init__(self, config: Config, key: str, option: CustomParserOptions):
         super().__init__(config, key)
         self.option = option
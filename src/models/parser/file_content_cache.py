@@ -0,0 +1,72 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from models.output.file_writer import FileWriter
+
+
+class FileContentCache:
+    """LRU cache of the replacement files' contents, shared by all FileParsers of the process.
+    The contents are keyed by the absolute path, mtime and size, so a changed file is read again.
+    The total length (characters) of the cached contents is bounded by max_size. A file larger than it is not cached.
+    The files are read in the same encoding as the templates and the outputs, not the locale's.
+    """
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    _shared: Optional[FileContentCache] = None
+
+    max_size: int
+    _contents: OrderedDict[tuple, str]
+    _size: int
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._contents = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls) -> FileContentCache:
+        """Get the cache shared by the process"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @property
+    def size(self) -> int:
+        """Total length of the cached contents"""
+        return self._size
+
+    def get(self, path: str) -> str:
+        """Get the content of the file. Read it if not cached"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if key in self._contents:
+                self._contents.move_to_end(key)
+                return self._contents[key]
+
+        with open(path, 'r', encoding=FileWriter.ENCODING) as f:
+            content = f.read()
+
+        with self._lock:
+            self._put(key, content)
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._contents.clear()
+            self._size = 0
+
+    def _put(self, key: tuple, content: str):
+        """Add the content, and remove the least recently used contents to keep the total size"""
+        if key in self._contents or len(content) > self.max_size:
+            return
+
+        self._contents[key] = content
+        self._size += len(content)
+        while self._size > self.max_size:
+            _, removed = self._contents.popitem(last=False)
+            self._size -= len(removed)
@@ -1,17 +1,22 @@
+from __future__ import annotations
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
+from models.parser.file_content_cache import FileContentCache
 from models.parser.parser_base import ParserBase
 
+if TYPE_CHECKING:
+    from models.config import Config
+
 
 class FileParser(ParserBase):
     """File Parser. (Get from file)"""
+    __slots__ = ('file_path', 'folder_path', 'value')
+
     file_path: str
     folder_path: str
     value: Optional[str]
 
-    from models.config import Config
-
     def __init__(self, config: Config, key: str, file_path: str):
         super().__init__(config, key)
         self.file_path = file_path
@@ -19,13 +24,19 @@ class FileParser(ParserBase):
         self.folder_path = os.path.dirname(file_path)
 
     def parse(self, content: str) -> str:
+        return content.replace(self.template_key, self.get_value())
+
+    def get_value(self) -> str:
         # If value is already set, return it
         if self.value is not None:
             return self.value
 
-        # Read file and set value
-        path = f"{self.file_path}"
-        with open(path, 'r') as f:
-            self.value = f.read()
+        # Read file (through the cache shared by all projects and environments) and set value
+        self.value = FileContentCache.get_shared().get(self.file_path)
+
+        return self.value
 
-        return content.replace(self.template_key, self.value)
+    def get_fingerprint(self) -> str:
+        # Use the file status, not to read the file
+        stat = os.stat(self.file_path)
+        return f'{self.file_path}:{stat.st_size}:{stat.st_mtime_ns}'
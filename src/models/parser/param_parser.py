@@ -1,10 +1,16 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
 from models.parser.parser_base import ParserBase
 
+if TYPE_CHECKING:
+    from models.config import Config
+
+
 class ParamParser(ParserBase):
     """Parameter Parser. (Get from yml config)"""
-    value: str
+    __slots__ = ('value',)
 
-    from models.config import Config
+    value: str
 
     def __init__(self, config: Config, key: str, value: str):
         super().__init__(config, key)
@@ -12,3 +18,6 @@ class ParamParser(ParserBase):
 
     def parse(self, content: str) -> str:
         return content.replace(self.template_key, self.value)
+
+    def get_value(self) -> str:
+        return self.value
@@ -1,9 +1,14 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from models.config import Config
 
 
 class ParserBase(ABC):
     """Parser Base Class"""
-    from models.config import Config
+    __slots__ = ('config', 'key')
 
     config: Config
     key: str
@@ -16,6 +21,15 @@ class ParserBase(ABC):
     def parse(self, content: str) -> str:
         pass
 
+    @abstractmethod
+    def get_value(self) -> str:
+        """Get the value to replace the template key with"""
+        pass
+
+    def get_fingerprint(self) -> str:
+        """Get the string that changes when the value changes (without reading the value if possible)"""
+        return self.get_value()
+
     @property
     def template_key(self) -> str:
         return '{{' + self.key + '}}'
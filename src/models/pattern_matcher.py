@@ -0,0 +1,58 @@
+import fnmatch
+import os
+import re
+from typing import Optional
+
+
+class PatternMatcher:
+    """Match the paths or names with the wildcard patterns (ex. --project, --path), compiled once.
+    The result is the same as calling fnmatch.fnmatch for every pattern.
+
+    * Patterns without wildcards (ex. "docker-compose.yml") are looked up in a set.
+    * Patterns such as "*.bak" are checked by str.endswith.
+    * The other patterns are combined into one regex.
+    """
+    # Characters that fnmatch handles as wildcards
+    MAGIC_PATTERN = re.compile(r'[*?\[]')
+
+    patterns: list[str]
+    _literals: set[str]
+    _suffixes: tuple[str, ...]
+    _regex: Optional[re.Pattern]
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        literals = set()
+        suffixes = []
+        regexes = []
+        for pattern in patterns:
+            pattern = os.path.normcase(pattern)
+            if not self._has_magic(pattern):
+                literals.add(pattern)
+            elif pattern.startswith('*') and not self._has_magic(pattern[1:]):
+                suffixes.append(pattern[1:])
+            else:
+                regexes.append(fnmatch.translate(pattern))
+
+        self._literals = literals
+        self._suffixes = tuple(suffixes)
+        self._regex = re.compile('|'.join(regexes)) if regexes else None
+
+    @property
+    def key(self) -> tuple[str, ...]:
+        """Key to share the objects (ex. file index) between the configs which have the same patterns"""
+        return tuple(self.patterns)
+
+    def is_match(self, path: str) -> bool:
+        """Check if the path (ex. relative to the project's "src" folder) matches any pattern"""
+        path = os.path.normcase(path)
+        if path in self._literals or path.endswith(self._suffixes):
+            return True
+        return self._regex is not None and self._regex.match(path) is not None
+
+    def get_unmatched_patterns(self, paths: list[str]) -> list[str]:
+        """Get the patterns which match none of the paths (ex. a misspelled project name)"""
+        return [pattern for pattern in self.patterns if not any(PatternMatcher([pattern]).is_match(path) for path in paths)]
+
+    def _has_magic(self, pattern: str) -> bool:
+        return self.MAGIC_PATTERN.search(pattern) is not None
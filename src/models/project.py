@@ -1,141 +1,460 @@
-import fnmatch
+from __future__ import annotations
 import os
-import shutil
-from models.config import Config
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Iterator, Optional, TypeVar
+from models.build_manifest import BuildManifest
+from models.build_stats import BuildStats
+from models.config import Config, GlobalConfig
 from models.const import FolderName
+from models.file_classifier import FileClassifier
+from models.file_index import FileEntry, FileIndex
+from models.pattern_matcher import PatternMatcher
+from models.key_usage import KeyUsage
+from models.output.directory_backend import DirectoryBackend
+from models.output.file_writer import FileWriter
+from models.output.object_store import ObjectStore
+from models.output.output_backend import OutputBackend
+from models.parser.file_parser import FileParser
+from models.compiled_template import CompiledTemplate
+from models.template_cache import TemplateCache
+
+# asyncio and the thread pool are imported only when building with settings.io_concurrency
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
+
+T = TypeVar('T')
 
 
 class Project:
+    # Number of characters to read at once, when replacing a large file by chunks
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
+    __slots__ = ('name', 'environment', 'config', 'file_index', 'key_usage', 'stats', 'template_cache', 'file_classifier',
+                 'output_backend', 'workspace_path', '_io_executor')
+
     name: str
     environment: str
     config: Config
+    file_index: FileIndex
+    key_usage: KeyUsage
+    stats: BuildStats
+    template_cache: TemplateCache
+    file_classifier: FileClassifier
+    output_backend: Optional[OutputBackend]
+    workspace_path: Optional[str]
 
-    def __init__(self, name: str, environment: str, config: Config):
+    def __init__(self, name: str, environment: str, config: Config, file_index: Optional[FileIndex] = None,
+                 workspace_path: Optional[str] = None):
         self.name = name
         self.environment = environment
         self.config = config
+        # Folder which has "templates". If None, the current directory
+        self.workspace_path = workspace_path
+        # Share the index with the other environments if given
+        # *The index knows all environments, so that the variants of the other environments are not built as the base files
+        self.file_index = file_index if file_index is not None else FileIndex(self.root_path, self._get_environments())
+        self.key_usage = KeyUsage()
+        self.stats = BuildStats()
+        self.template_cache = TemplateCache.get_shared()
+        self.file_classifier = FileClassifier()
+        # If not given, output the files in "dist" (created at the build)
+        self.output_backend = None
+        # Thread pool for the file operations, while building with settings.io_concurrency
+        self._io_executor: Optional[Executor] = None
+
+    def _get_environments(self) -> list[str]:
+        """Get all environments of the global config. If the config is not merged with it, only the environment of this project"""
+        global_config = self.config.global_config
+        if isinstance(global_config, GlobalConfig):
+            return global_config.environments
+        return [self.environment]
 
     @property
     def pj_root(self):
         """path of the project"""
-        if self.config.is_multi_project_mode:
-            return f"{FolderName.TARGET_ROOT_FOLDER.value}/{self.name}"
-        return self.name
+        return self.get_pj_root(self.name, self.config.is_multi_project_mode, self.workspace_path)
 
     @property
     def root_path(self):
         """Root path of the project"""
         return f"{self.pj_root}/{FolderName.REPLACE_TARGET.value}"
 
-    def build(self):
+    @staticmethod
+    def get_pj_root(name: str, is_multi_project_mode: bool, workspace_path: Optional[str] = None) -> str:
+        """Get the path of the project, without making its config"""
+        base_path = f'{workspace_path}/' if workspace_path is not None else ''
+        if is_multi_project_mode:
+            return f"{base_path}{FolderName.TARGET_ROOT_FOLDER.value}/{name}"
+        return f"{base_path}{name}"
+
+    def build(self, manifest: Optional[BuildManifest] = None, path_matcher: Optional[PatternMatcher] = None):
+        """Build the files of the project.
+        If the manifest is given, skip the files whose inputs did not change since the previous build, and record the built files.
+        If the path matcher is given, build only the files which match it, and keep the other outputs.
+        If settings.io_concurrency is more than 1, the file operations of the files overlap (see _build_files_async).
+        Called in a running event loop (ex. from the async code of a service), the files are built one by one.
+        """
         # Skip if it's an ignored configuration
         if self.config.is_ignore:
             return
 
+        if self.config.io_concurrency <= 1 or not self._get_output_backend().is_thread_safe or self._is_in_event_loop():
+            for _ in self.iter_build(manifest, path_matcher):
+                pass
+            return
+
+        import asyncio
+        with self._build_session() as files:
+            asyncio.run(self._build_files_async(files, manifest, path_matcher))
+
+    def iter_build(self, manifest: Optional[BuildManifest] = None, path_matcher: Optional[PatternMatcher] = None) -> Iterator[str]:
+        """Build the files of the project one by one, the same as build(). Yields the output path (to_path) of each file built"""
+        # Skip if it's an ignored configuration
+        if self.config.is_ignore:
+            return
+
+        with self._build_session() as files:
+            for file_rel_path, file_entry in files.items():
+                to_path = self._run_inline(self._build_file(file_rel_path, file_entry, manifest, path_matcher))
+                if to_path is not None:
+                    yield to_path
+
+    def _is_in_event_loop(self) -> bool:
+        """Whether an event loop is running in this thread, where asyncio.run() cannot be used"""
+        import asyncio
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    @contextmanager
+    def _build_session(self) -> Iterator[dict[str, FileEntry]]:
+        """Prepare the parsers and get the files to build. After building them, count the replacements and the bytes"""
+        output_backend = self._get_output_backend()
+        bytes_written = output_backend.bytes_written
+
+        with self.stats.measure('parser_construction'):
+            self.key_usage.defined_keys.update(self.config.get_parsers().keys())
+        # The renderer is shared by the builds of the same config (ex. watch mode), so count from zero
+        self.config.get_renderer().replacement_counts.clear()
+
         # Get a list of files in the "temp" folder
-        files = self._get_files()
-        for file in files:
-            # Get the file name without the path up to "src/"
-            file_rel_path = file.replace(f"{self.root_path}/", '')
-            # Skip if the file is in the ignore list
-            if self._is_ignore_file(file_rel_path):
-                continue
-
-            # Create the path relative to the root folder
-            to_path = self._get_pj_dist_root() + f'/{file_rel_path}'
-
-            # If it's a file to be replaced, create the replaced file
-            if self._is_replace_file_content(file_rel_path):
-                # Get the content to be replaced
-                content = self._get_target_content(file)
-                # Perform the replacement
-                content = self._get_replaced_text(content)
-                # Write the content to the file specified by to_path.replace('.temp', '')
-                self._write_replaced_content(to_path.replace('.temp', ''), content)
-            # Otherwise, copy the file as is
-            else:
-                self._copy_file(file, to_path)
+        with self.stats.measure('tree_walk'):
+            files = self._get_files()
+        try:
+            yield files
+        finally:
+            self.stats.add_replacements(self.config.get_renderer().replacement_counts)
+            # The backend can be shared with the other projects, so count only the bytes of this build
+            self.stats.count('bytes_written', output_backend.bytes_written - bytes_written)
+
+    async def _build_files_async(self, files: dict[str, FileEntry], manifest: Optional[BuildManifest],
+                                 path_matcher: Optional[PatternMatcher]):
+        """Build the files, overlapping their reads, writes and copies in the thread pool.
+        At most settings.io_concurrency files are in progress. The next file is started when one of them finishes.
+        The rendering, the manifest and the stats are handled in this thread, so they work the same as the sequential build.
+        If a file fails, the other files in progress are cancelled, and the error is raised.
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        concurrency = self.config.io_concurrency
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            self._io_executor = executor
+            pending = set()
+            try:
+                # The files which can be output to the same path (ex. "Dockerfile" and "Dockerfile.temp") are built in order
+                last_tasks = {}
+                for file_rel_path, file_entry in files.items():
+                    if len(pending) >= concurrency:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+
+                    output_key = file_rel_path.replace('.temp', '')
+                    task = asyncio.create_task(self._build_file_after(
+                        last_tasks.get(output_key), file_rel_path, file_entry, manifest, path_matcher))
+                    last_tasks[output_key] = task
+                    pending.add(task)
+
+                if pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                    for task in done:
+                        task.result()
+            except BaseException:
+                # The file operations already running in the thread pool finish, but the others are not started
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+            finally:
+                self._io_executor = None
+
+    async def _build_file_after(self, previous: Optional[asyncio.Task], file_rel_path: str, file_entry: FileEntry,
+                                manifest: Optional[BuildManifest], path_matcher: Optional[PatternMatcher]) -> Optional[str]:
+        """Build the file after the previous file of the same output path finished"""
+        if previous is not None:
+            import asyncio
+            await asyncio.wait([previous])
+        return await self._build_file(file_rel_path, file_entry, manifest, path_matcher)
+
+    async def _build_file(self, file_rel_path: str, file_entry: FileEntry, manifest: Optional[BuildManifest],
+                          path_matcher: Optional[PatternMatcher]) -> Optional[str]:
+        """Build the file. Returns the output path, or None if the file is ignored or filtered out
+        The ignore patterns and ".temp" are matched with the real file name (ex. "nginx.develop.conf"), the output is the logical path.
+        """
+        # Skip if the file is in the ignore list
+        if self._is_ignore_file(file_entry.rel_path):
+            return None
+
+        # Create the path relative to the root folder
+        to_path = self._get_pj_dist_root() + f'/{file_rel_path}'
+        # If it's a file to be replaced, create the replaced file to the path specified by to_path.replace('.temp', '')
+        is_replace = await self._run_io(self._is_replace_file_content, file_entry.rel_path, file_entry)
+        if is_replace:
+            to_path = to_path.replace('.temp', '')
+
+        # Keep the output as it is, if the file is filtered out
+        if path_matcher is not None and not path_matcher.is_match(file_rel_path):
+            if manifest is not None:
+                manifest.keep_previous_path(to_path)
+            return None
+
+        if is_replace:
+            await self._build_replaced_file(file_entry, to_path, manifest)
+        # Otherwise, copy the file as is
+        else:
+            await self._build_copied_file(file_entry, to_path, manifest)
+        return to_path
+
+    async def _run_io(self, function: Callable[..., T], *args) -> T:
+        """Run the file operation in the thread pool while building with settings.io_concurrency. Otherwise, run it here"""
+        if self._io_executor is None:
+            return function(*args)
+
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, function, *args)
+
+    def _run_inline(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run the coroutine of the sequential build in this thread. It never waits, because _run_io runs the function here"""
+        try:
+            coroutine.send(None)
+        except StopIteration as stop:
+            return stop.value
+        coroutine.close()
+        raise Exception('The file operation was sent to the thread pool in the sequential build')
+
+    async def _build_copied_file(self, file_entry: FileEntry, to_path: str, manifest: Optional[BuildManifest]):
+        """Copy the file as is"""
+        entry = self._make_manifest_entry(manifest, file_entry, 'copy')
+        if self._is_up_to_date(manifest, to_path, entry):
+            return
+
+        await self._copy_file(file_entry.path, to_path)
+        self._count_copied_file(file_entry)
+        self._record_manifest_entry(manifest, to_path, entry)
+
+    async def _build_replaced_file(self, file_entry: FileEntry, to_path: str, manifest: Optional[BuildManifest]):
+        """Create the replaced file. Only the keys which the file contains are used"""
+        parsers = self.config.get_parsers()
+        entry = self._make_manifest_entry(manifest, file_entry, 'replace')
+
+        # If the file did not change since the previous build, it contains the same keys. So check only the values of them
+        keys = self._get_previous_keys(manifest, to_path, entry)
+        if keys is not None and self._is_up_to_date(manifest, to_path, self._set_keys_to_entry(entry, keys)):
+            self.key_usage.add(file_entry.path, keys, parsers)
+            return
+
+        # Replace the large file by chunks, to keep the memory usage bounded
+        # *It's done in this thread, not to use the renderer from the multiple threads
+        if file_entry.size > self.config.stream_threshold_size:
+            with self.stats.measure('substitution'):
+                keys = self._write_replaced_stream(file_entry.path, to_path)
+            self.key_usage.add(file_entry.path, keys, parsers)
+            self.stats.count('replaced_files')
+            self.stats.count('bytes_read', file_entry.size)
+            self._record_manifest_entry(manifest, to_path, self._set_keys_to_entry(entry, keys))
+            return
+
+        # Get the content to be replaced, and the keys which it contains
+        with self.stats.measure('substitution'):
+            content = await self._run_io(self._get_target_content, file_entry.path)
+            template = self.template_cache.get(file_entry.path, content)
+            keys = template.key_set
+        self.key_usage.add(file_entry.path, keys, parsers)
+        self.stats.count('bytes_read', file_entry.size)
+
+        # If the file contains no keys to replace, copy it as is
+        if not any(key in parsers for key in keys):
+            await self._copy_file(file_entry.path, to_path)
+            self._count_copied_file(file_entry)
+        else:
+            await self._write_replaced_content(file_entry, to_path, template)
+
+        self._record_manifest_entry(manifest, to_path, self._set_keys_to_entry(entry, keys))
+
+    @staticmethod
+    def get_environment_dist_root(environment: str) -> str:
+        """Get the root path of the dist of the environment"""
+        return f'{FolderName.OUTPUT_ROOT.value}/docker-{environment}'
+
+    @staticmethod
+    def get_dist_root(environment: str, name: str) -> str:
+        """Get the root path of the dist of the (environment, project) unit"""
+        return f'{Project.get_environment_dist_root(environment)}/{name}'
+
+    def get_output_rel_path(self, to_path: str) -> str:
+        """Get the path of the output relative to the project's dist (ex. "docker-compose.yml")"""
+        return os.path.relpath(to_path, self._get_pj_dist_root()).replace(os.sep, '/')
 
     def _get_pj_dist_root(self):
         """Get the root path of the project's dist"""
-        root_path = f'{FolderName.OUTPUT_ROOT.value}/docker-{self.environment}/{self.name}'
+        root_path = self.get_dist_root(self.environment, self.name)
         if self.config.is_multi_project_mode:
             return f'{root_path}/{self.name}'
         return root_path
 
+    def _make_manifest_entry(self, manifest: Optional[BuildManifest], file_entry: FileEntry, mode: str) -> Optional[dict]:
+        """Create the manifest entry of the file. If the manifest is not given, return None"""
+        if manifest is None:
+            return None
+        copy_mode = self.config.copy_mode if mode == 'copy' else None
+        entry = manifest.make_entry(file_entry.path, mode, size=file_entry.size, mtime_ns=file_entry.mtime_ns, copy_mode=copy_mode,
+                                    is_dedupe_output=self.config.is_dedupe_output)
+        # Record what the output depends on besides the source, to find the outputs which a change affects (see DependencyGraph)
+        entry['variant'] = FileIndex.get_environment_and_logical_path(file_entry.rel_path, [self.environment])[0]
+        # The configuration files are recorded once per unit, not in every entry
+        entry['unit'] = self.get_dist_root(self.environment, self.name)
+        manifest.record_unit(entry['unit'], self.config.config_paths)
+        return entry
+
+    def _get_previous_keys(self, manifest: Optional[BuildManifest], to_path: str, entry: Optional[dict]) -> Optional[frozenset[str]]:
+        """Get the keys which the file contained in the previous build. If the file changed, return None"""
+        if manifest is None:
+            return None
+        return manifest.get_previous_keys(to_path, entry)
+
+    def _set_keys_to_entry(self, entry: Optional[dict], keys: frozenset[str]) -> Optional[dict]:
+        """Set the keys which the file contains, and the hash of their values to the entry"""
+        if entry is None:
+            return None
+        entry = {**entry, 'keys': sorted(keys), 'values_hash': self.config.get_values_hash(keys), 'key_files': self._get_key_files(keys)}
+        # The file which contains no keys to replace is copied as is
+        if not any(key in self.config.get_parsers() for key in keys):
+            entry['copy_mode'] = self.config.copy_mode
+        return entry
+
+    def _get_key_files(self, keys: frozenset[str]) -> dict[str, str]:
+        """Get the replacement files of the keys whose values are read from the files.
+        *In nested mode, of all keys, because a value can contain the other keys.
+        """
+        parsers = self.config.get_parsers()
+        if self.config.is_nested_replace:
+            keys = parsers.keys()
+        return {key: parsers[key].file_path for key in sorted(keys) if isinstance(parsers.get(key), FileParser)}
+
+    def _record_manifest_entry(self, manifest: Optional[BuildManifest], to_path: str, entry: Optional[dict]):
+        if manifest is not None:
+            manifest.record(to_path, entry)
+
+    def _is_up_to_date(self, manifest: Optional[BuildManifest], to_path: str, entry: Optional[dict]) -> bool:
+        """Check if the output does not need to be built again. If so, keep its entry in the manifest"""
+        if manifest is None or not manifest.is_up_to_date(to_path, entry):
+            return False
+        manifest.record(to_path, entry)
+        self.stats.count('skipped_files')
+        return True
+
     def _get_target_content(self, path: str):
         """Get the content of the specified file"""
-        with open(path, 'r') as path:
+        with open(path, 'r', encoding=FileWriter.ENCODING, errors=FileWriter.ERRORS) as path:
             content = path.read()
         return content
 
-    def _get_replaced_text(self, content: str) -> str:
+    def _get_replaced_text(self, template: CompiledTemplate) -> str:
         """Get the replaced text"""
-        for _, parser in self.config.get_parsers().items():
-            # Use the parser's parse method to replace the content
-            content = parser.parse(content)
-
-        return content
+        # Join the literal parts and the values, without scanning the content again
+        return self.config.get_renderer().render_compiled(template)
 
-    def _get_files(self) -> dict[str, str]:
+    def _get_files(self) -> dict[str, FileEntry]:
         """
         Get a list of all files in the specified directory. Consider the environment.
-        key: the real file path. 
-        value: removed environment file path
+        key: the file path relative to the root path, removed environment. 
+        value: the real file entry
         """
-        tmp_result = self._get_dir_file_paths()
-
-        # Re-loop result array. And if contains "." at least 2, check env in arg[-2].
-        # And if match arg[-2], set as key: arg[-2] value: arg[-1]
-        result = {}
-        for file_path in tmp_result:
-            dir_name = os.path.dirname(file_path)
-            file_name = os.path.basename(file_path)
-            file_keys = file_name.split('.')
-            # if file_keys length is less than 3(ex. "sample.txt"), append it to result
-            if len(file_keys) < 3:
-                result[file_path] = file_path
-                continue
-
-            # If file_keys length is 3 or more(ex. "sample.development.txt"), check if the last-1 element is the environment
-            if file_keys[-2] != self.environment:
-                continue
-            else:
-                result[file_path] = dir_name + '/' + '.'.join(f"{file_keys[:-3]}.{file_keys[-1]}")
-
-        return result
-
-    def _get_dir_file_paths(self) -> list[str]:
-        """Get a list of all files in the specified directory"""
-        result = []
-        for root, _, files in os.walk(self.root_path):
-            for file in files:
-                result.append(os.path.join(root, file))
-        return result
+        return self.file_index.get_files(self.environment)
 
     def _is_ignore_file(self, file_name: str) -> bool:
         """Check if it's an ignored file"""
-        # Loop through self.setting.ignore_files and return True if ignore_file matches the file name using wildcard pattern
-        for ignore_file in self.config.ignore_files:
-            if fnmatch.fnmatch(file_name, ignore_file):
-                return True
-        return False
+        # Match with all patterns of self.config.ignore_files at once (the same as fnmatch for each pattern)
+        return self.config.get_ignore_matcher().is_match(file_name)
 
-    def _is_replace_file_content(self, file_rel_path: str) -> bool:
+    def _is_replace_file_content(self, file_rel_path: str, file_entry: Optional[FileEntry] = None) -> bool:
         """Check if it's a file to replace its content"""
-        # Return True if is_only_replace_temp setting is true
+        # Replace all text files if is_only_replace_temp setting is false. The binary files (ex. images) are copied as is
         if not self.config.is_only_replace_temp:
-            return True
+            return file_entry is None or not self._is_binary_file(file_rel_path, file_entry)
         # Check if the specified file ends with ".temp"
         return file_rel_path.endswith('.temp')
 
-    def _copy_file(self, from_path: str, to_path: str):
-        """Copy the file"""
-        os.makedirs(os.path.dirname(to_path), exist_ok=True)
-        shutil.copy(from_path, to_path)
+    def _is_binary_file(self, file_rel_path: str, file_entry: FileEntry) -> bool:
+        """Check if it's a binary file, by the extension lists or by sniffing the head of the file"""
+        # ".temp" file is always the template
+        if file_rel_path.endswith('.temp'):
+            return False
+        extension = os.path.splitext(file_rel_path)[1].lower()
+        if extension:
+            if extension in self._get_extensions(self.config.text_extensions):
+                return False
+            if extension in self._get_extensions(self.config.binary_extensions):
+                return True
+        return self.file_classifier.is_binary(file_entry)
+
+    def _get_extensions(self, extensions: list[str]) -> set[str]:
+        """Normalize the extensions of the settings (ex. "PNG" -> ".png")"""
+        return {extension.lower() if extension.startswith('.') else f'.{extension.lower()}' for extension in extensions}
+
+    async def _copy_file(self, from_path: str, to_path: str):
+        """Output the file as it is"""
+        with self.stats.measure('copy'):
+            await self._run_io(self._get_output_backend().copy_file, from_path, to_path)
+
+    def _count_copied_file(self, file_entry: FileEntry):
+        # The bytes are counted by the output backend, the same as the replaced files
+        self.stats.count('copied_files')
+
+    async def _write_replaced_content(self, file_entry: FileEntry, to_path: str, template: CompiledTemplate):
+        """Write the replaced file content.
+        In dedupe mode, render it only if no environment rendered the same template with the same values.
+        """
+        output_backend = self._get_output_backend()
+        render_key = None
+        if self.config.is_dedupe_output:
+            render_key = ObjectStore.make_render_key('replace', file_entry.path, file_entry.size, file_entry.mtime_ns,
+                                                     self.config.get_values_hash(template.key_set))
+            if await self._run_io(output_backend.link_rendered, render_key, to_path):
+                self.stats.count('deduped_files')
+                return
+
+        with self.stats.measure('substitution'):
+            content = self._get_replaced_text(template)
+        with self.stats.measure('write'):
+            await self._run_io(output_backend.write_content, to_path, content, render_key)
+        self.stats.count('replaced_files')
+
+    def _write_replaced_stream(self, from_path: str, to_path: str) -> frozenset[str]:
+        """Replace the file by chunks and write the result as it goes. Returns the keys which the file contains"""
+        renderer = self.config.get_renderer()
+        with open(from_path, 'r', encoding=FileWriter.ENCODING, errors=FileWriter.ERRORS) as reader:
+            return self._get_output_backend().write_stream(
+                to_path, lambda write: renderer.render_stream(reader, write, self.STREAM_CHUNK_SIZE))
 
-    def _write_replaced_content(self, to_path: str, content: str):
-        """Write the replaced file content"""
-        os.makedirs(os.path.dirname(to_path), exist_ok=True)
-        with open(to_path, 'w') as output_file:
-            output_file.write(content)
+    def _get_output_backend(self) -> OutputBackend:
+        """Get the output backend. If not given, output the files in "dist" using the settings"""
+        if self.output_backend is None:
+            file_writer = FileWriter(self.config.is_skip_unchanged_write, self.config.is_fsync_write)
+            object_store = ObjectStore(file_writer=file_writer) if self.config.is_dedupe_output else None
+            self.output_backend = DirectoryBackend(self.config.copy_mode, file_writer, object_store)
+        return self.output_backend
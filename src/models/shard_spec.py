@@ -0,0 +1,82 @@
+from __future__ import annotations
+import json
+import os
+import re
+from typing import Optional
+from models.const import FolderName
+
+
+class ShardSpec:
+    """Part of the (environment, project) units to build on this runner, given as "--shard i/N" (1 <= i <= N).
+
+    Every runner splits the same units in the same way, so no coordination is needed.
+    * by count (default): the sorted units are assigned in turn
+    * by size (is_balance_size): the largest unit first, to the shard with the least total bytes of the templates
+
+    Each shard writes the outputs of its units, and its manifests to "dist/.shards".
+    """
+    DIR_NAME = '.shards'
+    PATTERN = re.compile(r'^(\d+)/(\d+)$')
+    FILE_NAME_PATTERN = re.compile(r'^(\d+)-of-(\d+)\.json$')
+
+    index: int
+    count: int
+    is_balance_size: bool
+
+    def __init__(self, index: int, count: int, is_balance_size: bool = False):
+        if count < 1 or not 1 <= index <= count:
+            raise Exception(f'Shard "{index}/{count}" is out of range. Use "i/N" (1 <= i <= N)')
+        self.index = index
+        self.count = count
+        self.is_balance_size = is_balance_size
+
+    @classmethod
+    def parse(cls, text: str, is_balance_size: bool = False) -> ShardSpec:
+        """Create from the text such as "2/4" """
+        match = cls.PATTERN.match(text.strip())
+        if match is None:
+            raise Exception(f'Shard "{text}" is invalid. Use "i/N" (1 <= i <= N)')
+        return cls(int(match.group(1)), int(match.group(2)), is_balance_size)
+
+    @classmethod
+    def get_dir_path(cls) -> str:
+        return f'{FolderName.OUTPUT_ROOT.value}/{cls.DIR_NAME}'
+
+    def get_file_path(self) -> str:
+        """Path of the file which records the units of this shard"""
+        return f'{self.get_dir_path()}/{self.index}-of-{self.count}.json'
+
+    def get_manifest_path(self) -> str:
+        """Path of the build manifest of this shard"""
+        return f'{self.get_dir_path()}/{self.index}-of-{self.count}.build-manifest.json'
+
+    def assign(self, units: list[tuple[str, str]], sizes: Optional[dict[tuple[str, str], int]] = None) -> dict[tuple[str, str], int]:
+        """Get the shard index (1 to N) of each unit. The result depends only on the units (and the sizes), not on their order"""
+        if not self.is_balance_size or sizes is None:
+            return {unit: position % self.count + 1 for position, unit in enumerate(sorted(units))}
+
+        # Longest processing time first
+        totals = [0] * self.count
+        result = {}
+        for unit in sorted(units, key=lambda unit: (-sizes.get(unit, 0), unit)):
+            shard_position = min(range(self.count), key=lambda position: (totals[position], position))
+            totals[shard_position] += sizes.get(unit, 0)
+            result[unit] = shard_position + 1
+        return result
+
+    def select(self, units: list[tuple[str, str]], sizes: Optional[dict[tuple[str, str], int]] = None) -> list[tuple[str, str]]:
+        """Get the units of this shard, keeping the order"""
+        assigned = self.assign(units, sizes)
+        return [unit for unit in units if assigned[unit] == self.index]
+
+    def save(self, all_units: list[tuple[str, str]], units: list[tuple[str, str]], failed_units: Optional[list[tuple[str, str]]] = None):
+        """Record the units which were split, the units of this shard, and the units which failed to build, to check them on merging"""
+        os.makedirs(self.get_dir_path(), exist_ok=True)
+        with open(self.get_file_path(), 'w', encoding='utf-8') as f:
+            json.dump({
+                'index': self.index,
+                'count': self.count,
+                'all_units': [list(unit) for unit in all_units],
+                'units': [list(unit) for unit in units],
+                'failed_units': [list(unit) for unit in failed_units or []],
+            }, f, indent=1)
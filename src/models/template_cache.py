@@ -0,0 +1,139 @@
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional
+from models.compiled_template import CompiledTemplate
+
+
+class TemplateCache:
+    """Cache of the compiled templates, keyed by the template path and the hash of its content.
+    The same template is built for every environment, so it is tokenized only once.
+
+    If cache_dir is given, each compiled template is also saved there as a file,
+    so that the next runs (and the other worker processes) do not tokenize it again.
+    The memory and the files are limited to max_size (characters / bytes) each, removing the least recently used.
+    """
+    DIR_NAME = 'templates'
+    # Characters hashed at a time, not to copy the whole content to make the key
+    HASH_CHUNK_SIZE = 1024 * 1024
+    MAX_SIZE = 256 * 1024 * 1024
+    _shared: Optional[TemplateCache] = None
+
+    cache_dir: Optional[str]
+    max_size: int
+    _templates: OrderedDict[str, CompiledTemplate]
+    _size: int
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size: int = MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls) -> TemplateCache:
+        """Get the cache shared by the process (only in memory)"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def get(self, path: str, content: str) -> CompiledTemplate:
+        """Get the compiled template of the content. If not cached, compile it"""
+        key = self._make_key(path, content)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+
+        template = self._load(key)
+        if template is None:
+            template = CompiledTemplate.compile(content)
+            self._save(key, template)
+
+        with self._lock:
+            if key not in self._templates:
+                self._templates[key] = template
+                self._size += template.size
+            # Remove the least recently used, but keep the last one
+            while self._size > self.max_size and len(self._templates) > 1:
+                _, removed = self._templates.popitem(last=False)
+                self._size -= removed.size
+        return template
+
+    def prune(self):
+        """Remove the least recently used files, while the files in the cache folder exceed max_size"""
+        dir_path = self._get_dir_path()
+        if dir_path is None or not os.path.isdir(dir_path):
+            return
+
+        files = []
+        for sub_dir_entry in os.scandir(dir_path):
+            if not sub_dir_entry.is_dir():
+                continue
+            for dir_entry in os.scandir(sub_dir_entry.path):
+                stat = dir_entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, dir_entry.path))
+
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._size = 0
+
+    def _make_key(self, path: str, content: str) -> str:
+        key_hash = hashlib.sha1(f'{path}\0'.encode('utf-8', 'surrogatepass'))
+        for i in range(0, len(content), self.HASH_CHUNK_SIZE):
+            key_hash.update(content[i:i + self.HASH_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+        return key_hash.hexdigest()
+
+    def _load(self, key: str) -> Optional[CompiledTemplate]:
+        """Read the compiled template from the cache folder. If it does not exist or is broken, return None"""
+        path = self._get_file_path(key)
+        if path is None or not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                template = pickle.load(f)
+            # Mark as recently used, for prune()
+            os.utime(path)
+        except Exception:
+            return None
+        return template
+
+    def _save(self, key: str, template: CompiledTemplate):
+        path = self._get_file_path(key)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(template, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _get_dir_path(self) -> Optional[str]:
+        return f'{self.cache_dir}/{self.DIR_NAME}' if self.cache_dir is not None else None
+
+    def _get_file_path(self, key: str) -> Optional[str]:
+        dir_path = self._get_dir_path()
+        return f'{dir_path}/{key[:2]}/{key}.pickle' if dir_path is not None else None
+
+    def __getstate__(self):
+        # Send only the settings to the worker processes, not the compiled templates
+        return {'cache_dir': self.cache_dir, 'max_size': self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'], state['max_size'])
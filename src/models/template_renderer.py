@@ -0,0 +1,120 @@
+from __future__ import annotations
+import re
+from typing import Callable, Optional, TextIO
+
+
+class TemplateRenderer:
+    """Replace "{{KEY}}" tokens in a template with a single scan.
+
+    The key -> parser table is built once per Config, and each template is scanned once for "{{...}}" tokens.
+    Every token is looked up in the table, instead of running content.replace() for every parser.
+    The result is the same as applying every parser one by one, as long as the values contain no "{{" or "}}".
+
+    Nested values (settings.is_nested_replace):
+    * false (default): values are inserted as they are. A "{{KEY}}" inside a value is left untouched.
+    * true: "{{KEY}}" inside a value is replaced recursively before inserting, regardless of the parser order.
+      A key referring to itself (directly or indirectly) raises an Exception.
+    """
+    TOKEN_PATTERN = re.compile(r'\{\{([^{}]*)\}\}')
+    # A longer text is not handled as a token across the chunks (render_stream)
+    MAX_TOKEN_SIZE = 64 * 1024
+
+    parsers: dict
+    is_nested_replace: bool
+    replacement_counts: dict[str, int]
+
+    def __init__(self, parsers: dict, is_nested_replace: bool = False):
+        self.parsers = parsers
+        self.is_nested_replace = is_nested_replace
+        self._values = {}
+        self._expanding = set()
+        # key: key name, value: number of the replaced tokens
+        self.replacement_counts = {}
+
+    def render(self, content: str) -> str:
+        """Replace all known "{{KEY}}" tokens in the content"""
+        return self.TOKEN_PATTERN.sub(self._replace_match, content)
+
+    def render_compiled(self, template: CompiledTemplate) -> str:
+        """Join the literal parts of the compiled template and the values, without scanning. The result is the same as render()"""
+        parts = [template.segments[0]]
+        for key, segment in zip(template.keys, template.segments[1:]):
+            value = self.get_value(key)
+            # Keep the token if the key is not defined
+            if value is None:
+                parts.append('{{' + key + '}}')
+            else:
+                self.replacement_counts[key] = self.replacement_counts.get(key, 0) + 1
+                parts.append(value)
+            parts.append(segment)
+        return ''.join(parts)
+
+    def render_stream(self, reader: TextIO, write: Callable[[str], None], chunk_size: int) -> frozenset[str]:
+        """Replace the tokens reading the content by chunks, and write the result as it goes.
+        A token across the chunks is kept until the next chunk, so the result is the same as render().
+        Returns the key names which the content contains.
+        """
+        keys = set()
+        pending = ''
+        while True:
+            chunk = reader.read(chunk_size)
+            text = pending + chunk
+            # Keep the last part which can be the start of a token, until the next chunk
+            end = self._get_safe_end(text) if chunk else len(text)
+            text, pending = text[:end], text[end:]
+
+            keys.update(self.TOKEN_PATTERN.findall(text))
+            write(self.render(text))
+            if not chunk:
+                return frozenset(keys)
+
+    def get_value(self, key: str) -> Optional[str]:
+        """Get the value for the key. If the key is not defined, return None"""
+        # Return as it is if already obtained
+        if key in self._values:
+            return self._values[key]
+
+        parser = self.parsers.get(key)
+        if parser is None:
+            return None
+
+        value = parser.get_value()
+        if self.is_nested_replace:
+            value = self._expand_value(key, value)
+
+        self._values[key] = value
+        return value
+
+    def _expand_value(self, key: str, value: str) -> str:
+        """Replace the tokens inside the value (for nested mode)"""
+        if key in self._expanding:
+            raise Exception(f'Circular reference is found in replacement key "{key}"')
+
+        self._expanding.add(key)
+        try:
+            return self.render(value)
+        finally:
+            self._expanding.discard(key)
+
+    def _get_safe_end(self, text: str) -> int:
+        """Get the position where no token is across.
+        A token cannot contain "{" or "}" inside, so only the part from the last "{" (or "{{") can be a part of a token.
+        """
+        start = text.rfind('{')
+        if start < 0:
+            return len(text)
+        if start > 0 and text[start - 1] == '{':
+            start -= 1
+        # The token is already closed, or too long to be a token
+        if '}}' in text[start:] or len(text) - start > self.MAX_TOKEN_SIZE:
+            return len(text)
+        return start
+
+    def _replace_match(self, match: re.Match) -> str:
+        key = match.group(1)
+        value = self.get_value(key)
+        # Keep the token if the key is not defined
+        if value is None:
+            return match.group(0)
+        self.replacement_counts[key] = self.replacement_counts.get(key, 0) + 1
+        return value
@@ -20,6 +20,9 @@ class ConfigMock(Config):
     def set_is_multi_project_mode(self, is_multi_project_mode: Optional[bool]) -> None:
         self._is_multi_project_mode = is_multi_project_mode
 
+    def set_is_nested_replace(self, is_nested_replace: Optional[bool]) -> None:
+        self._is_nested_replace = is_nested_replace
+
     def set_replacement_files(self, replacement_files: Optional[dict[str, str]]) -> None:
         self._replacement_files = replacement_files
 
@@ -52,6 +55,9 @@ class GlobalConfigMock(GlobalConfig):
     def set_is_multi_project_mode(self, is_multi_project_mode: Optional[bool]) -> None:
         self._is_multi_project_mode = is_multi_project_mode
 
+    def set_is_nested_replace(self, is_nested_replace: Optional[bool]) -> None:
+        self._is_nested_replace = is_nested_replace
+
     def set_replacement_files(self, replacement_files: Optional[dict[str, str]]) -> None:
         self._replacement_files = replacement_files
 
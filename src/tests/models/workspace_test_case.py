@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+
+class WorkspaceTestCase(unittest.TestCase):
+    """TestCase which builds in a temporary workspace, not to write "dist" or the cache in the repository.
+    The current directory is changed to the workspace during each test, unless is_change_dir is False.
+    """
+    is_change_dir: bool = True
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.workspace_path = self.temp_dir.name
+        self.cwd = os.getcwd()
+        if self.is_change_dir:
+            os.chdir(self.workspace_path)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def _write(self, path: str, content: str):
+        """Write the file (relative to the workspace), creating its folders"""
+        path = f'{self.workspace_path}/{path}'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
@@ -0,0 +1,66 @@
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from models.output.archive_backend import ArchiveBackend
+
+
+class TestArchiveBackend(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_path = f'{self.temp_dir.name}/dist/docker-develop'
+        self.from_path = f'{self.temp_dir.name}/from.sh'
+        with open(self.from_path, 'w') as f:
+            f.write('echo foo\n')
+        os.chmod(self.from_path, 0o755)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, archive_format: str) -> str:
+        def write_large(write):
+            write('large')
+            return frozenset({'KEY'})
+
+        backend = ArchiveBackend.make(archive_format, self.root_path, self.root_path)
+        backend.copy_file(self.from_path, f'{self.root_path}/app/run.sh')
+        backend.write_content(f'{self.root_path}/app/config.txt', 'foo=bar')
+        keys = backend.write_stream(f'{self.root_path}/app/large.txt', write_large)
+        backend.close()
+
+        self.assertEqual(keys, frozenset({'KEY'}))
+        self.assertEqual(backend.bytes_written, os.path.getsize(backend.archive_path))
+        return backend.archive_path
+
+    def test_tar_gz(self):
+        archive_path = self._write('tar.gz')
+
+        self.assertEqual(archive_path, f'{self.root_path}.tar.gz')
+        with tarfile.open(archive_path) as tar:
+            self.assertEqual(tar.getnames(), ['app/run.sh', 'app/config.txt', 'app/large.txt'])
+            self.assertEqual(tar.extractfile('app/run.sh').read(), b'echo foo\n')
+            self.assertEqual(tar.getmember('app/run.sh').mode & 0o777, 0o755)
+            self.assertEqual(tar.extractfile('app/config.txt').read(), b'foo=bar')
+            self.assertEqual(tar.extractfile('app/large.txt').read(), b'large')
+
+    def test_zip(self):
+        archive_path = self._write('zip')
+
+        with zipfile.ZipFile(archive_path) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['app/run.sh', 'app/config.txt', 'app/large.txt'])
+            self.assertEqual(zip_file.read('app/run.sh'), b'echo foo\n')
+            self.assertEqual(zip_file.read('app/config.txt'), b'foo=bar')
+            self.assertEqual(zip_file.read('app/large.txt'), b'large')
+
+    def test_abort(self):
+        backend = ArchiveBackend.make('tar.gz', self.root_path, self.root_path)
+        backend.copy_file(self.from_path, f'{self.root_path}/app/run.sh')
+        backend.abort()
+
+        self.assertFalse(os.path.exists(backend.archive_path))
+        self.assertEqual(os.listdir(os.path.dirname(self.root_path)), [])
+
+    def test_make_unknown_format(self):
+        with self.assertRaises(Exception):
+            ArchiveBackend.make('rar', self.root_path, self.root_path)
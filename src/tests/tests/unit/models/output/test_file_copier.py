@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from models.output.file_copier import FileCopier
+
+
+class TestFileCopier(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.from_path = f'{self.temp_dir.name}/from.sh'
+        self.to_path = f'{self.temp_dir.name}/to.sh'
+        with open(self.from_path, 'w') as f:
+            f.write('echo foo\n')
+        os.chmod(self.from_path, 0o755)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read_output(self) -> str:
+        with open(self.to_path) as f:
+            return f.read()
+
+    def test_copy(self):
+        for mode in ['copy', 'reflink']:
+            FileCopier(mode).copy(self.from_path, self.to_path)
+            self.assertEqual(self._read_output(), 'echo foo\n')
+            self.assertEqual(os.stat(self.to_path).st_mode & 0o777, 0o755)
+            self.assertFalse(os.path.samefile(self.from_path, self.to_path))
+
+    def test_hardlink(self):
+        FileCopier('hardlink').copy(self.from_path, self.to_path)
+        self.assertTrue(os.path.samefile(self.from_path, self.to_path))
+
+    def test_symlink(self):
+        FileCopier('symlink').copy(self.from_path, self.to_path)
+        self.assertEqual(os.readlink(self.to_path), os.path.abspath(self.from_path))
+
+    def test_replace_link_by_copy(self):
+        FileCopier('hardlink').copy(self.from_path, self.to_path)
+        FileCopier('copy').copy(self.from_path, self.to_path)
+        self.assertFalse(os.path.samefile(self.from_path, self.to_path))
+
+    def test_not_supported_mode(self):
+        with self.assertRaises(Exception):
+            FileCopier('move')
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from models.output.file_writer import FileWriter
+
+
+class TestFileWriter(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.to_path = f'{self.temp_dir.name}/to.txt'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read_output(self) -> str:
+        with open(self.to_path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_write(self):
+        self.assertTrue(FileWriter().write(self.to_path, 'foo\n'))
+        self.assertEqual(self._read_output(), 'foo\n')
+        self.assertEqual(os.listdir(self.temp_dir.name), ['to.txt'])
+
+    def test_write_skip_unchanged(self):
+        writer = FileWriter(is_fsync=True)
+        writer.write(self.to_path, 'foo\n')
+        self.assertFalse(writer.write(self.to_path, 'foo\n'))
+        self.assertTrue(writer.write(self.to_path, 'bar\n'))
+        self.assertEqual(self._read_output(), 'bar\n')
+
+    def test_write_not_skip(self):
+        writer = FileWriter(is_skip_unchanged=False)
+        writer.write(self.to_path, 'foo\n')
+        self.assertTrue(writer.write(self.to_path, 'foo\n'))
+
+    def test_write_replace_link(self):
+        from_path = f'{self.temp_dir.name}/from.txt'
+        with open(from_path, 'w') as f:
+            f.write('foo\n')
+        os.link(from_path, self.to_path)
+
+        self.assertTrue(FileWriter().write(self.to_path, 'foo\n'))
+        self.assertFalse(os.path.samefile(from_path, self.to_path))
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from models.output.object_store import ObjectStore
+
+
+class TestObjectStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.object_store = ObjectStore(f'{self.temp_dir.name}/.objects')
+        self.from_path = f'{self.temp_dir.name}/from.sh'
+        with open(self.from_path, 'w') as f:
+            f.write('echo foo\n')
+        os.chmod(self.from_path, 0o755)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_content_shared(self):
+        develop_path, production_path = f'{self.temp_dir.name}/develop.txt', f'{self.temp_dir.name}/production.txt'
+        render_key = ObjectStore.make_render_key('replace', 'foo.txt', 'values')
+
+        self.assertFalse(self.object_store.link_rendered(render_key, develop_path))
+        self.object_store.put_content(render_key, b'foo', develop_path)
+        self.assertTrue(self.object_store.link_rendered(render_key, production_path))
+
+        with open(production_path, 'rb') as f:
+            self.assertEqual(f.read(), b'foo')
+        self.assertTrue(os.path.samefile(develop_path, production_path))
+
+    def test_put_stream_shared(self):
+        develop_path, production_path = f'{self.temp_dir.name}/develop.txt', f'{self.temp_dir.name}/production.txt'
+
+        def write(write_part):
+            write_part('large ')
+            write_part('content')
+            return frozenset({'KEY'})
+
+        self.assertEqual(self.object_store.put_stream(develop_path, write), frozenset({'KEY'}))
+        self.object_store.put_stream(production_path, write)
+
+        with open(production_path, 'rb') as f:
+            self.assertEqual(f.read(), b'large content')
+        self.assertTrue(os.path.samefile(develop_path, production_path))
+        self.assertEqual(self.object_store.file_writer.bytes_written, len(b'large content') * 2)
+
+    def test_copy_keep_permission(self):
+        to_path = f'{self.temp_dir.name}/to.sh'
+        self.object_store.copy(self.from_path, to_path, ObjectStore.make_render_key('copy', self.from_path))
+
+        with open(to_path) as f:
+            self.assertEqual(f.read(), 'echo foo\n')
+        self.assertEqual(os.stat(to_path).st_mode & 0o777, 0o755)
+
+    def test_collect_garbage(self):
+        used_path, unused_path = f'{self.temp_dir.name}/used.txt', f'{self.temp_dir.name}/unused.txt'
+        used_key, unused_key = ObjectStore.make_render_key('replace', 'used'), ObjectStore.make_render_key('replace', 'unused')
+        self.object_store.put_content(used_key, b'used', used_path)
+        self.object_store.put_content(unused_key, b'unused', unused_path)
+        os.remove(unused_path)
+
+        self.object_store.collect_garbage()
+
+        self.assertTrue(self.object_store.link_rendered(used_key, f'{self.temp_dir.name}/used2.txt'))
+        self.assertFalse(self.object_store.link_rendered(unused_key, unused_path))
+        object_count = sum(len(file_names) for _, _, file_names in os.walk(f'{self.temp_dir.name}/.objects/objects'))
+        self.assertEqual(object_count, 1)
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from models.parser.file_content_cache import FileContentCache
+from models.parser.file_parser import FileParser
+from models.template_renderer import TemplateRenderer
+from tests.models.config_mock import ConfigMock
+
+
+class TestFileContentCache(unittest.TestCase):
+    def setUp(self):
+        self.base_path = "src/tests/test_files/project_config/replacement_files"
+
+    def test_get(self):
+        cache = FileContentCache()
+        self.assertEqual(cache.get(f"{self.base_path}/foo.txt").strip(), "bar")
+        self.assertEqual(cache.size, len("bar\n"))
+
+    def test_get_utf8(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'NAME.txt')
+            with open(path, 'wb') as f:
+                f.write('日本語'.encode('utf-8'))
+            # Read in UTF-8 as the templates, not in the locale's encoding (ex. cp1252 on Windows)
+            with mock.patch('models.parser.file_content_cache.open', side_effect=open, create=True) as mock_open:
+                self.assertEqual(FileContentCache().get(path), '日本語')
+            self.assertEqual(mock_open.call_args.kwargs.get('encoding'), 'utf-8')
+
+    def test_get_evict_least_recently_used(self):
+        cache = FileContentCache(max_size=len("bar\n") + len("This\nis\nmy\nname.\n") - 1)
+        cache.get(f"{self.base_path}/foo.txt")
+        cache.get(f"{self.base_path}/break.txt")
+        self.assertEqual(cache.size, len("This\nis\nmy\nname.\n"))
+
+    def test_parser_not_read_unused_key(self):
+        config = ConfigMock(None, "development")
+        parsers = {
+            'foo': FileParser(config, 'foo', f"{self.base_path}/foo.txt"),
+            'break': FileParser(config, 'break', f"{self.base_path}/break.txt"),
+        }
+        TemplateRenderer(parsers).render("This is {{foo}}")
+        self.assertEqual(parsers['foo'].value, "bar\n")
+        self.assertIsNone(parsers['break'].value)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from models.build_manifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_path = self.temp_dir.name
+        self.source_path = f'{self.base_path}/source.txt'
+        self.to_path = f'{self.base_path}/dist/docker-develop/pj/source.txt'
+        self.manifest_path = f'{self.base_path}/dist/{BuildManifest.FILE_NAME}'
+
+        with open(self.source_path, 'w') as f:
+            f.write('foo')
+        os.makedirs(os.path.dirname(self.to_path))
+        with open(self.to_path, 'w') as f:
+            f.write('foo')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _save_previous(self) -> dict:
+        manifest = BuildManifest(self.manifest_path)
+        entry = manifest.make_entry(self.source_path, 'replace', 'hash')
+        manifest.record(self.to_path, entry)
+        manifest.save()
+        return entry
+
+    def test_is_up_to_date(self):
+        entry = self._save_previous()
+        manifest = BuildManifest.load(self.manifest_path)
+
+        self.assertTrue(manifest.is_up_to_date(self.to_path, entry))
+        self.assertFalse(manifest.is_up_to_date(self.to_path, {**entry, 'values_hash': 'changed'}))
+
+    def test_remove_stale_outputs(self):
+        self._save_previous()
+        manifest = BuildManifest.load(self.manifest_path)
+
+        self.assertEqual(manifest.remove_stale_outputs(), [self.to_path])
+        self.assertFalse(os.path.exists(self.to_path))
+        self.assertFalse(os.path.exists(f'{self.base_path}/dist/docker-develop'))
+
+    def test_keep_previous(self):
+        entry = self._save_previous()
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.keep_previous(f'{self.base_path}/dist/docker-develop/pj/')
+
+        self.assertEqual(manifest.entries, {self.to_path: entry})
+        self.assertEqual(manifest.get_stale_paths(), [])
+
+    def test_not_reuse(self):
+        entry = self._save_previous()
+        manifest = BuildManifest.load(self.manifest_path, is_reuse=False)
+
+        self.assertFalse(manifest.is_up_to_date(self.to_path, entry))
+        manifest.keep_previous_path(self.to_path)
+        self.assertEqual(manifest.entries, {self.to_path: entry})
+
+    def test_copy_mode(self):
+        manifest = BuildManifest(self.manifest_path)
+        entry = manifest.make_entry(self.source_path, 'copy', copy_mode='copy')
+        manifest.record(self.to_path, entry)
+        manifest.save()
+        manifest = BuildManifest.load(self.manifest_path)
+
+        self.assertTrue(manifest.is_up_to_date(self.to_path, manifest.make_entry(self.source_path, 'copy', copy_mode='copy')))
+        # The output copied in the other mode (ex. a hard link after changing settings.copy_mode) is built again
+        self.assertFalse(manifest.is_up_to_date(self.to_path, manifest.make_entry(self.source_path, 'copy', copy_mode='hardlink')))
+
+    def test_is_dedupe_output(self):
+        entry = self._save_previous()
+        manifest = BuildManifest.load(self.manifest_path)
+
+        # The output is built again after settings.is_dedupe_output changed
+        self.assertFalse(manifest.is_up_to_date(self.to_path, manifest.make_entry(self.source_path, 'replace', 'hash',
+                                                                                  is_dedupe_output=True)))
+        self.assertTrue(manifest.is_up_to_date(self.to_path, entry))
+
+    def test_units(self):
+        unit = f'{self.base_path}/dist/docker-develop/pj'
+        manifest = BuildManifest(self.manifest_path)
+        entry = {**manifest.make_entry(self.source_path, 'replace', 'hash'), 'unit': unit}
+        manifest.record(self.to_path, entry)
+        manifest.record_unit(unit, ['config.yml', 'templates/pj/config.yml'])
+        manifest.record_unit(f'{self.base_path}/dist/docker-develop/removed', ['config.yml'])
+        manifest.save()
+
+        # The configuration files are saved once for the unit, and only for the units which the entries refer to
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.previous_units, {unit: {'configs': ['config.yml', 'templates/pj/config.yml']}})
+        manifest.keep_previous(f'{unit}/')
+        self.assertEqual(manifest.entries, {self.to_path: entry})
+        self.assertEqual(manifest.units, manifest.previous_units)
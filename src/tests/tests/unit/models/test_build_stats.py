@@ -0,0 +1,24 @@
+import unittest
+from models.build_stats import BuildStats
+
+
+class TestBuildStats(unittest.TestCase):
+    def test_measure(self):
+        stats = BuildStats()
+        with stats.measure('copy'):
+            pass
+        self.assertGreater(stats.seconds['copy'], 0.0)
+        self.assertEqual(stats.seconds['write'], 0.0)
+
+    def test_merge(self):
+        stats = BuildStats()
+        stats.count('replaced_files')
+        stats.add_replacements({'foo': 2})
+
+        other = BuildStats()
+        other.count('replaced_files', 2)
+        other.add_replacements({'foo': 1, 'bar': 3})
+        stats.merge(other)
+
+        self.assertEqual(stats.counts['replaced_files'], 3)
+        self.assertEqual(stats.to_dict()['replacements'], {'bar': 3, 'foo': 3})
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from models.parser.param_parser import ParamParser
 from tests.models.config_mock import ConfigMock, GlobalConfigMock
@@ -161,3 +163,50 @@ class TestConfig(unittest.TestCase):
         parser: ParamParser = parsers.get("baz")
         self.assertTrue(parser is not None)
         self.assertEqual(parser.parse("This is {{baz}}"), "This is qux")
+
+    def test_param_parsers_shared(self):
+        global_config = GlobalConfigMock()
+        global_config.set_replacements({'foo': 'global', 'bar': 'global'})
+        with tempfile.TemporaryDirectory() as root_path:
+            with open(os.path.join(root_path, 'config.yml'), 'w') as f:
+                f.write('replacements:\n  foo: local\n')
+            develop_config = ConfigMock(root_path, 'develop')
+            develop_config.init_config(global_config)
+            production_config = ConfigMock(root_path, 'production')
+            production_config.init_config(global_config)
+
+        # The values of the project are overlaid on the global values
+        self.assertEqual(dict(develop_config.replacement_params), {'foo': 'local', 'bar': 'global'})
+        self.assertEqual(global_config.replacement_params, {'foo': 'global', 'bar': 'global'})
+        self.assertEqual(develop_config.get_parsers()['foo'].get_value(), 'local')
+        # The parsers of the global values are made once, and shared by the configs
+        self.assertIs(develop_config.get_parsers()['bar'], production_config.get_parsers()['bar'])
+
+    def test_init_config_from_base(self):
+        global_config = GlobalConfigMock()
+        global_config.set_replacements({'foo': 'global'})
+        global_config.set_ignore_files(['*.bak'])
+        with tempfile.TemporaryDirectory() as root_path:
+            with open(os.path.join(root_path, 'config.yml'), 'w') as f:
+                f.write('replacements:\n  foo: local\nsettings:\n  ignore_files: ["*.tmp"]\n')
+            with open(os.path.join(root_path, 'config.production.yml'), 'w') as f:
+                f.write('settings:\n  is_only_replace_temp: true\n')
+            base_config = ConfigMock(root_path, None)
+            base_config.init_config(global_config)
+            develop_config = ConfigMock(root_path, 'develop')
+            develop_config.init_config(global_config, base_config)
+            production_config = ConfigMock(root_path, 'production')
+            production_config.init_config(global_config, base_config)
+            expected_config = ConfigMock(root_path, 'production')
+            expected_config.init_config(global_config)
+
+        # Only the environment-specific file is applied over the base, the same as merging the files
+        for config in [production_config, expected_config]:
+            self.assertEqual(config.replacement_params['foo'], 'local')
+            self.assertTrue(config.is_only_replace_temp)
+            # The settings of the file replace the settings of the base
+            self.assertEqual(config.ignore_files, ['*.bak'])
+        self.assertEqual(production_config.config_paths, expected_config.config_paths)
+        self.assertEqual(develop_config.ignore_files, ['*.bak', '*.tmp'])
+        # The environment without its own replacements shares the parsers of the base
+        self.assertIs(develop_config.get_parsers()['foo'], base_config.get_parsers()['foo'])
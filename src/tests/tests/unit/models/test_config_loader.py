@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+from models.config_loader import ConfigLoader
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self):
+        self.path = "src/tests/test_files/project_config/config.yml"
+        self.read_paths = []
+
+    def _read(self, path: str) -> dict:
+        self.read_paths.append(path)
+        return {'path': path}
+
+    def test_load_once(self):
+        loader = ConfigLoader()
+        self.assertEqual(loader.load(self.path, self._read), {'path': self.path})
+        self.assertEqual(loader.load(self.path, self._read), {'path': self.path})
+        self.assertEqual(self.read_paths, [self.path])
+
+    def test_load_not_exists(self):
+        loader = ConfigLoader()
+        loader.load('not_exists.yml', self._read)
+        loader.load('not_exists.yml', self._read)
+        self.assertEqual(self.read_paths, ['not_exists.yml', 'not_exists.yml'])
+
+    def test_load_from_cache_dir(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            loader = ConfigLoader(cache_dir)
+            loader.load(self.path, self._read)
+            loader.save()
+
+            loader = ConfigLoader(cache_dir)
+            self.assertEqual(loader.load(self.path, self._read), {'path': self.path})
+            self.assertEqual(self.read_paths, [self.path])
+
+    def test_list_dir(self):
+        loader = ConfigLoader()
+        self.assertEqual(loader.list_dir("src/tests/test_files/project_config/replacement_files"), ['break.txt', 'foo.txt'])
+        self.assertEqual(loader.list_dir("not_exists"), [])
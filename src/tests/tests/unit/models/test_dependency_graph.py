@@ -0,0 +1,60 @@
+import unittest
+from models.dependency_graph import DependencyGraph
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        def make_entry(environment: str, source: str, variant: str = None, keys: list[str] = None, key_files: dict = None) -> dict:
+            return {
+                'source': source,
+                'mode': 'replace',
+                'variant': variant,
+                'unit': f'dist/docker-{environment}/app1',
+                'keys': keys or [],
+                'key_files': key_files or {},
+            }
+
+        self.graph = DependencyGraph({
+            'dist/docker-develop/app1/app1/nginx.conf': make_entry('develop', 'templates/app1/src/nginx.conf', keys=['CERT'],
+                                                                   key_files={'CERT': 'templates/app1/replacement_files/CERT.txt'}),
+            'dist/docker-production/app1/app1/nginx.conf': make_entry('production', 'templates/app1/src/nginx.production.conf', 'production',
+                                                                      keys=['CERT'], key_files={'CERT': 'replacement_files/CERT.production.txt'}),
+            'dist/docker-develop/app1/app1/Dockerfile': make_entry('develop', 'templates/app1/src/Dockerfile', keys=['NAME']),
+            'dist/docker-production/app1/app1/Dockerfile': make_entry('production', 'templates/app1/src/Dockerfile', keys=['NAME']),
+        }, ['develop', 'production'], {
+            f'dist/docker-{environment}/app1': {
+                'configs': ['config.yml', 'templates/app1/config.yml', f'templates/app1/config.{environment}.yml'],
+            } for environment in ('develop', 'production')
+        })
+
+    def test_get_affected_outputs_by_source(self):
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/src/Dockerfile'), [
+            'dist/docker-develop/app1/app1/Dockerfile',
+            'dist/docker-production/app1/app1/Dockerfile',
+        ])
+        # The base file is not used by the environment which has the variant
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/src/nginx.conf'), ['dist/docker-develop/app1/app1/nginx.conf'])
+        # The variant added for the environment
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/src/Dockerfile.production'), [])
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/src/nginx.develop.conf'), ['dist/docker-develop/app1/app1/nginx.conf'])
+
+    def test_get_affected_outputs_by_config(self):
+        self.assertEqual(len(self.graph.get_affected_outputs('config.yml')), 4)
+        # The configuration file of the environment, even if it did not exist
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/config.develop.yml'), [
+            'dist/docker-develop/app1/app1/Dockerfile',
+            'dist/docker-develop/app1/app1/nginx.conf',
+        ])
+
+    def test_get_affected_outputs_by_replacement_file(self):
+        self.assertEqual(self.graph.get_affected_outputs('replacement_files/CERT.production.txt'),
+                         ['dist/docker-production/app1/app1/nginx.conf'])
+        # The file which defines the key for the environment, added next to the configuration files
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/replacement_files/NAME.develop.txt'),
+                         ['dist/docker-develop/app1/app1/Dockerfile'])
+        self.assertEqual(self.graph.get_affected_outputs('templates/app1/replacement_files/UNUSED.txt'), [])
+        self.assertEqual(self.graph.get_affected_outputs('templates/app2/replacement_files/NAME.txt'), [])
+
+    def test_is_source(self):
+        self.assertTrue(self.graph.is_source('templates/app1/src/nginx.production.conf'))
+        self.assertFalse(self.graph.is_source('templates/app1/src/new.conf'))
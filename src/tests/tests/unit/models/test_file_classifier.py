@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from models.file_classifier import FileClassifier
+from models.file_index import FileEntry
+
+
+class TestFileClassifier(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_entry(self, name: str, content: bytes) -> FileEntry:
+        path = f'{self.temp_dir.name}/{name}'
+        with open(path, 'wb') as f:
+            f.write(content)
+        stat = os.stat(path)
+        return FileEntry(path, name, stat.st_size, stat.st_mtime_ns)
+
+    def test_is_binary_content(self):
+        self.assertFalse(FileClassifier.is_binary_content(b'FROM nginx:{{VERSION}}\n'))
+        self.assertFalse(FileClassifier.is_binary_content('日本語'.encode('utf-8')))
+        # The head which ends in the middle of a character
+        self.assertFalse(FileClassifier.is_binary_content('日本語'.encode('utf-8')[:-1]))
+        self.assertFalse(FileClassifier.is_binary_content(b''))
+        self.assertTrue(FileClassifier.is_binary_content(b'foo\x00bar'))
+        self.assertTrue(FileClassifier.is_binary_content(b'\x89PNG\r\n\x1a\n'))
+        self.assertTrue(FileClassifier.is_binary_content(b'\x1f\x8b\x08'))
+        # The text which is not UTF-8 is still replaced
+        self.assertFalse(FileClassifier.is_binary_content(b'caf\xe9 latin-1'))
+
+    def test_is_binary_cached(self):
+        cache_dir = f'{self.temp_dir.name}/cache'
+        file_classifier = FileClassifier(cache_dir)
+        entry = self._make_entry('logo.png', b'\x89PNG\r\n\x1a\n')
+        self.assertTrue(file_classifier.is_binary(entry))
+        file_classifier.save()
+
+        # The result of the same status is used without reading the file
+        os.remove(entry.path)
+        self.assertTrue(FileClassifier(cache_dir).is_binary(entry))
+
+        changed = self._make_entry('logo.png', b'text')
+        changed.mtime_ns += 1
+        self.assertFalse(FileClassifier(cache_dir).is_binary(changed))
+
+    def test_update_from_worker(self):
+        cache_dir = f'{self.temp_dir.name}/cache'
+        worker_classifier = FileClassifier(cache_dir)
+        entry = self._make_entry('logo.png', b'\x89PNG\r\n\x1a\n')
+        worker_classifier.is_binary(entry)
+        new_results = worker_classifier.pop_new_results()
+        self.assertEqual(list(new_results), [entry.path])
+        self.assertEqual(worker_classifier.pop_new_results(), {})
+
+        # The main process saves the results of the worker
+        file_classifier = FileClassifier(cache_dir)
+        file_classifier.update(new_results)
+        file_classifier.save()
+        os.remove(entry.path)
+        self.assertTrue(FileClassifier(cache_dir).is_binary(entry))
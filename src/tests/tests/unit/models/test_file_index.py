@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from models.file_index import FileIndex
+from models.ignore_matcher import IgnoreMatcher
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_path = self.temp_dir.name
+        for rel_path in ['foo.txt', 'bar.txt', 'bar.develop.txt', 'baz.production.txt', 'jquery.min.js', 'sub/qux.develop.yml']:
+            os.makedirs(os.path.dirname(f'{self.root_path}/{rel_path}'), exist_ok=True)
+            with open(f'{self.root_path}/{rel_path}', 'w') as f:
+                f.write(rel_path)
+        self.file_index = FileIndex(self.root_path, ['develop', 'production'])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _get_files(self, environment: str) -> dict[str, str]:
+        return {logical_path: entry.rel_path for logical_path, entry in self.file_index.get_files(environment).items()}
+
+    def test_get_files_develop(self):
+        self.assertEqual(self._get_files('develop'), {
+            'bar.txt': 'bar.develop.txt',
+            'foo.txt': 'foo.txt',
+            'jquery.min.js': 'jquery.min.js',
+            'sub/qux.yml': 'sub/qux.develop.yml',
+        })
+
+    def test_get_files_production(self):
+        self.assertEqual(self._get_files('production'), {
+            'bar.txt': 'bar.txt',
+            'baz.txt': 'baz.production.txt',
+            'foo.txt': 'foo.txt',
+            'jquery.min.js': 'jquery.min.js',
+        })
+
+    def test_get_files_entry(self):
+        entry = self.file_index.get_files('develop')['foo.txt']
+        self.assertEqual(entry.path, f'{self.root_path}/foo.txt')
+        self.assertEqual(entry.size, len('foo.txt'))
+
+    def test_get_files_ignore_dir(self):
+        file_index = FileIndex(self.root_path, ['develop', 'production'], IgnoreMatcher(['sub/*']))
+        self.assertNotIn('sub/qux.yml', file_index.get_files('develop'))
+        self.assertIn('foo.txt', file_index.get_files('develop'))
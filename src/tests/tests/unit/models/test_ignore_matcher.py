@@ -0,0 +1,27 @@
+import fnmatch
+import unittest
+from models.ignore_matcher import IgnoreMatcher
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    def setUp(self):
+        self.patterns = ['docker-compose.yml', '*.bak', '*.min.*', 'node_modules/*', '*/vendor/*', 'conf/?.ini', '[ab].txt']
+        self.matcher = IgnoreMatcher(self.patterns)
+
+    def test_is_match_same_as_fnmatch(self):
+        paths = ['docker-compose.yml', 'sub/docker-compose.yml', 'foo.bak', 'sub/foo.bak', 'foo.bak.txt', 'jquery.min.js',
+                 'node_modules/foo/bar.js', 'sub/node_modules/foo.js', 'sub/vendor/foo.php', 'vendor/foo.php',
+                 'conf/a.ini', 'conf/ab.ini', 'a.txt', 'c.txt']
+        for path in paths:
+            expected = any(fnmatch.fnmatch(path, pattern) for pattern in self.patterns)
+            self.assertEqual(self.matcher.is_match(path), expected, path)
+
+    def test_is_match_no_patterns(self):
+        self.assertFalse(IgnoreMatcher([]).is_match('foo.txt'))
+
+    def test_is_ignore_dir(self):
+        self.assertTrue(self.matcher.is_ignore_dir('node_modules'))
+        self.assertTrue(self.matcher.is_ignore_dir('sub/vendor'))
+        self.assertFalse(self.matcher.is_ignore_dir('sub/node_modules'))
+        self.assertFalse(self.matcher.is_ignore_dir('vendor'))
+        self.assertFalse(self.matcher.is_ignore_dir('conf'))
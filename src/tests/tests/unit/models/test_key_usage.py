@@ -0,0 +1,16 @@
+import unittest
+from models.key_usage import KeyUsage
+
+
+class TestKeyUsage(unittest.TestCase):
+    def test_key_usage(self):
+        key_usage = KeyUsage()
+        key_usage.defined_keys.update(['foo', 'baz'])
+        key_usage.add('a.txt', frozenset(['foo', 'bar']), {'foo': 'x', 'baz': 'y'})
+
+        other = KeyUsage()
+        other.add('b.txt', frozenset(['bar']), {})
+        key_usage.merge(other)
+
+        self.assertEqual(key_usage.get_unused_keys(), ['baz'])
+        self.assertEqual(key_usage.undefined_keys, {'bar': {'a.txt', 'b.txt'}})
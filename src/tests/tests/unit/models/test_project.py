@@ -1,5 +1,14 @@
+import asyncio
+import os
+import shutil
+import time
 import unittest
+from unittest import mock
+from factories.project_factory import ProjectFactory
+from models.config import Config, GlobalConfig
+from models.project import Project
 from tests.models.project_mock import ProjectMock
+from tests.models.workspace_test_case import WorkspaceTestCase
 
 
 class TestProject(unittest.TestCase):
@@ -18,3 +27,125 @@ class TestProject(unittest.TestCase):
         ]
 
         self.project._get_dir_file_paths(self.base_path)
+
+
+class TestProjectBuild(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        self._write('config.yml', 'environments: [develop]\nreplacements:\n  NAME: foo\nsettings:\n  io_concurrency: 4\n')
+        for index in range(20):
+            self._write(f'templates/src/dir{index % 3}/file{index}.txt', f'{index}: {{{{NAME}}}}\n')
+        self._write('templates/src/Dockerfile', 'FROM base\n')
+        self._write('templates/src/Dockerfile.temp', 'FROM {{NAME}}\n')
+
+    def _read(self, path: str) -> str:
+        with open(f'dist/docker-develop/templates/{path}') as f:
+            return f.read()
+
+    def test_build_io_concurrency(self):
+        global_config = GlobalConfig()
+        global_config.init_config()
+        project = ProjectFactory().make('templates', 'develop', global_config)
+        self.assertEqual(project.config.io_concurrency, 4)
+        project.build()
+
+        for index in range(20):
+            self.assertEqual(self._read(f'dir{index % 3}/file{index}.txt'), f'{index}: foo\n')
+        # The files of the same output are built in order, the same as the sequential build
+        self.assertEqual(self._read('Dockerfile'), 'FROM foo\n')
+        self.assertEqual(project.stats.counts['replaced_files'], 21)
+        self.assertEqual(project.stats.counts['copied_files'], 1)
+
+    def test_build_in_event_loop(self):
+        global_config = GlobalConfig()
+        global_config.init_config()
+        project = ProjectFactory().make('templates', 'develop', global_config)
+
+        async def build():
+            project.build()
+
+        # Called from the async code, the files are built one by one instead of failing in asyncio.run()
+        asyncio.run(build())
+        for index in range(20):
+            self.assertEqual(self._read(f'dir{index % 3}/file{index}.txt'), f'{index}: foo\n')
+
+    def test_build_io_concurrency_error(self):
+        self._write('config.yml', 'environments: [develop]\nreplacements:\n  NAME: foo\nsettings:\n  io_concurrency: 32\n')
+        global_config = GlobalConfig()
+        global_config.init_config()
+        project = ProjectFactory().make('templates', 'develop', global_config)
+        is_replace_file_content = Project._is_replace_file_content
+
+        def is_replace_or_fail(self, rel_path, file_entry):
+            if rel_path.endswith('file0.txt'):
+                raise Exception('failed to read')
+            time.sleep(0.1)
+            return is_replace_file_content(self, rel_path, file_entry)
+
+        with mock.patch.object(Project, '_is_replace_file_content', autospec=True, side_effect=is_replace_or_fail):
+            with self.assertRaisesRegex(Exception, 'failed to read'):
+                project.build()
+        # The other files in progress are cancelled, instead of finishing them before raising the error
+        self.assertEqual([names for _, _, names in os.walk('dist') if names], [])
+
+    def test_get_file_index_shared(self):
+        global_config = GlobalConfig()
+        global_config.init_config()
+        project_factory = ProjectFactory()
+        # The folder scanned to get the sizes of the files (--shard-balance size) is not scanned again by the build
+        file_index = project_factory.get_file_index('templates', global_config)
+        self.assertIs(project_factory.make('templates', 'develop', global_config).file_index, file_index)
+
+    def test_build_bytes_written(self):
+        # Only one source for each output ("Dockerfile.temp" would overwrite "Dockerfile")
+        os.remove('templates/src/Dockerfile')
+        with open(f'{self.workspace_path}/templates/src/logo.png', 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR')
+
+        for is_dedupe_output in (False, True):
+            with self.subTest(is_dedupe_output=is_dedupe_output):
+                shutil.rmtree('dist', ignore_errors=True)
+                self._write('config.yml', 'environments: [develop]\nreplacements:\n  NAME: foo\n'
+                                          f'settings:\n  is_dedupe_output: {str(is_dedupe_output).lower()}\n')
+                global_config = GlobalConfig()
+                global_config.init_config()
+                project = ProjectFactory().make('templates', 'develop', global_config)
+                project.build()
+
+                # Each output is counted once, copied or replaced (the report of --report)
+                output_sizes = [os.path.getsize(os.path.join(dir_path, name))
+                                for dir_path, _, names in os.walk('dist/docker-develop') for name in names]
+                self.assertEqual(project.stats.counts['bytes_written'], sum(output_sizes))
+                self.assertEqual(project.stats.counts['copied_files'], 1)
+
+    def test_build_not_utf8_text(self):
+        with open(f'{self.workspace_path}/templates/src/app.conf', 'wb') as f:
+            f.write(b'caf\xe9={{NAME}}\n')
+        global_config = GlobalConfig()
+        global_config.init_config()
+        project = ProjectFactory().make('templates', 'develop', global_config)
+        project.build()
+
+        # The Latin-1 text is replaced, and its bytes which are not UTF-8 are kept
+        with open('dist/docker-develop/templates/app.conf', 'rb') as f:
+            self.assertEqual(f.read(), b'caf\xe9=foo\n')
+        self.assertEqual(project.stats.counts['copied_files'], 1)
+
+    def test_build_variants(self):
+        self._write('config.yml', 'environments: [develop, production]\nsettings:\n  ignore_files: ["*.develop.bak"]\n')
+        self._write('templates/src/app.conf', 'base\n')
+        self._write('templates/src/app.develop.conf', 'develop\n')
+        self._write('templates/src/only.production.conf', 'production\n')
+        self._write('templates/src/skip.develop.bak', 'skip\n')
+        global_config = GlobalConfig()
+        global_config.init_config()
+        config = Config('templates', 'develop')
+        config.init_config(global_config)
+        # Without the shared file index, the project knows the other environments from the global config
+        Project('templates', 'develop', config).build()
+
+        self.assertEqual(self._read('app.conf'), 'develop\n')
+        self.assertFalse(os.path.exists('dist/docker-develop/templates/only.conf'))
+        self.assertFalse(os.path.exists('dist/docker-develop/templates/only.production.conf'))
+        # The ignore patterns are matched with the real file name
+        self.assertFalse(os.path.exists('dist/docker-develop/templates/skip.bak'))
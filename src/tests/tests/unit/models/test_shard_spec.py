@@ -0,0 +1,30 @@
+import unittest
+from models.shard_spec import ShardSpec
+
+
+class TestShardSpec(unittest.TestCase):
+    def setUp(self):
+        self.units = [(env, f'pj{index}') for env in ['develop', 'production'] for index in range(5)]
+
+    def test_parse(self):
+        shard = ShardSpec.parse('2/4')
+        self.assertEqual((shard.index, shard.count), (2, 4))
+        for text in ['0/4', '5/4', '2', 'a/b']:
+            with self.assertRaises(Exception):
+                ShardSpec.parse(text)
+
+    def test_select_covers_units(self):
+        selected = [unit for index in range(1, 4) for unit in ShardSpec(index, 3).select(self.units)]
+        self.assertEqual(sorted(selected), sorted(self.units))
+
+    def test_select_not_depend_on_order(self):
+        shard = ShardSpec(1, 3)
+        self.assertEqual(sorted(shard.select(self.units)), sorted(shard.select(list(reversed(self.units)))))
+
+    def test_select_balance_size(self):
+        sizes = {unit: 1 for unit in self.units}
+        sizes[('develop', 'pj0')] = 100
+        shards = [ShardSpec(index, 2, True).select(self.units, sizes) for index in range(1, 3)]
+        # The largest unit is alone in its shard
+        self.assertEqual(shards[0], [('develop', 'pj0')])
+        self.assertEqual(len(shards[1]), len(self.units) - 1)
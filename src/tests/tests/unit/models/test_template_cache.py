@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from models.compiled_template import CompiledTemplate
+from models.template_cache import TemplateCache
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_compile(self):
+        template = CompiledTemplate.compile("{{foo}} {{bar}}\n{{foo}}!")
+        self.assertEqual(template.segments, ('', ' ', '\n', '!'))
+        self.assertEqual(template.keys, ('foo', 'bar', 'foo'))
+        self.assertEqual(template.key_set, frozenset(['foo', 'bar']))
+        self.assertEqual(CompiledTemplate.compile("no keys").key_set, frozenset())
+
+    def test_get_from_cache_dir(self):
+        TemplateCache(self.temp_dir.name).get('a.txt', "{{foo}}-{{bar}}")
+
+        # The next run reads the compiled template, not the content
+        template = TemplateCache(self.temp_dir.name).get('a.txt', "{{foo}}-{{bar}}")
+        self.assertEqual(template.segments, ('', '-', ''))
+        self.assertEqual(len(os.listdir(f'{self.temp_dir.name}/{TemplateCache.DIR_NAME}')), 1)
+
+    def test_get_chunked_key(self):
+        template_cache = TemplateCache()
+        template_cache.HASH_CHUNK_SIZE = 2
+        # The key is the same as hashing the whole content at once
+        self.assertEqual(template_cache._make_key('a.txt', "{{foo}}-\udc80"), TemplateCache()._make_key('a.txt', "{{foo}}-\udc80"))
+        self.assertNotEqual(template_cache._make_key('a.txt', "{{foo}}"), template_cache._make_key('b.txt', "{{foo}}"))
+
+    def test_prune(self):
+        template_cache = TemplateCache(self.temp_dir.name, max_size=1)
+        template_cache.get('a.txt', "{{foo}}")
+        template_cache.get('b.txt', "{{bar}}")
+        template_cache.prune()
+
+        files = [name for _, _, names in os.walk(f'{self.temp_dir.name}/{TemplateCache.DIR_NAME}') for name in names]
+        self.assertEqual(files, [])
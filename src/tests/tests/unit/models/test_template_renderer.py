@@ -0,0 +1,61 @@
+import io
+import unittest
+from models.compiled_template import CompiledTemplate
+from models.parser.file_parser import FileParser
+from models.parser.param_parser import ParamParser
+from models.template_renderer import TemplateRenderer
+from tests.models.config_mock import ConfigMock
+
+
+class TestTemplateRenderer(unittest.TestCase):
+    def setUp(self):
+        self.base_path = "src/tests/test_files/project_config/replacement_files"
+        self.config = ConfigMock(None, "development")
+
+    def _make_parsers(self, params: dict[str, str]) -> dict:
+        return {key: ParamParser(self.config, key, value) for key, value in params.items()}
+
+    def _render_by_chain(self, parsers: dict, content: str) -> str:
+        for _, parser in parsers.items():
+            content = parser.parse(content)
+        return content
+
+    def test_render_same_as_chain(self):
+        parsers = self._make_parsers({'foo': 'bar', 'baz': 'qux', 'empty': ''})
+        parsers['break'] = FileParser(self.config, 'break', f'{self.base_path}/break.txt')
+        renderer = TemplateRenderer(parsers)
+
+        content = "{{foo}}-{{baz}}{{foo}} {{{foo}}} {{aaa}} {{empty}}{{ foo }}\n{{break}}"
+        self.assertEqual(renderer.render(content), self._render_by_chain(parsers, content))
+
+    def test_render_not_replace(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': 'bar'}))
+        self.assertEqual(renderer.render("This is {{aaa}}"), "This is {{aaa}}")
+
+    def test_render_nested_default(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': '{{baz}}', 'baz': 'qux'}))
+        self.assertEqual(renderer.render("This is {{foo}}"), "This is {{baz}}")
+
+    def test_render_nested(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': '{{baz}}-{{aaa}}', 'baz': 'qux'}), True)
+        self.assertEqual(renderer.render("This is {{foo}}"), "This is qux-{{aaa}}")
+
+    def test_render_nested_circular(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': '{{baz}}', 'baz': '{{foo}}'}), True)
+        with self.assertRaises(Exception):
+            renderer.render("This is {{foo}}")
+
+    def test_render_stream(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': 'bar', 'baz': 'qux'}))
+        content = "{{foo}}-{{baz}}{{foo}} {{{foo}}} {{aaa}} {{ foo }}{"
+
+        for chunk_size in [1, 2, 3, 7, 100]:
+            output = []
+            keys = renderer.render_stream(io.StringIO(content), output.append, chunk_size)
+            self.assertEqual(''.join(output), renderer.render(content))
+            self.assertEqual(keys, frozenset(['foo', 'baz', 'aaa', ' foo ']))
+
+    def test_render_compiled(self):
+        renderer = TemplateRenderer(self._make_parsers({'foo': 'bar', 'baz': 'qux'}))
+        content = "{{foo}}-{{baz}}{{foo}} {{{foo}}} {{aaa}} {{ foo }}{"
+        self.assertEqual(renderer.render_compiled(CompiledTemplate.compile(content)), renderer.render(content))
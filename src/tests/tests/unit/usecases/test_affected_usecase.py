@@ -0,0 +1,20 @@
+from models.build_manifest import ManifestNotFoundError
+from tests.factories.project_factory_mock import ProjectFactoryMock
+from tests.models.config_mock import GlobalConfigMock
+from tests.models.workspace_test_case import WorkspaceTestCase
+from usecases.affected_usecase import AffectedUsecase
+from usecases.build_usecase import BuildUsecase
+
+
+class TestAffectedUsecase(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.global_config = GlobalConfigMock()
+        self.global_config._environments = ['develop']
+        project_factory = ProjectFactoryMock()
+        self.usecase = AffectedUsecase(self.global_config, project_factory, BuildUsecase(self.global_config, project_factory))
+
+    def test_get_affected_outputs_without_manifest(self):
+        # ex. a fresh checkout, or only the archives were built
+        with self.assertRaises(ManifestNotFoundError):
+            self.usecase.get_affected_outputs(['config.yml'])
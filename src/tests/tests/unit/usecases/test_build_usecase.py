@@ -0,0 +1,74 @@
+import os
+from models.build_options import BuildOptions
+from models.shard_spec import ShardSpec
+from tests.factories.project_factory_mock import ProjectFactoryMock
+from tests.models.config_mock import GlobalConfigMock
+from tests.models.workspace_test_case import WorkspaceTestCase
+from usecases.build_usecase import BuildUsecase
+from usecases.merge_shards_usecase import MergeShardsUsecase
+
+
+class FailingProjectFactoryMock(ProjectFactoryMock):
+    def make(self, name, environment, config):
+        if environment == 'production':
+            raise Exception('broken project')
+        return super().make(name, environment, config)
+
+
+class TestBuildUsecase(WorkspaceTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.global_config = GlobalConfigMock()
+        self.global_config._environments = ['develop', 'production']
+        self.global_config.set_is_ignore(True)
+
+    def test_build_report_error_per_unit(self):
+        usecase = BuildUsecase(self.global_config, FailingProjectFactoryMock())
+        results = usecase.build(BuildOptions(jobs=1))
+
+        self.assertEqual([(result.environment, result.project_name) for result in results],
+                         [('develop', 'templates'), ('production', 'templates')])
+        self.assertTrue(results[0].is_success)
+        self.assertFalse(results[1].is_success)
+        self.assertIn('broken project', results[1].error)
+
+    def test_build_archives_failed_unit(self):
+        usecase = BuildUsecase(self.global_config, FailingProjectFactoryMock())
+        results = usecase.build(BuildOptions(jobs=1, archive_format='tar.gz'))
+
+        # No archive is published (nor left as the temporary file) if any unit failed
+        self.assertFalse(results[1].is_success)
+        self.assertEqual([name for name in os.listdir('dist') if 'tar' in name], [])
+
+    def test_build_archives_given_units(self):
+        usecase = BuildUsecase(self.global_config, ProjectFactoryMock())
+        # The archive would lose the outputs of the other units
+        with self.assertRaises(Exception):
+            usecase.build(BuildOptions(archive_format='tar.gz'), [('develop', 'templates')])
+        self.assertFalse(os.path.exists('dist'))
+
+    def test_build_filter_environment(self):
+        usecase = BuildUsecase(self.global_config, ProjectFactoryMock())
+        results = usecase.build(BuildOptions(environments=['production']))
+        self.assertEqual([(result.environment, result.project_name) for result in results], [('production', 'templates')])
+
+        with self.assertRaises(Exception):
+            usecase.build(BuildOptions(environments=['staging']))
+
+    def test_check_options(self):
+        usecase = BuildUsecase(self.global_config, ProjectFactoryMock())
+
+        self.assertEqual(usecase.check_options(BuildOptions(environments=['develop'], project_names=['temp*'])), [])
+        self.assertEqual(usecase.check_options(BuildOptions(environments=['staging'], project_names=['temp*', 'api-*'])), [
+            'environment "staging" is not found in config.yml (choose from develop, production)',
+            'project "api-*" matches no project',
+        ])
+
+    def test_merge_shards_failed_unit(self):
+        usecase = BuildUsecase(self.global_config, FailingProjectFactoryMock())
+        for index in range(1, 3):
+            usecase.build(BuildOptions(shard=ShardSpec(index, 2)))
+
+        # The shards cover all units, but the unit which failed to build is not merged
+        self.assertEqual(MergeShardsUsecase(usecase).merge(), ['"templates" (production) failed to build in shard 2/2'])
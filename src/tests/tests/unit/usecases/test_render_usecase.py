@@ -0,0 +1,48 @@
+import os
+from factories.project_factory import ProjectFactory
+from models.build_options import BuildOptions
+from models.config import GlobalConfig
+from usecases.build_usecase import BuildUsecase
+from usecases.render_usecase import RenderUsecase
+from tests.models.workspace_test_case import WorkspaceTestCase
+
+
+class TestRenderUsecase(WorkspaceTestCase):
+    # Render the temporary workspace without changing the current directory
+    is_change_dir = False
+
+    def setUp(self):
+        super().setUp()
+        self._write('config.yml', 'environments: [develop, production]\nreplacements:\n  NAME: foo\nsettings:\n  is_multi_project_mode: true\n')
+        self._write('templates/app1/config.production.yml', 'replacements:\n  NAME: bar\n')
+        self._write('templates/app1/src/docker-compose.yml.temp', 'name: {{NAME}}\n')
+        self._write('templates/app1/src/nginx/nginx.conf', 'plain\n')
+
+        global_config = GlobalConfig(workspace_path=self.workspace_path)
+        global_config.init_config()
+        project_factory = ProjectFactory()
+        self.usecase = RenderUsecase(global_config, project_factory, BuildUsecase(global_config, project_factory))
+
+    def test_render(self):
+        outputs = sorted(self.usecase.render())
+
+        self.assertEqual(outputs, [
+            ('develop', 'app1', 'docker-compose.yml', b'name: foo\n'),
+            ('develop', 'app1', 'nginx/nginx.conf', b'plain\n'),
+            ('production', 'app1', 'docker-compose.yml', b'name: bar\n'),
+            ('production', 'app1', 'nginx/nginx.conf', b'plain\n'),
+        ])
+        self.assertFalse(os.path.exists('dist/docker-develop/app1'))
+
+    def test_render_paths(self):
+        outputs = list(self.usecase.render(BuildOptions(environments=['production']), paths=['docker-compose.yml*']))
+
+        self.assertEqual(outputs, [('production', 'app1', 'docker-compose.yml', b'name: bar\n')])
+
+    def test_invalidate(self):
+        list(self.usecase.render())
+        self._write('templates/app1/config.yml', 'replacements:\n  NAME: baz\n')
+        self.usecase.invalidate({'app1'})
+
+        outputs = list(self.usecase.render(BuildOptions(environments=['develop']), paths=['docker-compose.yml*']))
+        self.assertEqual(outputs, [('develop', 'app1', 'docker-compose.yml', b'name: baz\n')])
@@ -0,0 +1,72 @@
+import os
+from tests.factories.project_factory_mock import ProjectFactoryMock
+from models.build_options import BuildOptions
+from tests.models.config_mock import GlobalConfigMock
+from tests.models.workspace_test_case import WorkspaceTestCase
+from usecases.build_usecase import BuildUsecase
+from usecases.watch_usecase import WatchUsecase
+
+
+class TestWatchUsecase(WorkspaceTestCase):
+    def setUp(self):
+        # Watch the temporary folder, not the repository
+        super().setUp()
+        for path in ['config.yml', 'templates/app1/src/foo.txt', 'templates/app2/config.yml']:
+            self._write(path, path)
+
+        self.global_config = GlobalConfigMock()
+        self.global_config._environments = ['develop']
+        self.global_config.set_is_multi_project_mode(True)
+        project_factory = ProjectFactoryMock()
+        self.usecase = WatchUsecase(self.global_config, project_factory, BuildUsecase(self.global_config, project_factory))
+        self.usecase.get_changed_paths()
+
+    def test_get_changed_paths(self):
+        self.assertEqual(self.usecase.get_changed_paths(), [])
+
+        self._write('templates/app1/src/foo.txt', 'changed')
+        self._write('templates/app2/src/bar.txt', 'added')
+        os.remove('templates/app2/config.yml')
+        self.assertEqual(self.usecase.get_changed_paths(),
+                         ['templates/app1/src/foo.txt', 'templates/app2/config.yml', 'templates/app2/src/bar.txt'])
+        self.assertEqual(self.usecase.get_changed_paths(), [])
+
+    def test_get_changed_paths_in_workspace(self):
+        # Watch the workspace of the global config, not the current directory
+        global_config = GlobalConfigMock(workspace_path=self.workspace_path)
+        global_config._environments = ['develop']
+        global_config.set_is_multi_project_mode(True)
+        usecase = WatchUsecase(global_config, ProjectFactoryMock(), BuildUsecase(global_config, ProjectFactoryMock()))
+        os.chdir(self.cwd)
+        usecase.get_changed_paths()
+
+        self._write('templates/app1/src/foo.txt', 'changed')
+        changed_path = f'{self.workspace_path}/templates/app1/src/foo.txt'
+        self.assertEqual(usecase.get_changed_paths(), [changed_path])
+        self.assertEqual(usecase._get_project_name(changed_path), 'app1')
+
+    def test_is_affected(self):
+        self.global_config._environments = ['develop', 'production']
+        self.global_config._config_paths = ['config.yml']
+        units = self.usecase.build_usecase.get_units()
+
+        def get_affected_units(path: str) -> list[tuple[str, str]]:
+            return [unit for unit in units if self.usecase._is_affected(unit, path)]
+
+        self.assertEqual(get_affected_units('templates/app1/src/foo.txt'), [('develop', 'app1'), ('production', 'app1')])
+        self.assertEqual(get_affected_units('templates/app2/config.production.yml'), [('production', 'app2')])
+        self.assertEqual(get_affected_units('config.yml'), units)
+        self.assertEqual(get_affected_units('replacement_files/CERT.develop.txt'), [('develop', 'app1'), ('develop', 'app2')])
+        # The global config does not read the environment-specific file
+        self.assertEqual(get_affected_units('config.develop.yml'), [])
+
+    def test_rebuild_broken_config(self):
+        self._write('config.yml', 'environments: [develop]\nsettings:\n  is_multi_project_mode: true\n')
+        self.global_config.init_config()
+        self._write('config.yml', 'environments: [develop\n')
+
+        with self.assertRaises(Exception):
+            self.usecase.rebuild(BuildOptions(), ['config.yml'])
+        # The config of the previous build is kept
+        self.assertEqual(self.global_config.environments, ['develop'])
+        self.assertTrue(self.global_config.is_multi_project_mode)
@@ -0,0 +1,81 @@
+import copy
+import os
+from factories.project_factory import ProjectFactoryBase
+from models.build_manifest import BuildManifest, ManifestNotFoundError
+from models.build_options import BuildOptions
+from models.build_result import BuildResult
+from models.config import GlobalConfig
+from models.dependency_graph import DependencyGraph
+from models.file_index import FileIndex
+from models.project import Project
+from usecases.build_usecase import BuildUsecase
+
+
+class AffectedUsecase:
+    """ find and build the outputs affected by the changed files usecase
+
+    The dependency graph is read from the manifest of the previous build, so build once before.
+    The paths are relative to the workspace (ex. the output of "git diff --name-only"), so a CI job can build only what a commit touches.
+    * The units of the affected outputs are built incrementally: only the outputs whose inputs changed are written again.
+    * A source file added in "src" has no output yet, so the units of its project (and environment) are built.
+    """
+    global_config: GlobalConfig
+    project_factory: ProjectFactoryBase
+    build_usecase: BuildUsecase
+
+    def __init__(self, config: GlobalConfig, project_factory: ProjectFactoryBase, build_usecase: BuildUsecase):
+        self.global_config = config
+        self.project_factory = project_factory
+        self.build_usecase = build_usecase
+
+    def get_affected_outputs(self, paths: list[str]) -> list[str]:
+        """ Get the outputs which the changed files affect """
+        graph = self._load_graph()
+        return sorted({to_path for path in paths for to_path in graph.get_affected_outputs(self._normalize_path(path))})
+
+    def get_affected_units(self, paths: list[str]) -> list[tuple[str, str]]:
+        """ Get the (environment, project) units to build again, in the build order """
+        graph = self._load_graph()
+        units = self.build_usecase.get_units()
+        affected_units = set()
+        for path in map(self._normalize_path, paths):
+            for to_path in graph.get_affected_outputs(path):
+                affected_units.update((env, name) for env, name in units if to_path.startswith(Project.get_dist_root(env, name) + '/'))
+            if not graph.is_source(path):
+                affected_units.update(self._get_added_source_units(path, units))
+        return [unit for unit in units if unit in affected_units]
+
+    def rebuild(self, options: BuildOptions, paths: list[str]) -> list[BuildResult]:
+        """ Build the units affected by the changed files, keeping the outputs of the others """
+        # Keep the outputs of the previous build, and build only the changed files
+        options = copy.copy(options)
+        options.is_incremental = True
+        return self.build_usecase.build(options, self.get_affected_units(paths))
+
+    def _get_added_source_units(self, path: str, units: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """ Get the units which build the file, if it's in the "src" folder of a project (and is not the variant of the other environment) """
+        environment = FileIndex.get_environment_and_logical_path(path, self.global_config.environments)[0]
+        result = []
+        for env, name in units:
+            if environment is not None and environment != env:
+                continue
+            if path.startswith(self.project_factory.make(name, env, self.global_config).root_path + '/'):
+                result.append((env, name))
+        return result
+
+    def _load_graph(self) -> DependencyGraph:
+        """ Read the dependency graph from the manifest of the previous build. If it does not exist, raise ManifestNotFoundError """
+        path = BuildManifest.get_default_path()
+        if not os.path.isfile(path):
+            raise ManifestNotFoundError(f'"{path}" is not found. Build once (without --archive) before finding the affected outputs')
+        manifest = BuildManifest.load(path)
+        return DependencyGraph(manifest.previous_entries, self.global_config.environments, manifest.previous_units)
+
+    def _normalize_path(self, path: str) -> str:
+        """ Get the path in the same form as the manifest (ex. "./templates/app1/src/a.txt" -> "templates/app1/src/a.txt") """
+        if not os.path.isabs(path):
+            path = f'{self.global_config.base_path}{path}'
+        # Without the workspace path, the manifest has the paths relative to the current directory
+        elif self.global_config.root_path is None:
+            path = os.path.relpath(path)
+        return os.path.normpath(path).replace(os.sep, '/')
@@ -1,9 +1,15 @@
 import os
+from typing import Optional
 from factories.project_factory import ProjectFactoryBase
+from models.build_manifest import BuildManifest
+from models.build_options import BuildOptions
+from models.build_result import BuildResult
 from models.config import GlobalConfig
 from models.const import FolderName
+from models.output.output_backend import OutputBackend
+from models.pattern_matcher import PatternMatcher
 from models.project import Project
-from injector import inject
+from usecases import build_worker
 
 
 class BuildUsecase:
@@ -11,16 +17,188 @@ class BuildUsecase:
     global_config: GlobalConfig
     project_factory: ProjectFactoryBase
 
-    @inject
     def __init__(self, config: GlobalConfig, project_factory: ProjectFactoryBase):
         self.global_config = config
         self.project_factory = project_factory
 
-    def build(self):
-        """ build files """
-        for env in self.global_config.environments:
-            for project in self._get_projects(env):
-                project.build()
+    def build(self, options: BuildOptions = None, units: Optional[list[tuple[str, str]]] = None) -> list[BuildResult]:
+        """ build files
+        If units are given, or the options have the filters, build only them, and keep the previous outputs of the others.
+        If the options have the shard, build only the units of the shard, and record them in the manifests of the shard.
+        If the options have the archive format, output an archive per environment instead of the files in "dist".
+        The archive is made again from the units selected by the options, so the units cannot be given (ex. watch mode).
+        Returns the results in the order of (environment, project), even if they are built in parallel.
+        """
+        options = options if options is not None else BuildOptions()
+        is_given_units = units is not None
+        all_units = self.get_units()
+        units = self.select_units(options, units)
+        if options.shard is not None:
+            split_units = units
+            units = options.shard.select(split_units, self._get_unit_sizes(split_units) if options.shard.is_balance_size else None)
+
+        if options.archive_format is not None:
+            if is_given_units:
+                raise Exception('The archive is made from all selected units. Select them by the options, not by the units')
+            results = self._build_archives(units, options)
+            if options.shard is not None:
+                options.shard.save(split_units, units, self._get_failed_units(results))
+            self.project_factory.save_cache()
+            return results
+
+        # Skip the unchanged outputs only for the incremental build. Otherwise, all (selected) files are built
+        # The previous manifest is also needed to keep the outputs which are not built
+        manifest_path = BuildManifest.get_default_path() if options.shard is None else options.shard.get_manifest_path()
+        is_partial = options.is_filtered or len(units) < len(all_units)
+        if options.is_incremental or is_partial:
+            manifest = BuildManifest.load(manifest_path, options.is_incremental)
+        else:
+            manifest = BuildManifest(manifest_path)
+        path_matcher = PatternMatcher(options.path_patterns) if options.path_patterns is not None else None
+        context = build_worker.BuildContext(self.global_config, self.project_factory, manifest, path_matcher)
+
+        results = self._build_units(context, units, options)
+
+        if options.shard is None:
+            # Keep the manifest entries of the units not built this time
+            built_units = set(units)
+            for env, name in all_units:
+                if (env, name) not in built_units:
+                    manifest.keep_previous(Project.get_dist_root(env, name) + '/')
+            self._save_manifest(manifest, results, options.is_incremental or is_partial)
+            self._collect_object_garbage()
+        else:
+            # The manifest of the shard has only its units. Do not remove the outputs of the other shards
+            self._save_manifest(manifest, results, True, [Project.get_dist_root(env, name) + '/' for env, name in units])
+            options.shard.save(split_units, units, self._get_failed_units(results))
+        self.project_factory.save_cache()
+        return results
+
+    def _get_failed_units(self, results: list[BuildResult]) -> list[tuple[str, str]]:
+        return [(result.environment, result.project_name) for result in results if not result.is_success]
+
+    def _build_units(self, context: build_worker.BuildContext, units: list[tuple[str, str]], options: BuildOptions) -> list[BuildResult]:
+        """ Build the units in this process, or in the worker processes """
+        if options.worker_count <= 1 or len(units) <= 1:
+            return [build_worker.build_unit(context, env, name) for env, name in units]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Load the shared configurations and file indexes once, before sending them to the workers
+        self.project_factory.prepare(units, self.global_config)
+
+        # Send the shared context to each worker only once, using initializer
+        with ProcessPoolExecutor(max_workers=min(options.worker_count, len(units)),
+                                 initializer=build_worker.init_worker,
+                                 initargs=(context,)) as executor:
+            futures = [executor.submit(build_worker.build_unit_in_worker, env, name) for env, name in units]
+            results = [future.result() for future in futures]
+
+        for result in results:
+            self.project_factory.merge_file_classes(result.file_classes or {})
+        return results
+
+    def _build_archives(self, units: list[tuple[str, str]], options: BuildOptions) -> list[BuildResult]:
+        """ Build the units into the archive of each environment (ex. "dist/docker-develop.tar.gz").
+        The archive is written sequentially, so the units are built in this process
+        """
+        from models.output.archive_backend import ArchiveBackend
+
+        shard_suffix = f'.shard-{options.shard.index}-of-{options.shard.count}' if options.shard is not None else ''
+        output_backends = {}
+        results = None
+        try:
+            for env in dict.fromkeys(env for env, _ in units):
+                root_path = Project.get_environment_dist_root(env)
+                output_backends[env] = ArchiveBackend.make(options.archive_format, root_path + shard_suffix, root_path)
+
+            path_matcher = PatternMatcher(options.path_patterns) if options.path_patterns is not None else None
+            context = build_worker.BuildContext(self.global_config, self.project_factory, path_matcher=path_matcher,
+                                                output_backends=output_backends)
+            results = [build_worker.build_unit(context, env, name) for env, name in units]
+        finally:
+            # Publish the archives only if all units are built. Otherwise (ex. an error, Ctrl+C), remove the temporary files
+            is_success = results is not None and all(result.is_success for result in results)
+            self._finish_output_backends(list(output_backends.values()), is_success)
+        return results
+
+    def _finish_output_backends(self, output_backends: list[OutputBackend], is_success: bool):
+        """ Close (or abort) every backend, even if the others fail. The first error is raised after all """
+        error = None
+        for output_backend in output_backends:
+            try:
+                if is_success and error is None:
+                    output_backend.close()
+                else:
+                    output_backend.abort()
+            except BaseException as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def _save_manifest(self, manifest: BuildManifest, results: list[BuildResult], is_remove_stale: bool,
+                       stale_prefixes: Optional[list[str]] = None):
+        """ Merge the entries of the units, remove the stale outputs and save the manifest """
+        for result in results:
+            if result.is_success:
+                manifest.update(result.manifest_entries or {}, result.manifest_units)
+            else:
+                # Keep the previous outputs of the failed unit, to build them again next time
+                manifest.keep_previous(Project.get_dist_root(result.environment, result.project_name) + '/')
+
+        # Unless "dist" is removed before the build, remove the outputs not built anymore here
+        if is_remove_stale:
+            manifest.remove_stale_outputs(stale_prefixes)
+        manifest.save()
+
+    def _collect_object_garbage(self):
+        """ Remove the stored objects which the outputs do not use anymore (settings.is_dedupe_output).
+        Not done by the build of a shard, because the other shards may be building with the same store
+        """
+        from models.output.object_store import ObjectStore
+
+        object_store = ObjectStore()
+        if os.path.isdir(object_store.root_path):
+            object_store.collect_garbage()
+
+    def check_options(self, options: BuildOptions) -> list[str]:
+        """ Check the filters of the options with the workspace. Returns the problems found (ex. an unknown environment) """
+        problems = []
+        for env in options.environments or []:
+            if env not in self.global_config.environments:
+                problems.append(f'environment "{env}" is not found in config.yml (choose from {", ".join(self.global_config.environments)})')
+        if options.project_names is not None:
+            for pattern in PatternMatcher(options.project_names).get_unmatched_patterns(self._get_project_names()):
+                problems.append(f'project "{pattern}" matches no project')
+        return problems
+
+    def select_units(self, options: BuildOptions, units: Optional[list[tuple[str, str]]] = None) -> list[tuple[str, str]]:
+        """ Get the units which match the environments and the project names (wildcards can be used) of the options """
+        units = self.get_units() if units is None else units
+        if options.environments is not None:
+            for env in options.environments:
+                if env not in self.global_config.environments:
+                    raise Exception(f'Environment "{env}" is not found in config.yml')
+            units = [(env, name) for env, name in units if env in options.environments]
+        if options.project_names is not None:
+            project_matcher = PatternMatcher(options.project_names)
+            units = [(env, name) for env, name in units if project_matcher.is_match(name)]
+        return units
+
+    def _get_unit_sizes(self, units: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
+        """ Get the total bytes of the files of each unit, from the file index of each project.
+        The index is kept by the project factory, so the folders scanned here are not scanned again by the build
+        """
+        sizes = {}
+        for env, name in units:
+            file_index = self.project_factory.get_file_index(name, self.global_config)
+            sizes[(env, name)] = sum(file_entry.size for file_entry in file_index.get_files(env).values())
+        return sizes
+
+    def get_units(self) -> list[tuple[str, str]]:
+        """ Get a list of (environment, project name) to build """
+        project_names = self._get_project_names()
+        return [(env, name) for env in self.global_config.environments for name in project_names]
 
     def _get_projects(self, environment: str) -> list[Project]:
         """ Get a list of projects using file paths """
@@ -39,5 +217,6 @@ class BuildUsecase:
         if not self.global_config.is_multi_project_mode:
             return [FolderName.TARGET_ROOT_FOLDER.value]
 
-        dirs = os.listdir(FolderName.TARGET_ROOT_FOLDER.value)
+        # Sort to keep the build order deterministic
+        dirs = sorted(os.listdir(f'{self.global_config.base_path}{FolderName.TARGET_ROOT_FOLDER.value}'))
         return dirs
@@ -0,0 +1,64 @@
+import traceback
+from typing import Optional
+from factories.project_factory import ProjectFactoryBase
+from models.build_manifest import BuildManifest
+from models.build_result import BuildResult
+from models.build_stats import BuildStats
+from models.config import GlobalConfig
+from models.pattern_matcher import PatternMatcher
+from models.output.output_backend import OutputBackend
+
+
+class BuildContext:
+    """Objects shared by all units of a build"""
+    global_config: GlobalConfig
+    project_factory: ProjectFactoryBase
+    manifest: Optional[BuildManifest]
+    path_matcher: Optional[PatternMatcher]
+    # Output backend of each environment. If not given, the projects output the files in "dist"
+    output_backends: Optional[dict[str, OutputBackend]]
+
+    def __init__(self, global_config: GlobalConfig, project_factory: ProjectFactoryBase, manifest: Optional[BuildManifest] = None,
+                 path_matcher: Optional[PatternMatcher] = None, output_backends: Optional[dict[str, OutputBackend]] = None):
+        self.global_config = global_config
+        self.project_factory = project_factory
+        self.manifest = manifest
+        self.path_matcher = path_matcher
+        self.output_backends = output_backends
+
+
+# Shared context of the worker process. Set once by init_worker, not pickled for every unit.
+_context: BuildContext | None = None
+
+
+def init_worker(context: BuildContext) -> None:
+    """Initializer of the worker process"""
+    global _context
+    _context = context
+
+
+def build_unit_in_worker(environment: str, name: str) -> BuildResult:
+    """Build one (environment, project) unit in the worker process"""
+    result = build_unit(_context, environment, name)
+    # Send back what the worker added to the cache, to save it in the main process
+    result.file_classes = _context.project_factory.pop_file_classes()
+    return result
+
+
+def build_unit(context: BuildContext, environment: str, name: str) -> BuildResult:
+    """Build one (environment, project) unit, and return the result instead of raising the error"""
+    # Record the entries of this unit only, so that they can be sent back from the worker
+    manifest = context.manifest.fork() if context.manifest is not None else None
+    stats = BuildStats()
+    try:
+        with stats.measure('config_load'):
+            project = context.project_factory.make(name, environment, context.global_config)
+        project.stats = stats
+        if context.output_backends is not None:
+            project.output_backend = context.output_backends[environment]
+        project.build(manifest, context.path_matcher)
+    except Exception:
+        return BuildResult(environment, name, traceback.format_exc(), stats=stats)
+
+    return BuildResult(environment, name, manifest_entries=manifest.entries if manifest is not None else None,
+                       key_usage=project.key_usage, stats=stats, manifest_units=manifest.units if manifest is not None else None)
@@ -0,0 +1,84 @@
+import json
+import os
+from models.build_manifest import BuildManifest
+from models.build_options import BuildOptions
+from models.shard_spec import ShardSpec
+from usecases.build_usecase import BuildUsecase
+
+
+class MergeShardsUsecase:
+    """ merge the outputs of the shards usecase
+
+    After the outputs of all shards are copied into "dist" (or written to the shared "dist"),
+    check that the shards built every (environment, project) unit exactly once and successfully, and merge their build manifests.
+    """
+    build_usecase: BuildUsecase
+
+    def __init__(self, build_usecase: BuildUsecase):
+        self.build_usecase = build_usecase
+
+    def merge(self, options: BuildOptions = None) -> list[str]:
+        """ Check and merge the shards. Returns the problems found. If there is any, the manifests are not merged """
+        options = options if options is not None else BuildOptions()
+        shards = self._load_shards()
+        if not shards:
+            return [f'No shard is found in "{ShardSpec.get_dir_path()}"']
+
+        problems = []
+        counts = {shard['count'] for shard in shards}
+        if len(counts) > 1:
+            return [f'Shards of the different counts are mixed: {sorted(counts)}']
+        count = counts.pop()
+
+        indexes = sorted(shard['index'] for shard in shards)
+        for index in range(1, count + 1):
+            if index not in indexes:
+                problems.append(f'Shard {index}/{count} is missing')
+
+        # Every shard must have split the same units as this tree
+        expected_units = {tuple(unit) for unit in self.build_usecase.select_units(options)}
+        owners = {}
+        for shard in shards:
+            if {tuple(unit) for unit in shard['all_units']} != expected_units:
+                problems.append(f'Shard {shard["index"]}/{count} was built from the different units')
+            for unit in shard['units']:
+                owners.setdefault(tuple(unit), []).append(shard['index'])
+            # The shard which failed to build the unit does not cover it. The record of the older version has no failed units
+            for env, name in shard.get('failed_units', []):
+                problems.append(f'"{name}" ({env}) failed to build in shard {shard["index"]}/{count}')
+
+        for unit in sorted(expected_units | owners.keys()):
+            env, name = unit
+            indexes = owners.get(unit, [])
+            if not indexes:
+                problems.append(f'"{name}" ({env}) is not built by any shard')
+            elif len(indexes) > 1:
+                problems.append(f'"{name}" ({env}) is built by multiple shards: {indexes}')
+            elif unit not in expected_units:
+                problems.append(f'"{name}" ({env}) is not a unit of this tree')
+
+        if not problems:
+            self._merge_manifests(shards)
+        return problems
+
+    def _load_shards(self) -> list[dict]:
+        dir_path = ShardSpec.get_dir_path()
+        if not os.path.isdir(dir_path):
+            return []
+
+        shards = []
+        for file_name in sorted(os.listdir(dir_path)):
+            if ShardSpec.FILE_NAME_PATTERN.match(file_name) is None:
+                continue
+            with open(f'{dir_path}/{file_name}', encoding='utf-8') as f:
+                shards.append(json.load(f))
+        return shards
+
+    def _merge_manifests(self, shards: list[dict]):
+        """ Merge the build manifests of the shards, so that the next build (not sharded) can be incremental """
+        manifest = BuildManifest(BuildManifest.get_default_path())
+        for shard in shards:
+            shard_manifest = BuildManifest.load(ShardSpec(shard['index'], shard['count']).get_manifest_path())
+            shard_manifest.keep_previous('')
+            manifest.update(shard_manifest.entries, shard_manifest.units)
+        manifest.save()
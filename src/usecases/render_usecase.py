@@ -0,0 +1,50 @@
+from typing import Iterator, Optional
+from factories.project_factory import ProjectFactoryBase
+from models.build_options import BuildOptions
+from models.config import GlobalConfig
+from models.pattern_matcher import PatternMatcher
+from models.output.memory_backend import MemoryBackend
+from usecases.build_usecase import BuildUsecase
+
+
+class RenderUsecase:
+    """ render the outputs in memory usecase
+
+    For the tools which import this project: the outputs are returned one by one, instead of writing "dist" and reading it back.
+    The configs and parsers are kept between the calls. After the files changed, call invalidate().
+
+    ex.
+        usecase = Dependency(workspace_path='/path/to/workspace').resolve(RenderUsecase)
+        for environment, project_name, rel_path, content in usecase.render(paths=['docker-compose.yml*']):
+            ...
+    """
+    global_config: GlobalConfig
+    project_factory: ProjectFactoryBase
+    build_usecase: BuildUsecase
+
+    def __init__(self, config: GlobalConfig, project_factory: ProjectFactoryBase, build_usecase: BuildUsecase):
+        self.global_config = config
+        self.project_factory = project_factory
+        self.build_usecase = build_usecase
+
+    def render(self, options: BuildOptions = None, paths: Optional[list[str]] = None) -> Iterator[tuple[str, str, str, bytes]]:
+        """ Render the files, and yield (environment, project name, path relative to the project's dist, content) lazily.
+        The units are selected by the environments and project names of the options.
+        If paths are given (wildcards can be used, relative to the "src" folder), render only the files which match them.
+        """
+        options = options if options is not None else BuildOptions()
+        paths = paths if paths is not None else options.path_patterns
+        path_matcher = PatternMatcher(paths) if paths is not None else None
+
+        for env, name in self.build_usecase.select_units(options):
+            project = self.project_factory.make(name, env, self.global_config)
+            output_backend = MemoryBackend()
+            project.output_backend = output_backend
+            for to_path in project.iter_build(path_matcher=path_matcher):
+                yield env, name, project.get_output_rel_path(to_path), output_backend.pop(to_path)
+
+    def invalidate(self, project_names: Optional[set[str]] = None):
+        """ Discard the configs and parsers of the projects (all projects if None), after their files changed """
+        if project_names is None:
+            self.global_config.init_config()
+        self.project_factory.invalidate(project_names)
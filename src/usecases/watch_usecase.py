@@ -0,0 +1,150 @@
+import copy
+import os
+import time
+import traceback
+from typing import Callable, Optional
+from factories.project_factory import ProjectFactoryBase
+from models.build_options import BuildOptions
+from models.build_result import BuildResult
+from models.config import GlobalConfig
+from models.const import FolderName
+from models.file_index import FileIndex
+from usecases.build_usecase import BuildUsecase
+
+
+class WatchUsecase:
+    """ watch the files and build again on changes usecase
+
+    The configs, parsers and file indexes are kept in memory between the builds.
+    On each change, only the units affected by the changed files are built, incrementally with the manifest.
+    So only the templates whose source, or the values of the keys they contain, changed are replaced again.
+    * config.yml or replacement_files in the root folder: the units which read them (the environment's units for "KEY.<environment>.txt")
+    * files in "templates/<project>": the units of the project (the environment's units for "name.<environment>.ext")
+    If the build fails before building the units (ex. config.yml is broken), the config of the previous build is kept,
+    and the changed files are built again with the next change.
+    The files are watched in the workspace of the global config, and the paths have its base path (the same as config_paths).
+    """
+    global_config: GlobalConfig
+    project_factory: ProjectFactoryBase
+    build_usecase: BuildUsecase
+    _snapshot: Optional[dict[str, tuple[int, int]]]
+    _pending_paths: set[str]
+
+    def __init__(self, config: GlobalConfig, project_factory: ProjectFactoryBase, build_usecase: BuildUsecase):
+        self.global_config = config
+        self.project_factory = project_factory
+        self.build_usecase = build_usecase
+        self._snapshot = None
+        self._pending_paths = set()
+
+    def run(self, options: BuildOptions, on_build: Callable[[list[BuildResult], list[str], float], None],
+            on_error: Callable[[list[str], str], None]):
+        """ Build all, then poll the files and build the affected units, until interrupted.
+        on_build is called with the results, the changed paths and the seconds of each build.
+        on_error is called with the changed paths and the error, if the build failed before building the units.
+        """
+        start = time.perf_counter()
+        results = self.build(options)
+        on_build(results, [], time.perf_counter() - start)
+        while True:
+            time.sleep(options.watch_interval)
+            changed_paths = self.get_changed_paths()
+            if not changed_paths:
+                continue
+            # Include the changes which the failed build did not build
+            changed_paths = sorted(self._pending_paths.union(changed_paths))
+            start = time.perf_counter()
+            try:
+                results = self.rebuild(options, changed_paths)
+            except Exception:
+                self._pending_paths = set(changed_paths)
+                on_error(changed_paths, traceback.format_exc())
+                continue
+            self._pending_paths = set()
+            on_build(results, changed_paths, time.perf_counter() - start)
+
+    def build(self, options: BuildOptions) -> list[BuildResult]:
+        """ Build all projects, and take the snapshot of the files to watch """
+        self._snapshot = self._scan_files()
+        return self.build_usecase.build(options)
+
+    def rebuild(self, options: BuildOptions, changed_paths: list[str]) -> list[BuildResult]:
+        """ Build the units affected by the changed files.
+        If the global config cannot be read, raise the error before changing anything
+        """
+        # Keep the outputs of the previous build, and build only the changed files
+        options = copy.copy(options)
+        options.is_incremental = True
+
+        if any(self._get_project_name(path) is None for path in changed_paths):
+            self._reload_global_config()
+            # The project configs are merged with the global config. The project folders are not scanned again
+            self.project_factory.invalidate(is_config_only=True)
+        self.project_factory.invalidate({self._get_project_name(path) for path in changed_paths} - {None})
+
+        units = [unit for unit in self.build_usecase.get_units() if any(self._is_affected(unit, path) for path in changed_paths)]
+        return self.build_usecase.build(options, units)
+
+    def get_changed_paths(self) -> list[str]:
+        """ Get the files added, removed or modified since the previous call """
+        snapshot = self._scan_files()
+        previous = self._snapshot if self._snapshot is not None else {}
+        self._snapshot = snapshot
+        return sorted(path for path in snapshot.keys() | previous.keys() if snapshot.get(path) != previous.get(path))
+
+    def _reload_global_config(self):
+        """ Read the global config again. Read a copy first, so that the config is kept if the files are broken """
+        copy.copy(self.global_config).init_config()
+        self.global_config.init_config()
+
+    def _is_affected(self, unit: tuple[str, str], path: str) -> bool:
+        """ Whether the unit uses the changed file """
+        environment, name = unit
+        # The file for the other environment (ex. "config.production.yml", "KEY.production.txt", "nginx.production.conf")
+        path_environment = FileIndex.get_environment_and_logical_path(path, self.global_config.environments)[0]
+        if path_environment is not None and path_environment != environment:
+            return False
+
+        project_name = self._get_project_name(path)
+        if project_name is not None:
+            return project_name == name
+        # The files of the root folder, which the global config reads
+        replacement_files_path = f'{self.global_config.base_path}{FolderName.REPLACEMENT_FILES.value}'
+        return path in self.global_config.config_paths or os.path.dirname(path) == replacement_files_path
+
+    def _get_project_name(self, path: str) -> Optional[str]:
+        """ Get the name of the project which the file belongs to. None for the files of the root folder """
+        root_folder = FolderName.TARGET_ROOT_FOLDER.value
+        parts = path[len(self.global_config.base_path):].split('/')
+        if parts[0] != root_folder or len(parts) < 2:
+            return None
+        return parts[1] if self.global_config.is_multi_project_mode else root_folder
+
+    def _scan_files(self) -> dict[str, tuple[int, int]]:
+        """ Get the status (mtime, size) of the files to watch """
+        base_path = self.global_config.base_path
+        result = {}
+        for name in os.listdir(base_path or '.'):
+            path = f'{base_path}{name}'
+            if name.startswith('config') and name.endswith('.yml') and os.path.isfile(path):
+                stat = os.stat(path)
+                result[path] = (stat.st_mtime_ns, stat.st_size)
+        for dir_name in [FolderName.REPLACEMENT_FILES.value, FolderName.TARGET_ROOT_FOLDER.value]:
+            self._scan_dir(f'{base_path}{dir_name}', result)
+        return result
+
+    def _scan_dir(self, dir_path: str, result: dict[str, tuple[int, int]]):
+        if not os.path.isdir(dir_path):
+            return
+        with os.scandir(dir_path) as it:
+            for dir_entry in it:
+                path = f'{dir_path}/{dir_entry.name}'
+                if dir_entry.is_dir(follow_symlinks=False):
+                    self._scan_dir(path, result)
+                    continue
+                # Skip the file removed while scanning, or a broken link
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                result[path] = (stat.st_mtime_ns, stat.st_size)